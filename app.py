@@ -4,8 +4,16 @@ from utils.portfolio import PortfolioGenerator
 from utils.chat_handler import ChatHandler
 from utils.market_data import IndianMarketData
 from utils.live_market_data import LiveMarketData, POPULAR_SCHEME_CODES
+from utils.market_refresher import MarketRefresher
+from utils.name_search import NameSearchIndex
 from utils.visualizations import PortfolioVisualizations
 from utils.tax_optimizer import TaxOptimizer
+from utils.capital_gains import CapitalGainsEngine
+from utils.tax_projection import TaxProjector
+from utils.risk_metrics import RiskAnalytics
+from utils.stress_test import StressTester
+from utils.covariance_store import EWMACovarianceStore
+from utils.rebalancing import RebalancingEngine
 from utils.goal_based_planning import GoalBasedPlanner
 from datetime import datetime
 import time
@@ -50,10 +58,50 @@ portfolio_gen = PortfolioGenerator()
 chat_handler = ChatHandler()
 market_data = IndianMarketData()
 live_market = LiveMarketData()
+# Started once per server process; keeps indices, universe quotes and popular NAVs warm
+MarketRefresher.start_shared(
+    live_market,
+    symbols=[s['symbol'] for s in market_data.registry.view(instrument_type="stock")],
+    scheme_codes=list(POPULAR_SCHEME_CODES.values()) +
+                 [f['scheme_code'] for f in market_data.registry.view(instrument_type="mutual_fund")],
+    registry=market_data.registry
+)
 visualizer = PortfolioVisualizations()
 tax_optimizer = TaxOptimizer()
+capital_gains_engine = CapitalGainsEngine()
+tax_projector = TaxProjector(tax_optimizer)
 goal_planner = GoalBasedPlanner()
 
+@st.fragment
+def instrument_lookup():
+    """Type-ahead fund and stock lookup; typing reruns only this fragment"""
+    query = st.text_input("Fund or company name", placeholder="e.g. parag parikh flexi direct growth",
+                          key="instrument_search", type="search", live="200ms")
+    if not query.strip():
+        return
+    
+    # The refresher builds the index over the AMFI NAV file and swaps it in,
+    # so a keystroke only runs the search
+    matches = NameSearchIndex.default(market_data.registry).search(query, limit=8)
+    if not matches:
+        st.caption("No matching fund or stock")
+        return
+    
+    choice = st.radio(
+        "Matches", range(len(matches)), key="instrument_search_pick",
+        format_func=lambda i: f"{matches[i]['name']} ({matches[i]['key']})",
+        label_visibility="collapsed"
+    )
+    match = matches[choice]
+    if match['kind'] == "scheme":
+        nav = live_market.get_mutual_fund_nav(match['key'])
+        if nav:
+            st.metric("NAV", f"₹{nav['nav']:,.4f}", help=f"As of {nav['date']}")
+    else:
+        quote = live_market.get_stock_price(match['key'])
+        if quote:
+            st.metric("Price", f"₹{quote['price']:,.2f}", f"{quote['change_percent']:.2f}%")
+
 # Function to build comprehensive chat context
 def build_chat_context():
     """Build comprehensive context from all user data"""
@@ -135,6 +183,8 @@ with market_col:
                 sensex = indices['sensex']
                 st.metric("SENSEX", f"₹{sensex['value']:,.2f}",
                          f"{'🟢' if sensex['change'] >= 0 else '🔴'} {sensex['change']:.2f}%")
+        if indices.get('stale'):
+            st.caption(f"⏳ As of {datetime.fromtimestamp(indices['as_of']):%H:%M:%S}, refreshing")
 
 st.markdown('</div>', unsafe_allow_html=True)
 
@@ -234,7 +284,7 @@ if st.session_state.current_page == "Portfolio":
             "Select your risk tolerance",
             options=['Low', 'Medium', 'High'],
             value='Medium',
-            help="Low = 8% returns | Medium = 12% | High = 15%",
+            help="Blended expected returns: Low ≈ 10% | Medium ≈ 11% | High ≈ 13%",
             key="risk_appetite_slider"
         )
         
@@ -310,9 +360,29 @@ if st.session_state.current_page == "Portfolio":
                         st.info(f"{icon} {msg}")
                     time.sleep(0.4)
                 
+                # Return history sets the allocation (efficient frontier) and spreads
+                # stock picks across correlation clusters
+                universe = tuple(s['symbol'] for s in market_data.registry.view(instrument_type="stock"))
+                funds = market_data.registry.view(instrument_type="mutual_fund")
+                history = live_market.get_price_history(universe, "1y")
+                navs = live_market.get_nav_history(tuple(f['scheme_code'] for f in funds), "1y")
+                asset_classes = {
+                    **{symbol: "equity" for symbol in universe},
+                    **{f['scheme_code']: "debt" if f.get('fund_type') == "debt" else "mutual_funds" for f in funds}
+                }
+                # New returns update the persisted EWMA covariance, which then drives the
+                # frontier, parametric VaR and rebalancing
+                covariance_store = EWMACovarianceStore.shared(list(asset_classes) + ["liquid"])
+                portfolio_gen.fit_optimizer(pd.concat([history, navs], axis=1), asset_classes, covariance_store)
+                st.session_state.covariance_store = covariance_store
+                
+                stock_returns = None
+                if preferences.get("stocks") and not history.empty:
+                    stock_returns = history.pct_change(fill_method=None).iloc[1:]
+                
                 # Generate portfolio
                 portfolio = portfolio_gen.generate_portfolio(
-                    capital, monthly_investment, risk_appetite, preferences
+                    capital, monthly_investment, risk_appetite, preferences, stock_returns
                 )
                 
                 # Add metadata
@@ -335,6 +405,10 @@ if st.session_state.current_page == "Portfolio":
                 st.rerun()
             else:
                 st.error("❌ Please select at least one asset class")
+        
+        # Free-text lookup over every AMFI scheme and universe stock
+        with st.expander("🔎 Look up a fund or stock"):
+            instrument_lookup()
     
     with col2:
         st.markdown("### 📈 Your Investment Portfolio")
@@ -404,7 +478,8 @@ if st.session_state.current_page == "Portfolio":
                 fig_returns = visualizer.create_returns_chart(
                     portfolio['projected_returns'],
                     portfolio['total_investment'],
-                    portfolio['monthly_sip']
+                    portfolio['monthly_sip'],
+                    portfolio.get('projection_curve')
                 )
                 st.plotly_chart(fig_returns, use_container_width=True)
                 
@@ -426,8 +501,9 @@ if st.session_state.current_page == "Portfolio":
                     with st.expander(f"📈 Equity Stocks - ₹{stock_data['amount']:,.0f}", expanded=True):
                         st.caption(f"Invest in top blue-chip stocks")
                         
+                        shown_weights = [stock.get('weight', 1.0) for stock in stock_data['list'][:num_stocks_to_show]]
                         for idx, stock in enumerate(stock_data['list'][:num_stocks_to_show], 1):
-                            allocation = stock_data['amount'] / len(stock_data['list'][:num_stocks_to_show])
+                            allocation = stock_data['amount'] * shown_weights[idx - 1] / sum(shown_weights)
                             
                             st.markdown(f"""
                             <div style='background: rgba(21, 27, 61, 0.6); padding: 1rem; border-radius: 10px; 
@@ -439,6 +515,22 @@ if st.session_state.current_page == "Portfolio":
                                 <span style='color: #FFB800; font-weight: bold;'>Suggested: ₹{allocation:,.0f}</span>
                             </div>
                             """, unsafe_allow_html=True)
+                        
+                        # Exact buy orders from live prices
+                        shown_stocks = live_market.enrich_stock_data(stock_data['list'][:num_stocks_to_show])
+                        live_prices = [s.get('live_price', float('nan')) for s in shown_stocks]
+                        sizing = portfolio_gen.size_stock_orders(shown_stocks, stock_data['amount'], live_prices)
+                        
+                        st.markdown("**🧾 Buy Orders (at live prices)**")
+                        for order in sizing['orders']:
+                            if order['quantity'] > 0:
+                                st.write(f"- {order['symbol']}: Buy {order['quantity']} shares @ ₹{order['price']:,.2f} = ₹{order['order_value']:,.0f}")
+                            else:
+                                st.write(f"- {order['symbol']}: Budget below one share / price unavailable")
+                        st.caption(f"Leftover cash: ₹{sizing['leftover_cash']:,.0f} | Tracking error: {sizing['tracking_error'] * 100:.1f}%")
+                        stale_times = [s['timestamp'] for s in shown_stocks if s.get('price_stale')]
+                        if stale_times:
+                            st.caption(f"⏳ Some prices are from {min(stale_times)} and are being refreshed")
                 
                 # Mutual Funds
                 if 'mutual_funds' in portfolio.get('recommendations', {}):
@@ -454,7 +546,7 @@ if st.session_state.current_page == "Portfolio":
                                         margin: 0.5rem 0; border-left: 3px solid #00D9A3;'>
                                 <strong style='color: #00D9A3; font-size: 1.1em;'>{idx}. {mf['name'][:35]}</strong>
                                 <br/>
-                                <span style='color: #A0AEC0;'>{mf['category']} | 3Y Returns: {mf['returns_3y']}</span>
+                                <span style='color: #A0AEC0;'>{mf['category']} | 3Y Returns: {mf['returns_3y']:.1f}%</span>
                                 <br/>
                                 <span style='color: #FFB800; font-weight: bold;'>Monthly SIP: ₹{sip_per_fund:,.0f}</span>
                             </div>
@@ -474,7 +566,7 @@ if st.session_state.current_page == "Portfolio":
                                         margin: 0.5rem 0; border-left: 3px solid #10B981;'>
                                 <strong style='color: #10B981; font-size: 1.1em;'>{idx}. {debt['name'][:30]}</strong>
                                 <br/>
-                                <span style='color: #A0AEC0;'>{debt['type']} | Interest: {debt.get('interest_rate', 'N/A')}</span>
+                                <span style='color: #A0AEC0;'>{debt['type']} | Interest: {f"{debt['interest_rate']:.1f}%" if 'interest_rate' in debt else 'N/A'}</span>
                                 <br/>
                                 <span style='color: #FFB800; font-weight: bold;'>Suggested: ₹{allocation:,.0f}</span>
                             </div>
@@ -509,6 +601,109 @@ if st.session_state.current_page == "Portfolio":
                         perf_col3.metric("ROI", f"{roi:.1f}%")
                         
                         st.caption(f"Total Invested: ₹{invested:,.0f}")
+                
+                if 'stocks' in portfolio.get('recommendations', {}):
+                    st.markdown("---")
+                    st.markdown("**⚠️ Equity Risk Analytics (1 Year)**")
+                    
+                    symbols = tuple(s['symbol'] for s in portfolio['recommendations']['stocks']['list'])
+                    prices = live_market.get_price_history(symbols + ("^NSEI",), "1y")
+                    
+                    returns = prices.pct_change(fill_method=None).iloc[1:]
+                    held = [s for s in symbols if s in returns.columns]
+                    if held and "^NSEI" in returns.columns:
+                        risk = RiskAnalytics(returns[held], returns["^NSEI"],
+                                             st.session_state.get('covariance_store'))
+                        weights = pd.Series({s['symbol']: s.get('weight', 1.0)
+                                             for s in portfolio['recommendations']['stocks']['list']})[held]
+                        report = risk.analyze(weights / weights.sum()).iloc[0]
+                        
+                        risk_col1, risk_col2, risk_col3, risk_col4 = st.columns(4)
+                        risk_col1.metric("1-Day VaR (95%)", f"{report['historical_var'] * 100:.2f}%",
+                                         help=f"Parametric: {report['parametric_var'] * 100:.2f}%")
+                        risk_col2.metric("1-Day CVaR (95%)", f"{report['historical_cvar'] * 100:.2f}%")
+                        risk_col3.metric("Max Drawdown", f"{report['max_drawdown'] * 100:.1f}%")
+                        risk_col4.metric("Beta vs NIFTY", f"{report['beta']:.2f}")
+                        
+                        risk_col5, risk_col6, risk_col7, _ = st.columns(4)
+                        risk_col5.metric("Volatility", f"{report['annual_volatility'] * 100:.1f}%")
+                        risk_col6.metric("Sharpe Ratio", f"{report['sharpe']:.2f}")
+                        risk_col7.metric("Sortino Ratio", f"{report['sortino']:.2f}")
+                    else:
+                        st.caption("Risk analytics unavailable - could not load price history")
+                
+                st.markdown("---")
+                st.markdown("**🌪️ Historical Stress Tests**")
+                
+                held_stocks = portfolio.get('recommendations', {}).get('stocks', {}).get('list', [])
+                held_symbols = tuple(s['symbol'] for s in held_stocks)
+                history = live_market.get_price_history(held_symbols + ("^NSEI",), "max")
+                
+                if not history.empty and "^NSEI" in history.columns:
+                    history_returns = history.pct_change(fill_method=None).iloc[1:]
+                    factors = StressTester.asset_class_returns(
+                        history_returns["^NSEI"],
+                        {b: portfolio_gen.EXPECTED_RETURNS[b] for b in ("debt", "liquid")}
+                    )
+                    factors["mutual_funds"] = factors["equity"]
+                    
+                    bucket_weights = {k: v / 100 for k, v in portfolio['allocation'].items()}
+                    scenarios = [bucket_weights]
+                    labels = ["Allocation (NIFTY proxy)"]
+                    
+                    stock_cols = [s for s in held_symbols if s in history_returns.columns]
+                    if stock_cols:
+                        factors = factors.join(history_returns[stock_cols])
+                        picks = pd.Series({s['symbol']: s.get('weight', 1.0) for s in held_stocks})[stock_cols]
+                        with_stocks = {**bucket_weights, "equity": 0.0}
+                        with_stocks.update((picks / picks.sum() * bucket_weights.get("equity", 0)).to_dict())
+                        scenarios.append(with_stocks)
+                        labels.append("With stock picks")
+                    
+                    stress = StressTester(factors).run(pd.DataFrame(scenarios), labels).reset_index()
+                    stress_view = pd.DataFrame({
+                        "Scenario": stress["scenario"],
+                        "Portfolio": stress["portfolio"],
+                        "Max Loss": (stress["max_loss"] * 100).map("{:.1f}%".format),
+                        "Peak → Trough": stress["drawdown_days"].astype(str) + " days",
+                        "Recovery": stress["recovery_days"].map(
+                            lambda d: "Not within window" if pd.isna(d) else f"{int(d)} days"
+                        )
+                    })
+                    st.dataframe(stress_view, hide_index=True, use_container_width=True)
+                    st.caption("Debt and liquid buckets are modelled as steady accrual; "
+                               "stocks not yet listed in a scenario are treated as cash.")
+                else:
+                    st.caption("Stress tests unavailable - could not load price history")
+                
+                st.markdown("---")
+                st.markdown("**🔁 Rebalancing Check**")
+                st.caption("Enter what each bucket is worth today to see the trades that bring it back to this allocation.")
+                
+                buckets = list(portfolio['allocation'])
+                invested_split = {b: portfolio['total_investment'] * portfolio['allocation'][b] / 100 for b in buckets}
+                value_cols = st.columns(len(buckets))
+                holdings = [
+                    col.number_input(f"{b.replace('_', ' ').title()} (₹)", min_value=0, value=int(invested_split[b]),
+                                     step=1000, key=f"rebalance_{b}")
+                    for col, b in zip(value_cols, buckets)
+                ]
+                
+                engine = RebalancingEngine(asset_classes=buckets, portfolio_generator=portfolio_gen)
+                targets = [portfolio['allocation'][b] / 100 for b in buckets]
+                result = engine.rebalance([holdings], [targets], [portfolio['monthly_sip']])
+                trades = engine.trade_list(result)
+                
+                if trades.empty:
+                    st.success("✅ Within tolerance - no trades needed this month")
+                else:
+                    trades['asset_class'] = trades['asset_class'].str.replace('_', ' ').str.title()
+                    trades['amount'] = trades['amount'].map("₹{:,.0f}".format)
+                    st.dataframe(trades.drop(columns='portfolio'), hide_index=True, use_container_width=True)
+                uninvested = result['uninvested_cash'][0]
+                if uninvested >= 1:
+                    st.caption(f"₹{uninvested:,.0f} of this month's SIP stays as cash - "
+                               f"trades under ₹{engine.min_trade:,} are skipped.")
         
         else:
             # Enhanced welcome screen
@@ -564,7 +759,7 @@ elif st.session_state.current_page == "Tax":
     st.markdown("### 💸 Tax Optimizer")
     st.caption("Optimize your tax savings under Indian tax laws")
     
-    tax_tab1, tax_tab2, tax_tab3 = st.tabs(["🧮 Tax Calculator", "💡 80C Planner", "🏠 Home Loan Benefits"])
+    tax_tab1, tax_tab2, tax_tab3, tax_tab4 = st.tabs(["🧮 Tax Calculator", "💡 80C Planner", "🏠 Home Loan Benefits", "📅 Multi-Year Plan"])
     
     with tax_tab1:
         col1, col2 = st.columns([1, 2])
@@ -586,8 +781,29 @@ elif st.session_state.current_page == "Tax":
             deductions['24b'] = st.number_input("Home Loan Interest", 0, 200000, 0, 10000, key="ded_24b")
             deductions['hra'] = st.number_input("HRA Exemption", 0, 500000, 0, 10000, key="ded_hra")
             
+            # Instant estimate from the precomputed tax curve on every input change
+            live_estimate = tax_optimizer.quick_compare(annual_income, deductions)
+            st.caption(f"⚡ Live estimate: New ₹{live_estimate['new_regime_tax']:,.0f} | "
+                       f"Old ₹{live_estimate['old_regime_tax']:,.0f} → {live_estimate['better_regime']}")
+            
+            st.markdown("#### Capital Gains (Optional)")
+            ledger_file = st.file_uploader(
+                "Broker / CAS ledger (CSV: date, isin, side, quantity, price, asset_class)",
+                type=['csv'],
+                key="cg_ledger_upload"
+            )
+            capital_gains = None
+            if ledger_file is not None:
+                try:
+                    capital_gains_engine.process_ledger(pd.read_csv(ledger_file))
+                    capital_gains = capital_gains_engine.summarize()
+                    st.caption(f"FY {capital_gains['fy']}: STCG ₹{capital_gains['stcg_equity'] + capital_gains['stcg_debt']:,.0f} | "
+                               f"LTCG ₹{capital_gains['ltcg_equity'] + capital_gains['ltcg_debt']:,.0f}")
+                except ValueError as e:
+                    st.error(f"Could not process ledger: {str(e)}")
+            
             if st.button("Compare Regimes", type="primary", use_container_width=True, key="compare_tax_btn"):
-                comparison = tax_optimizer.compare_regimes(annual_income, deductions)
+                comparison = tax_optimizer.compare_regimes(annual_income, deductions, capital_gains)
                 st.session_state.tax_comparison = comparison
                 
                 # Store tax data for AI context
@@ -681,6 +897,38 @@ elif st.session_state.current_page == "Tax":
                         <span style='color: #FFB800;'>🔒 Lock-in:</span> {suggestion['lock_in']}
                     </div>
                     """, unsafe_allow_html=True)
+        
+        st.markdown("---")
+        st.markdown("#### ⚖️ ELSS vs PPF vs NPS vs Tax Saving FD")
+        st.caption("Post-tax maturity value after lock-ins, compounding and tax on maturity")
+        
+        cmp_col1, cmp_col2 = st.columns(2)
+        with cmp_col1:
+            cmp_horizon = st.slider("Holding Period (years)", 1, 30, 15, key="cmp_80c_horizon")
+        with cmp_col2:
+            cmp_bracket = st.select_slider("Your Tax Bracket", options=[0.05, 0.20, 0.30], value=0.30,
+                                           format_func=lambda b: f"{b*100:.0f}%", key="cmp_80c_bracket")
+        
+        # One vectorized call covers every horizon and bracket the sliders can pick
+        cmp_amount = suggestions.get('remaining', tax_optimizer.section_80c_limit) or tax_optimizer.section_80c_limit
+        comparison_grid = tax_optimizer.compare_80c_instruments([cmp_amount], range(1, 31), [0.05, 0.20, 0.30])
+        view = comparison_grid[(comparison_grid['horizon'] == cmp_horizon) &
+                               (comparison_grid['tax_bracket'] == cmp_bracket)]
+        
+        st.dataframe(pd.DataFrame({
+            'Instrument': view['instrument'],
+            'Lock-in': [f"{y} years" for y in view['lock_in']],
+            'Accessible': ['✅' if a else '🔒' for a in view['available']],
+            'Maturity Value': [f"₹{v:,.0f}" for v in view['maturity_value']],
+            'Tax on Maturity': [f"₹{v:,.0f}" for v in view['tax_on_maturity']],
+            'Post-Tax Value': [f"₹{v:,.0f}" for v in view['post_tax_value']],
+            'Tax Saved Today': [f"₹{v:,.0f}" for v in view['tax_saved_upfront']],
+            'Post-Tax CAGR': [f"{v:.1f}%" for v in view['post_tax_cagr']]
+        }), hide_index=True, use_container_width=True)
+        nps_view = view[view['instrument'] == 'NPS']
+        if not nps_view.empty:
+            st.caption(f"NPS: 60% of the corpus is a tax-free lump sum; the other 40% buys an annuity paying "
+                       f"about ₹{nps_view['annuity_income'].iloc[0]:,.0f} a year, taxed at your slab.")
     
     with tax_tab3:
         st.markdown("#### Home Loan Tax Benefits Calculator")
@@ -711,6 +959,48 @@ elif st.session_state.current_page == "Tax":
                 st.write(f"- Principal Deduction (Sec 80C): ₹{benefits['principal_deduction']:,.0f}")
                 st.caption(f"ℹ️ {benefits['note']}")
     
+    with tax_tab4:
+        st.markdown("#### Multi-Year Tax Projection")
+        st.caption("See how salary growth, investments and a home loan change the better regime over time")
+        
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            proj_income = st.number_input("Current Annual Income (₹)", 0, 10000000, 1000000, 50000, key="proj_income")
+            proj_years = st.slider("Projection Years", 10, 30, 20, key="proj_years")
+            proj_growth = st.slider("Salary Growth (%)", 0, 20, 8, key="proj_growth")
+            proj_elss = st.number_input("Monthly ELSS SIP (₹)", 0, 100000, 5000, 1000, key="proj_elss")
+            proj_step_up = st.slider("SIP Step-up (%)", 0, 20, 0, key="proj_step_up")
+            proj_nps = st.number_input("Annual NPS (₹)", 0, 50000, 0, 10000, key="proj_nps")
+            proj_loan = st.number_input("Home Loan Outstanding (₹)", 0, 50000000, 0, 100000, key="proj_loan")
+            proj_loan_rate = st.number_input("Loan Interest Rate (%)", 0.0, 20.0, 8.5, 0.25, key="proj_loan_rate")
+            proj_loan_tenure = st.number_input("Remaining Tenure (years)", 1, 30, 20, key="proj_loan_tenure")
+        
+        with col2:
+            projection = tax_projector.project(
+                proj_income, proj_years, proj_growth, proj_elss, proj_step_up, proj_nps,
+                loan_amount=proj_loan, loan_rate=proj_loan_rate, loan_tenure_years=proj_loan_tenure
+            )
+            
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=projection['years'], y=projection['new_regime_tax'],
+                                     name='New Regime', line=dict(color='#0066FF', width=3)))
+            fig.add_trace(go.Scatter(x=projection['years'], y=projection['old_regime_tax'],
+                                     name='Old Regime', line=dict(color='#00D9A3', width=3)))
+            fig.update_layout(
+                title="Projected Annual Tax",
+                xaxis_title="Year",
+                yaxis_title="Tax Amount (₹)",
+                paper_bgcolor='#151B3D',
+                plot_bgcolor='#0A0E27',
+                font=dict(color='white'),
+                height=400
+            )
+            st.plotly_chart(fig, use_container_width=True)
+            
+            st.info(f"💡 {projection['recommendation']}")
+            st.metric("Total Tax Saved by Picking the Better Regime",
+                      f"₹{projection['cumulative_tax_saved'][-1]:,.0f}")
+    
     st.markdown('</div>', unsafe_allow_html=True)
 
 # ==================== GOAL PLANNER PAGE ====================
@@ -0,0 +1,78 @@
+"""
+Benchmark: AMFI NAV file ingestion and lookups vs per-scheme MFapi requests
+Run from the repository root: python -m benchmarks.amfi_nav_index
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import requests
+
+from benchmarks.stand_in import StandInServer
+from utils.amfi_nav_index import AMFINavIndex
+from utils.history_store import HistoryStore
+from utils.http_client import HTTPClient
+from utils.live_market_data import LiveMarketData
+from utils.shared_cache import MemoryBackend, SharedCache
+
+
+def best(run, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--schemes", type=int, default=15000)
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--funds", type=int, default=40, help="Schemes fetched per page")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with StandInServer(latency=args.latency, schemes=args.schemes) as server, \
+            tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as workdir:
+        url = f"{server.url}/spages/NAVAll.txt"
+        path = Path(workdir) / "NAVAll.txt"
+        path.write_text(requests.get(url, timeout=30).text)
+
+        parse_file, index = best(lambda: AMFINavIndex.load(path), args.repeats)
+        parse_url, _ = best(lambda: AMFINavIndex.load(url, max_age=0, http_client=HTTPClient()), args.repeats)
+        size = sum(a.nbytes for a in (index.codes, index.navs, index.dates, index.isins,
+                                      index.isins_reinvestment, index.category_ids, index.amc_ids, index._rows))
+        print(f"{len(index)} schemes, {path.stat().st_size / 1e6:.1f} MB file")
+        print(f"parse from disk        {parse_file * 1000:8.1f} ms")
+        print(f"stream from local URL  {parse_url * 1000:8.1f} ms   (incl. {args.latency * 1000:.0f} ms latency)")
+        print(f"index arrays           {size / 1e6:8.2f} MB")
+
+        rng = np.random.default_rng(0)
+        codes = [str(c) for c in rng.choice(index.codes, args.lookups)]
+        elapsed, _ = best(lambda: [index.get(c) for c in codes], args.repeats)
+        print(f"get(scheme_code)       {elapsed / len(codes) * 1e6:8.2f} us per lookup")
+        isins = [str(i) for i in rng.choice(index.isins, args.lookups)]
+        elapsed, _ = best(lambda: [index.get_by_isin(i) for i in isins], args.repeats)
+        print(f"get_by_isin(isin)      {elapsed / len(isins) * 1e6:8.2f} us per lookup")
+        elapsed, _ = best(lambda: index.latest_navs(index.codes), args.repeats)
+        print(f"latest_navs(all)       {elapsed * 1000:8.2f} ms for {len(index)} schemes")
+
+        page = codes[:args.funds]
+        for name, nav_index in {"MFapi per scheme": AMFINavIndex([]), "AMFI NAV index": index}.items():
+            market = LiveMarketData(history_store=HistoryStore(Path(workdir) / f"{name}.sqlite3",
+                                                               mf_api_base=server.url),
+                                    cache=SharedCache(MemoryBackend()), nav_index=nav_index)
+            server.reset_counters()
+            start = time.perf_counter()
+            navs = market.get_mutual_fund_navs(page, deadline=30)
+            elapsed = time.perf_counter() - start
+            print(f"{name:22s} {elapsed * 1000:8.1f} ms for {len(navs)}/{len(page)} NAVs   requests {server.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: NAV history reads from MFapi JSON, SQLite rows and the memory-mapped columnar store
+Run from the repository root: python -m benchmarks.columnar_store
+"""
+
+import argparse
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import orjson
+import pandas as pd
+
+from utils.columnar_store import ColumnarStore
+from utils.history_store import HistoryStore
+
+
+def best(run, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = run()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--schemes", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=2500)
+    parser.add_argument("--reads", type=int, default=200, help="Schemes read per pass")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=args.days)
+    codes = [str(100000 + i) for i in range(args.schemes)]
+    navs = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (args.days, args.schemes)), axis=0))
+    start, end = dates[-250], dates[-1]  # One year of each scheme
+    picks = [str(c) for c in rng.choice(codes, args.reads, replace=False)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        history = HistoryStore(Path(workdir) / "history.sqlite3")
+        iso = dates.strftime("%Y-%m-%d")
+        with history._connect() as conn:
+            conn.executemany("INSERT INTO nav VALUES (?, ?, ?)",
+                             ((code, d, float(v)) for j, code in enumerate(codes) for d, v in zip(iso, navs[:, j])))
+
+        # MFapi-style payloads: newest first, DD-MM-YYYY dates, NAV as text
+        mfapi = {code: orjson.dumps({"data": [{"date": d.strftime("%d-%m-%Y"), "nav": f"{v:.4f}"}
+                                              for d, v in zip(dates[::-1], navs[::-1, j])]})
+                 for j, code in enumerate(codes) if code in picks}
+
+        store = ColumnarStore(Path(workdir) / "columnar")
+        export, written = best(lambda: store.export_history(history), 1)
+        dataset = store.open("nav")
+        size = sum(p.stat().st_size for p in dataset.directory.iterdir())
+        print(f"{args.schemes} schemes x {args.days} days = {written['nav']:,} rows, "
+              f"exported in {export:.2f} s, {size / 1e6:.1f} MB on disk")
+
+        def from_json():
+            out = []
+            for code in picks:
+                rows = orjson.loads(mfapi[code])["data"]
+                series = pd.Series([float(r["nav"]) for r in rows],
+                                   index=pd.to_datetime([r["date"] for r in rows], format="%d-%m-%Y"))
+                out.append(series.sort_index()[start:end])
+            return out
+
+        paths = {
+            "MFapi JSON (parse + slice)": from_json,
+            "SQLite (nav_history)": lambda: [history.nav_history(code, start, end) for code in picks],
+            "columnar (slice, zero-copy)": lambda: [dataset.slice(code, "nav", start, end) for code in picks],
+            "columnar (series)": lambda: [dataset.series(code, "nav", start, end) for code in picks]
+        }
+        print(f"1-year history of {args.reads} schemes:")
+        for name, run in paths.items():
+            elapsed, result = best(run, args.repeats)
+            print(f"  {name:30s} {elapsed * 1000:9.2f} ms   {elapsed / args.reads * 1e6:8.1f} us per scheme")
+
+        elapsed, frame = best(lambda: dataset.frame(codes, "nav", start, end), args.repeats)
+        print(f"aligned frame of all {args.schemes} schemes: {elapsed * 1000:.1f} ms, shape {frame.shape}")
+
+        # A second process maps the same files instead of loading them
+        script = ("import sys, time; from utils.columnar_store import ColumnarStore; t = time.perf_counter(); "
+                  "d = ColumnarStore(sys.argv[1]).open('nav'); "
+                  "s = sum(float(d.slice(c, 'nav')[1][-1]) for c in d.keys); "
+                  "print(f'{(time.perf_counter() - t) * 1000:.1f}')")
+        out = subprocess.run([sys.executable, "-c", script, str(store.path)], capture_output=True, text=True,
+                             check=True).stdout.strip()
+        print(f"second process: open + latest NAV of every scheme in {out} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Benchmark: bare requests.get vs the pooled HTTPClient under concurrent sessions
+Run from the repository root: python -m benchmarks.http_pooling
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.stand_in import StandInServer
+from utils.http_client import HTTPClient
+
+
+def run(fetch, url, sessions, calls):
+    """Each session makes `calls` sequential requests; returns (seconds, successes)"""
+    def session(_):
+        ok = 0
+        for _ in range(calls):
+            try:
+                ok += fetch(url).status_code == 200
+            except requests.RequestException:
+                pass
+        return ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        successes = sum(pool.map(session, range(sessions)))
+    return time.perf_counter() - start, successes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--failure-rate", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with StandInServer(latency=args.latency, failure_rate=args.failure_rate) as server:
+        url = f"{server.url}/v8/finance/chart/TCS.NS?range=1d"
+        client = HTTPClient(backoff=0.01, jitter=0.01)
+
+        paths = {
+            "requests.get": lambda u: requests.get(u, timeout=5),
+            "HTTPClient": client.get
+        }
+
+        total = args.sessions * args.calls
+        print(f"{args.sessions} sessions x {args.calls} calls, {args.latency * 1000:.0f} ms latency, "
+              f"{args.failure_rate:.0%} injected 503s")
+        for name, fetch in paths.items():
+            server.reset_counters()
+            elapsed, successes = run(fetch, url, args.sessions, args.calls)
+            print(f"{name:14s} {elapsed:6.3f} s   {successes}/{total} ok   "
+                  f"{server.connections} TCP connections   {server.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark: fuzzy scheme/stock name search over an AMFI-sized universe
+Run from the repository root: python -m benchmarks.name_search
+"""
+
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from utils.instrument_registry import InstrumentRegistry
+from utils.name_search import NameSearchIndex
+
+AMCS = ["Aditya Birla Sun Life", "Axis", "Bandhan", "Canara Robeco", "DSP", "Edelweiss", "Franklin India",
+        "HDFC", "HSBC", "ICICI Prudential", "Invesco India", "Kotak", "LIC", "Mirae Asset", "Motilal Oswal",
+        "Nippon India", "Parag Parikh", "PGIM India", "Quant", "SBI", "Sundaram", "Tata", "UTI", "WhiteOak Capital"]
+STRATEGIES = ["Bluechip", "Large Cap", "Flexi Cap", "Mid-Cap Opportunities", "Small Cap", "ELSS Tax Saver",
+              "Focused Equity", "Value", "Balanced Advantage", "Corporate Bond", "Banking & PSU Debt",
+              "Short Term Debt", "Liquid", "Overnight", "Gilt", "Nifty 50 Index", "Nifty Next 50 Index",
+              "Multi Asset Allocation", "Equity Savings", "Arbitrage", "Dynamic Bond", "Credit Risk",
+              "Infrastructure", "Healthcare", "Technology", "Consumption"]
+PLANS = ["Direct Plan", "Regular Plan"]
+OPTIONS = ["Growth", "IDCW", "IDCW Reinvestment", "Monthly IDCW", "Quarterly IDCW", "Bonus",
+           "Annual IDCW", "Weekly IDCW", "Daily IDCW", "Half Yearly IDCW", "Growth Option", "IDCW Payout"]
+
+QUERIES = ["parag parikh flexi direct growth", "sbi blue", "axis bluechp direct", "hdfc midcap", "nipon small cap",
+           "icici pru balanced advantage regular idcw", "kotak nifty next 50", "tata consult", "reliance", "uti"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    names = [f"{amc} {strategy} Fund - {plan} - {option}"
+             for amc, strategy, plan, option in itertools.product(AMCS, STRATEGIES, PLANS, OPTIONS)]
+    entries = [("scheme", 100000 + i, name) for i, name in enumerate(names)]
+    entries += [("stock", s["symbol"], s["name"]) for s in InstrumentRegistry.default().view(instrument_type="stock")]
+
+    start = time.perf_counter()
+    index = NameSearchIndex(entries)
+    build = time.perf_counter() - start
+    print(f"{len(index)} names, {len(index.vocabulary)} tokens, built in {build * 1000:.0f} ms")
+
+    # Autocomplete: every prefix of each query as it is typed
+    typed = [q[:n] for q in QUERIES for n in range(2, len(q) + 1)]
+    timings = []
+    for text in typed:
+        index.search(text, limit=8)
+        start = time.perf_counter()
+        for _ in range(args.repeats):
+            index.search(text, limit=8)
+        timings.append((time.perf_counter() - start) / args.repeats * 1000)
+    timings = np.array(timings)
+    print(f"{len(typed)} keystroke queries   p50 {np.percentile(timings, 50):.3f} ms   "
+          f"p99 {np.percentile(timings, 99):.3f} ms   max {timings.max():.3f} ms")
+
+    for query in QUERIES:
+        best = index.search(query, limit=1)
+        print(f"  {query!r:45s} -> {best[0]['name'] if best else '-'}")
+
+
+if __name__ == "__main__":
+    main()
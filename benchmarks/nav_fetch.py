@@ -0,0 +1,59 @@
+"""
+Benchmark: sequential vs concurrent mutual fund NAV fetch
+Run from the repository root: python -m benchmarks.nav_fetch
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.stand_in import StandInServer
+from utils.amfi_nav_index import AMFINavIndex
+from utils.history_store import HistoryStore
+from utils.live_market_data import LiveMarketData
+from utils.shared_cache import MemoryBackend, SharedCache
+
+
+def reset(server, market, workdir, run):
+    """Empty every cache layer so each path starts cold"""
+    market.cache = SharedCache(MemoryBackend())
+    market.history = HistoryStore(Path(workdir) / f"history_{run}.sqlite3", mf_api_base=server.url)
+    server.reset_counters()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--funds", type=int, default=40)
+    parser.add_argument("--min-latency", type=float, default=0.05)
+    parser.add_argument("--max-latency", type=float, default=0.4)
+    parser.add_argument("--failure-rate", type=float, default=0.1)
+    parser.add_argument("--deadline", type=float, default=2.0)
+    args = parser.parse_args()
+
+    codes = [str(100000 + i) for i in range(args.funds)]
+
+    with StandInServer(latency=(args.min_latency, args.max_latency), failure_rate=args.failure_rate) as server, \
+            tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as workdir:
+        # Empty AMFI index, so every scheme goes through MFapi
+        market = LiveMarketData(history_store=HistoryStore(Path(workdir) / "history.sqlite3"),
+                                cache=SharedCache(MemoryBackend()), nav_index=AMFINavIndex([]))
+
+        paths = {
+            "sequential (get_mutual_fund_nav)": lambda: {c: market.get_mutual_fund_nav(c) for c in codes},
+            "concurrent (get_mutual_fund_navs)": lambda: market.get_mutual_fund_navs(codes, args.deadline)
+        }
+
+        print(f"{args.funds} schemes, {args.min_latency * 1000:.0f}-{args.max_latency * 1000:.0f} ms "
+              f"latency, {args.failure_rate:.0%} failures, {args.deadline:.1f} s batch deadline")
+        for i, (name, run) in enumerate(paths.items()):
+            reset(server, market, workdir, i)
+            start = time.perf_counter()
+            navs = run()
+            elapsed = time.perf_counter() - start
+            received = sum(1 for nav in navs.values() if nav)
+            print(f"{name:36s} {elapsed:6.3f} s   {received}/{len(codes)} NAVs   requests {server.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: many sessions opening the app on a cold cache
+Independent fetches vs single-flight coalescing, under the Yahoo rate limit
+Run from the repository root: python -m benchmarks.request_coalescing
+"""
+
+import argparse
+import threading
+import time
+
+from benchmarks.stand_in import StandInServer, YahooStandIn
+from utils import live_market_data
+from utils.http_client import HTTPClient
+from utils.instrument_registry import InstrumentRegistry
+from utils.live_market_data import LiveMarketData
+from utils.rate_limiter import RateLimiter
+from utils.shared_cache import MemoryBackend, SharedCache
+from utils.single_flight import SingleFlight
+
+
+class Uncoalesced:
+    """Stand-in for SingleFlight that lets every caller fetch"""
+
+    def do(self, key, fn):
+        return fn()
+
+    def stats(self):
+        return {"leaders": 0, "coalesced": 0, "in_flight": 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.1, help="Seconds per stand-in response")
+    parser.add_argument("--rate", type=float, default=50, help="Yahoo requests per second")
+    parser.add_argument("--burst", type=int, default=40)
+    args = parser.parse_args()
+
+    symbols = tuple(s["symbol"] for s in InstrumentRegistry.default().view(instrument_type="stock"))
+
+    with StandInServer(latency=args.latency) as server:
+        live_market_data.yf = YahooStandIn(server.url)
+
+        print(f"{args.sessions} sessions, {len(symbols)} symbols + indices each, "
+              f"{args.latency * 1000:.0f} ms per response, Yahoo limit {args.rate:.0f}/s burst {args.burst}")
+        for name, flights in {"independent": Uncoalesced(), "single-flight": SingleFlight()}.items():
+            limiter = RateLimiter({"finance.yahoo.com": (args.rate, args.burst)})
+            market = LiveMarketData(http_client=HTTPClient(rate_limiter=limiter),
+                                    cache=SharedCache(MemoryBackend()))
+            market._flights = flights
+            server.reset_counters()
+
+            barrier = threading.Barrier(args.sessions)
+            ready = []
+
+            def session():
+                barrier.wait()
+                start = time.perf_counter()
+                market.get_market_indices()
+                market.get_stock_prices(symbols)
+                ready.append(time.perf_counter() - start)
+
+            threads = [threading.Thread(target=session) for _ in range(args.sessions)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+            stats = market.request_stats()
+            limits = stats["rate_limits"].get("finance.yahoo.com", {})
+            print(f"{name:14s} slowest session {max(ready):6.3f} s   upstream requests {server.requests:4d}   "
+                  f"coalesced {stats['single_flight']['coalesced']:3d}   "
+                  f"throttled {limits.get('throttled', 0):3d} ({limits.get('wait_seconds', 0.0):.2f} s waited)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: shared cache backends and formats, and cross-process hits
+Run from the repository root: python -m benchmarks.shared_cache
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stand_in import RespStandInServer
+from utils.shared_cache import SharedCache
+
+
+def sample_values():
+    """A quote dict and a year of closes for 15 symbols, like LiveMarketData caches"""
+    quote = {"symbol": "TCS", "name": "TCS", "price": 4123.55, "change_percent": -0.42,
+             "currency": "INR", "timestamp": "10:15:00"}
+    dates = pd.bdate_range(end="2024-12-31", periods=250, name="date")
+    history = pd.DataFrame(np.random.default_rng(0).random((250, 15)) * 1000, index=dates,
+                           columns=pd.Index([f"S{i}" for i in range(15)], name="symbol"))
+    return {"quote": quote, "history": history}
+
+
+def check_round_trip(value, cached, label):
+    """A value read back must equal the one written, DataFrames included"""
+    if isinstance(value, pd.DataFrame):
+        if not isinstance(cached, pd.DataFrame):
+            raise AssertionError(f"{label}: expected a DataFrame, got {type(cached).__name__}")
+        if isinstance(value.index, pd.DatetimeIndex):
+            value = value.set_axis(value.index.as_unit("ns"))  # Dates are cached at ns resolution
+        pd.testing.assert_frame_equal(cached, value, check_freq=False)
+    elif cached != value:
+        raise AssertionError(f"{label}: round trip changed the value")
+
+
+def reader(url, fmt, queue):
+    """Runs in a separate process: count hits on keys written by the parent"""
+    cache = SharedCache.from_url(url, fmt)
+    found = cache.get_many("quote", [f"K{i}" for i in range(100)])
+    queue.put(len(found))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+
+    values = sample_values()
+    with tempfile.TemporaryDirectory() as workdir, RespStandInServer() as resp:
+        urls = {
+            "memory": "memory://",
+            "file": f"file://{Path(workdir) / 'files'}",
+            "sqlite": f"sqlite://{Path(workdir) / 'cache.sqlite3'}",
+            "redis (stand-in)": resp.url
+        }
+
+        print(f"{'backend':18s} {'format':8s} {'value':8s} {'set us':>8s} {'get us':>8s} {'bytes':>8s}")
+        for name, url in urls.items():
+            for fmt in ("msgpack", "json"):
+                cache = SharedCache.from_url(url, fmt)
+                for kind, value in values.items():
+                    ops = args.ops if kind == "quote" else args.ops // 10
+                    start = time.perf_counter()
+                    for i in range(ops):
+                        cache.set(kind, f"{fmt}{i}", value, 60)
+                    set_us = (time.perf_counter() - start) / ops * 1e6
+                    start = time.perf_counter()
+                    for i in range(ops):
+                        cached = cache.get(kind, f"{fmt}{i}")
+                    get_us = (time.perf_counter() - start) / ops * 1e6
+                    size = len(cache.serializer.dumps(value))
+                    check_round_trip(value, cached, f"{name}/{fmt}/{kind}")
+                    print(f"{name:18s} {fmt:8s} {kind:8s} {set_us:8.1f} {get_us:8.1f} {size:8d}")
+
+        # Values written by one process are hits in another
+        ctx = multiprocessing.get_context("spawn")
+        for name, url in urls.items():
+            if name == "memory":
+                continue
+            cache = SharedCache.from_url(url)
+            for i in range(100):
+                cache.set("quote", f"K{i}", values["quote"], 60)
+            queue = ctx.Queue()
+            proc = ctx.Process(target=reader, args=(url, "msgpack", queue))
+            proc.start()
+            proc.join()
+            print(f"cross-process hits via {name}: {queue.get()}/100")
+
+
+if __name__ == "__main__":
+    main()
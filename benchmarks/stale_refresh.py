@@ -0,0 +1,77 @@
+"""
+Benchmark: page render latency across quote/index expiry
+Blocking refetch vs stale-while-revalidate vs background refresher
+Run from the repository root: python -m benchmarks.stale_refresh
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.stand_in import StandInServer, YahooStandIn
+from utils import live_market_data
+from utils.http_client import HTTPClient
+from utils.instrument_registry import InstrumentRegistry
+from utils.live_market_data import LiveMarketData
+from utils.market_refresher import MarketRefresher
+from utils.rate_limiter import RateLimiter
+from utils.shared_cache import MemoryBackend, SharedCache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per stand-in response")
+    parser.add_argument("--ttl", type=float, default=1.0, help="Quote and index TTL in seconds")
+    parser.add_argument("--duration", type=float, default=6.0, help="Seconds of renders per mode")
+    parser.add_argument("--render-every", type=float, default=0.05)
+    args = parser.parse_args()
+
+    symbols = tuple(s["symbol"] for s in InstrumentRegistry.default().view(instrument_type="stock"))
+
+    with StandInServer(latency=args.latency) as server:
+        live_market_data.yf = YahooStandIn(server.url)
+
+        modes = {
+            "blocking refetch": dict(stale_ttl=0, refresher=False),
+            "stale-while-revalidate": dict(stale_ttl=3600, refresher=False),
+            "swr + refresher": dict(stale_ttl=3600, refresher=True)
+        }
+
+        print(f"{len(symbols)} symbols + indices, {args.latency * 1000:.0f} ms per response, "
+              f"{args.ttl:.1f} s TTL, {args.duration:.0f} s per mode")
+        for name, mode in modes.items():
+            market = LiveMarketData(http_client=HTTPClient(rate_limiter=RateLimiter({})),
+                                    cache=SharedCache(MemoryBackend()))
+            market.QUOTE_TTL = market.INDEX_TTL = args.ttl
+            market.STALE_TTL = mode["stale_ttl"]
+
+            # Warm start, as after the first page view
+            market.get_market_indices()
+            market.get_stock_prices(symbols)
+            server.reset_counters()
+
+            refresher = None
+            if mode["refresher"]:
+                refresher = MarketRefresher(market, symbols, interval=args.ttl / 4,
+                                            refresh_ahead=args.ttl / 2).start()
+
+            renders, stale = [], 0
+            end = time.perf_counter() + args.duration
+            while time.perf_counter() < end:
+                start = time.perf_counter()
+                indices = market.get_market_indices()
+                quotes = market.get_stock_prices(symbols)
+                renders.append(time.perf_counter() - start)
+                stale += bool(indices.get("stale")) or any(q["stale"] for q in quotes.values())
+                time.sleep(args.render_every)
+
+            if refresher:
+                refresher.stop()
+            renders = np.array(renders) * 1000
+            print(f"{name:24s} p50 {np.percentile(renders, 50):7.2f} ms   p99 {np.percentile(renders, 99):7.2f} ms   "
+                  f"max {renders.max():7.2f} ms   stale renders {stale}/{len(renders)}   requests {server.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Local Market Data Stand-Ins
+HTTP server imitating the Yahoo Finance, MFapi and AMFI NAVAll endpoints, with injected latency,
+and a Redis-protocol server for the shared cache
+"""
+
+import json
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+
+class StandInServer:
+    """Serve Yahoo chart / quoteSummary, MFapi scheme and AMFI NAVAll responses on localhost"""
+
+    def __init__(self, latency=0.05, failure_rate=0.0, seed=0, schemes=15000):
+        """
+        Args:
+            latency: Seconds added to every response (or a (min, max) range)
+            failure_rate: Fraction of requests answered with HTTP 503
+            seed: Seed for prices and failures
+            schemes: Schemes listed in NAVAll.txt (codes 100000 onwards)
+        """
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.schemes = schemes
+        self.rng = np.random.default_rng(seed)
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        # Built once: the server shares the client's process and GIL, so per-request
+        # date formatting would be charged to the client being measured
+        dates = pd.bdate_range(end=pd.Timestamp.today(), periods=3000)[::-1]
+        self._nav_dates = (dates, list(dates.strftime("%d-%m-%Y")))
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+            def setup(self):
+                super().setup()
+                with server._lock:
+                    server.connections += 1
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.connections = 0
+
+    def _handle(self, handler):
+        with self._lock:
+            self.requests += 1
+            fail = self.rng.random() < self.failure_rate
+            delay = self.rng.uniform(*self.latency) if isinstance(self.latency, tuple) else self.latency
+        time.sleep(delay)
+
+        url = urlparse(handler.path)
+        parts = url.path.strip("/").split("/")
+        if fail:
+            status, body = 503, {"error": "unavailable"}
+        elif parts[:3] == ["v8", "finance", "chart"]:
+            status, body = 200, self._chart(parts[3], parse_qs(url.query).get("range", ["1d"])[0])
+        elif parts[:3] == ["v10", "finance", "quoteSummary"]:
+            status, body = 200, self._quote_summary(parts[3])
+        elif parts == ["spages", "NAVAll.txt"]:
+            status, body = 200, self._nav_all()
+        elif parts[0] == "mf" and len(parts) == 2:
+            status, body = 200, self._scheme(parts[1], parse_qs(url.query).get("startDate", [None])[0])
+        else:
+            status, body = 404, {"error": "not found"}
+
+        text = isinstance(body, str)
+        payload = body.encode() if text else json.dumps(body).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/plain; charset=utf-8" if text else "application/json")
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+    @staticmethod
+    def _price(ticker, days):
+        base = 100 + sum(map(ord, ticker)) % 2000
+        return [round(base * (1 + 0.001 * i), 2) for i in range(days)]
+
+    def _chart(self, ticker, period):
+        days = {"1d": 1, "2d": 2, "5d": 5}.get(period, 250)
+        end = int(time.time())
+        return {"chart": {"result": [{
+            "meta": {"symbol": ticker, "previousClose": self._price(ticker, 2)[0]},
+            "timestamp": [end - 86400 * (days - 1 - i) for i in range(days)],
+            "indicators": {"quote": [{"close": self._price(ticker, days)}]}
+        }]}}
+
+    def _quote_summary(self, ticker):
+        # The real .info payload is tens of kilobytes of fundamentals
+        return {"quoteSummary": {"result": [{
+            "price": {"longName": ticker, "regularMarketPreviousClose": self._price(ticker, 2)[0]},
+            "summaryDetail": {f"field_{i}": i for i in range(500)}
+        }]}}
+
+    def _scheme(self, code, start=None):
+        # Full NAV history (or from startDate), newest first, as MFapi returns it
+        navs = self._price(code, 3000)[::-1]
+        dates, labels = self._nav_dates
+        keep = int((dates >= pd.Timestamp(start)).sum()) if start else len(dates)
+        return {
+            "meta": {"scheme_code": code, "scheme_name": f"Scheme {code}"},
+            "data": [{"date": d, "nav": f"{n:.4f}"} for d, n in zip(labels[:keep], navs[:keep])],
+            "status": "SUCCESS"
+        }
+
+
+    def _nav_all(self):
+        # Same layout as AMFI: header, category and AMC lines, then ';'-separated schemes
+        date = pd.Timestamp.today().strftime("%d-%b-%Y")
+        lines = ["Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date", ""]
+        for i in range(self.schemes):
+            if i % 2000 == 0:
+                lines += [f"Open Ended Schemes(Category {i // 2000})", ""]
+            if i % 250 == 0:
+                lines += [f"Stand-In Mutual Fund {i // 250}", ""]
+            code = str(100000 + i)
+            # Latest NAV of the _scheme history for the same code
+            nav = "N.A." if i % 500 == 499 else f"{(100 + sum(map(ord, code)) % 2000) * (1 + 0.001 * 2999):.4f}"
+            lines.append(f"{code};INF{i:09d};-;Stand-In Scheme {code} - Direct Plan - Growth;{nav};{date}")
+        return "\n".join(lines) + "\n"
+
+
+class YahooStandIn:
+    """The parts of the yfinance API used by LiveMarketData, served by a StandInServer"""
+
+    def __init__(self, base_url, threads=8):
+        self.base_url = base_url
+        self.threads = threads
+
+    def Ticker(self, ticker):
+        return _StandInTicker(self.base_url, ticker)
+
+    def download(self, tickers, period="1mo", threads=True, **kwargs):
+        """Like yf.download: one chart request per ticker, run on a thread pool"""
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        workers = min(self.threads, len(tickers)) if threads else 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(lambda t: self.Ticker(t).history(period), tickers))
+        closes = pd.concat({t: f["Close"] for t, f in zip(tickers, frames)}, axis=1)
+        closes.columns = pd.MultiIndex.from_product([["Close"], tickers])
+        return closes
+
+
+class _StandInTicker:
+    def __init__(self, base_url, ticker):
+        self.base_url = base_url
+        self.ticker = ticker
+
+    @property
+    def info(self):
+        data = requests.get(f"{self.base_url}/v10/finance/quoteSummary/{self.ticker}", timeout=10).json()
+        price = data["quoteSummary"]["result"][0]["price"]
+        return {"longName": price["longName"], "previousClose": price["regularMarketPreviousClose"]}
+
+    def history(self, period="1mo", **kwargs):
+        data = requests.get(f"{self.base_url}/v8/finance/chart/{self.ticker}",
+                            params={"range": period}, timeout=10).json()
+        result = data["chart"]["result"][0]
+        index = pd.to_datetime(result["timestamp"], unit="s")
+        return pd.DataFrame({"Close": result["indicators"]["quote"][0]["close"]}, index=index)
+
+
+class RespStandInServer:
+    """In-memory server speaking the Redis protocol subset used by RedisBackend"""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                while True:
+                    try:
+                        args = server._read_command(self.rfile)
+                    except (EOFError, ValueError):
+                        return
+                    self.wfile.write(server._execute(args))
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.url = f"redis://127.0.0.1:{self.port}/0"
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _read_command(reader):
+        line = reader.readline()
+        if not line:
+            raise EOFError
+        if line[:1] != b"*":
+            raise ValueError(line)
+        args = []
+        for _ in range(int(line[1:-2])):
+            size = int(reader.readline()[1:-2])
+            args.append(reader.read(size + 2)[:-2])
+        return args
+
+    @staticmethod
+    def _bulk(value):
+        return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+    def _lookup(self, key, now):
+        entry = self.data.get(key)
+        if entry and (entry[0] is None or entry[0] > now):
+            return entry[1]
+        return None
+
+    def _execute(self, args):
+        command = args[0].upper()
+        now = time.time()
+        with self._lock:
+            self.commands += 1
+            if command == b"PING":
+                return b"+PONG\r\n"
+            if command in (b"SELECT", b"AUTH"):
+                return b"+OK\r\n"
+            if command == b"GET":
+                return self._bulk(self._lookup(args[1], now))
+            if command == b"MGET":
+                values = [self._bulk(self._lookup(key, now)) for key in args[1:]]
+                return b"*%d\r\n" % len(values) + b"".join(values)
+            if command == b"SET":
+                expires = None
+                if len(args) >= 5 and args[3].upper() == b"PX":
+                    expires = now + int(args[4]) / 1000
+                self.data[args[1]] = (expires, args[2])
+                return b"+OK\r\n"
+            if command == b"DEL":
+                removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+                return b":%d\r\n" % removed
+        return b"-ERR unknown command\r\n"
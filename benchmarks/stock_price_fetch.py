@@ -0,0 +1,55 @@
+"""
+Benchmark: per-symbol vs batched live stock prices
+Run from the repository root: python -m benchmarks.stock_price_fetch
+"""
+
+import argparse
+import time
+
+from benchmarks.stand_in import StandInServer, YahooStandIn
+from utils import live_market_data
+from utils.http_client import HTTPClient
+from utils.instrument_registry import InstrumentRegistry
+from utils.live_market_data import LiveMarketData
+from utils.rate_limiter import RateLimiter
+from utils.shared_cache import MemoryBackend, SharedCache
+
+
+def reset(server, market):
+    market.cache = SharedCache(MemoryBackend())
+    server.reset_counters()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds per stand-in response")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    stocks = InstrumentRegistry.default().view(instrument_type="stock")
+    symbols = [s["symbol"] for s in stocks]
+
+    with StandInServer(latency=args.latency) as server:
+        live_market_data.yf = YahooStandIn(server.url)
+        # No rate limit, so only the request pattern is measured
+        market = LiveMarketData(http_client=HTTPClient(rate_limiter=RateLimiter({})),
+                                cache=SharedCache(MemoryBackend()))
+
+        paths = {
+            "per-symbol (get_stock_price)": lambda: [market.get_stock_price(s) for s in symbols],
+            "batched (enrich_stock_data)": lambda: market.enrich_stock_data(stocks)
+        }
+
+        print(f"{len(symbols)} symbols, {args.latency * 1000:.0f} ms per response")
+        for name, run in paths.items():
+            timings = []
+            for _ in range(args.repeats):
+                reset(server, market)
+                start = time.perf_counter()
+                run()
+                timings.append(time.perf_counter() - start)
+            print(f"{name:32s} best {min(timings):6.3f} s   requests {server.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+AMFI NAV Index
+One-pass parse of the daily AMFI all-schemes NAV file into arrays indexed by scheme code and ISIN
+"""
+
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from utils.http_client import HTTPClient
+
+
+class AMFINavIndex:
+    """Latest NAV of every AMFI scheme, with O(1) lookup by scheme code or ISIN"""
+
+    AMFI_URL = "https://portal.amfiindia.com/spages/NAVAll.txt"
+    MAX_AGE = 3600  # Seconds before the shared index is rebuilt from a new file
+    DOWNLOAD_TIMEOUT = (3.05, 30)
+    RETRY_AFTER = 300  # Seconds before a failed background rebuild is tried again
+
+    _shared = None
+    _shared_lock = threading.Lock()
+    _rebuild_failed_at = 0.0
+
+    def __init__(self, lines, source=None):
+        """
+        Args:
+            lines: Iterable of NAVAll.txt lines, consumed once
+            source: Where the lines came from (for display)
+        """
+        self.source = source
+        self.loaded_at = time.time()
+
+        codes, navs, dates, names = [], [], [], []
+        isins, isins_reinvestment = [], []
+        category_ids, amc_ids = [], []
+        self.categories, self.amcs = [], []
+        parsed_dates = {}
+        category = amc = -1
+
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            fields = line.split(";")
+            if len(fields) == 6 and fields[0].isdigit():
+                codes.append(int(fields[0]))
+                isins.append(fields[1] if fields[1] not in ("", "-") else "")
+                isins_reinvestment.append(fields[2] if fields[2] not in ("", "-") else "")
+                names.append(fields[3].strip())
+                try:
+                    navs.append(float(fields[4]))
+                except ValueError:
+                    navs.append(np.nan)  # 'N.A.' for suspended or matured schemes
+                date = parsed_dates.get(fields[5])
+                if date is None:
+                    date = parsed_dates[fields[5]] = self._parse_date(fields[5])
+                dates.append(date)
+                category_ids.append(category)
+                amc_ids.append(amc)
+            elif line.startswith("Scheme Code"):
+                continue
+            elif "Schemes(" in line or line.endswith("Schemes"):
+                # e.g. 'Open Ended Schemes(Debt Scheme - Banking and PSU Fund)'
+                self.categories.append(line)
+                category = len(self.categories) - 1
+            else:
+                self.amcs.append(line)
+                amc = len(self.amcs) - 1
+
+        self.codes = np.array(codes, dtype=np.int32)
+        self.navs = np.array(navs, dtype=np.float64)
+        self.dates = np.array(dates, dtype="datetime64[D]")
+        self.isins = np.array(isins, dtype="U12")
+        self.isins_reinvestment = np.array(isins_reinvestment, dtype="U12")
+        self.names = names
+        self.category_ids = np.array(category_ids, dtype=np.int16)
+        self.amc_ids = np.array(amc_ids, dtype=np.int16)
+
+        # Dense code -> row table: scheme codes are small integers, so lookup is one array read
+        self._rows = np.full(int(self.codes.max()) + 1 if len(self.codes) else 0, -1, dtype=np.int32)
+        self._rows[self.codes] = np.arange(len(self.codes), dtype=np.int32)
+        self._by_isin = {}
+        for column in (self.isins_reinvestment, self.isins):
+            self._by_isin.update((isin, row) for row, isin in enumerate(column) if isin)
+
+    @staticmethod
+    def _parse_date(value):
+        try:
+            return np.datetime64(datetime.strptime(value.strip(), "%d-%b-%Y").date(), "D")
+        except ValueError:
+            return np.datetime64("NaT")
+
+    @staticmethod
+    def _cache_path():
+        cache_dir = os.getenv('CODENCASH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'codencash'))
+        return Path(cache_dir) / 'NAVAll.txt'
+
+    @classmethod
+    def load(cls, source=None, max_age=None, http_client=None):
+        """
+        Build the index from a NAVAll.txt file or URL
+        Args:
+            source: File path or http(s) URL (default CODENCASH_AMFI_NAV_URL or AMFI_URL)
+            max_age: Seconds a downloaded copy in the cache dir is reused (default MAX_AGE)
+            http_client: HTTPClient for downloads (default shared client)
+        Returns:
+            AMFINavIndex
+        """
+        source = str(source or os.getenv("CODENCASH_AMFI_NAV_URL") or cls.AMFI_URL)
+        if not source.startswith(("http://", "https://")):
+            with open(source, encoding="utf-8", errors="replace") as f:
+                return cls(f, source)
+
+        cached = cls._cache_path()
+        max_age = cls.MAX_AGE if max_age is None else max_age
+        if cached.exists() and time.time() - cached.stat().st_mtime < max_age:
+            with open(cached, encoding="utf-8", errors="replace") as f:
+                return cls(f, source)
+
+        http = http_client or HTTPClient.shared()
+        response = http.get(source, stream=True, timeout=cls.DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        response.encoding = response.encoding or "utf-8"
+
+        # Parse while streaming and keep a copy so other processes skip the download
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cached.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding="utf-8") as f:
+                def tee():
+                    for line in response.iter_lines(decode_unicode=True):
+                        f.write(line + "\n")
+                        yield line
+                index = cls(tee(), source)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, cached)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        finally:
+            response.close()
+        return index
+
+    @classmethod
+    def shared(cls, max_age=None, wait=True):
+        """
+        Process-wide index, rebuilt once it is older than max_age seconds
+        Args:
+            max_age: Seconds before the index is rebuilt (default MAX_AGE)
+            wait: Rebuild a stale index in this thread, raising on failure; with
+                False a stale index is returned at once and rebuilt by one
+                background thread. A failed rebuild keeps the old index in service
+        Returns:
+            AMFINavIndex (raises only when no index has been built yet)
+        """
+        max_age = cls.MAX_AGE if max_age is None else max_age
+        index = cls._shared
+        if index is not None and time.time() - index.loaded_at < max_age:
+            return index
+        if index is not None and not wait:
+            if not cls._shared_lock.locked() and time.time() - cls._rebuild_failed_at >= cls.RETRY_AFTER:
+                threading.Thread(target=cls._rebuild_quietly, args=(max_age,),
+                                 name="amfi-nav-index", daemon=True).start()
+            return index
+        return cls._rebuild(max_age)
+
+    @classmethod
+    def _rebuild(cls, max_age):
+        with cls._shared_lock:
+            index = cls._shared
+            if index is None or time.time() - index.loaded_at >= max_age:
+                # Assigned only after a successful load
+                index = cls._shared = cls.load(max_age=max_age)
+        return index
+
+    @classmethod
+    def _rebuild_quietly(cls, max_age):
+        try:
+            cls._rebuild(max_age)
+        except Exception:
+            # The current index stays; stale reads retry after RETRY_AFTER, the refresher every sweep
+            cls._rebuild_failed_at = time.time()
+
+    def __len__(self):
+        return len(self.codes)
+
+    def row(self, scheme_code):
+        """Row of a scheme code, or -1"""
+        code = str(scheme_code)
+        if not code.isdigit() or int(code) >= len(self._rows):
+            return -1
+        return int(self._rows[int(code)])
+
+    def rows(self, scheme_codes):
+        """Rows of many scheme codes at once (-1 for unknown codes)"""
+        codes = np.asarray(scheme_codes, dtype=np.int64)
+        known = (codes >= 0) & (codes < len(self._rows))
+        rows = np.full(codes.shape, -1, dtype=np.int32)
+        rows[known] = self._rows[codes[known]]
+        return rows
+
+    def get(self, scheme_code):
+        """
+        Latest NAV of a scheme
+        Args:
+            scheme_code: AMFI scheme code
+        Returns:
+            Dict with fund_name, nav, date (DD-MM-YYYY), scheme_code, isin,
+            category and amc, or None for unknown codes
+        """
+        return self._record(self.row(scheme_code))
+
+    def get_by_isin(self, isin):
+        """Latest NAV by growth/payout or reinvestment ISIN"""
+        return self._record(self._by_isin.get(isin, -1))
+
+    def latest_navs(self, scheme_codes):
+        """NAVs for many scheme codes as a float array (NaN for unknown or N.A.)"""
+        rows = self.rows(scheme_codes)
+        navs = np.full(rows.shape, np.nan)
+        navs[rows >= 0] = self.navs[rows[rows >= 0]]
+        return navs
+
+    def _record(self, row):
+        if row < 0:
+            return None
+        nav = self.navs[row]
+        date = self.dates[row]
+        return {
+            "fund_name": self.names[row],
+            "nav": None if np.isnan(nav) else float(nav),
+            "date": None if np.isnat(date) else date.astype(datetime).strftime("%d-%m-%Y"),
+            "scheme_code": str(self.codes[row]),
+            "isin": str(self.isins[row]) or None,
+            "category": self.categories[self.category_ids[row]] if self.category_ids[row] >= 0 else None,
+            "amc": self.amcs[self.amc_ids[row]] if self.amc_ids[row] >= 0 else None
+        }
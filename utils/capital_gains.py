@@ -0,0 +1,240 @@
+"""
+Capital Gains Engine for Indian Investors
+FIFO lot matching over broker / CAS transaction ledgers
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class CapitalGainsEngine:
+    """Match sells to buy lots FIFO per ISIN and classify STCG / LTCG"""
+
+    # Holding period (in days) after which a gain becomes long term
+    HOLDING_PERIOD_DAYS = {
+        'equity': 365,   # Listed equity & equity MFs - 12 months
+        'debt': 730      # Listed bonds / other assets - 24 months
+    }
+
+    # Special tax rates for FY 2024-25 (on or after 23 Jul 2024)
+    STCG_EQUITY_RATE = 0.20
+    LTCG_RATE = 0.125
+    LTCG_EXEMPTION = 125000  # Sec 112A exemption on equity LTCG
+
+    # Ledger side labels from brokers and CAS statements
+    BUY_SIDES = {'BUY', 'B', 'PURCHASE', 'SIP', 'SWITCH IN', 'BONUS'}
+    SELL_SIDES = {'SELL', 'S', 'REDEMPTION', 'SWITCH OUT'}
+
+    # Quantities are matched as integers to keep MF units (3 decimals) exact
+    QTY_SCALE = 10000
+
+    def __init__(self):
+        self.matched = None
+        self.open_lots = None
+
+    def process_ledger(self, ledger):
+        """
+        Run FIFO lot matching over a transaction ledger in one pass
+        Args:
+            ledger: DataFrame (or list of dicts) with columns
+                date, isin, side, quantity, price and optional asset_class
+                ('equity' or 'debt', default 'equity')
+        Returns:
+            DataFrame of matched lots with gain, holding days and term
+        """
+        df = self._normalize_ledger(ledger)
+
+        # Sort by ISIN, then date, with buys ahead of sells on the same day
+        df = df.sort_values(['isin', 'date', 'is_sell'], kind='mergesort').reset_index(drop=True)
+
+        buys = df[~df['is_sell']].reset_index(drop=True)
+        sells = df[df['is_sell']].reset_index(drop=True)
+
+        # Lot queues as cumulative quantity ranges on one global axis.
+        # Each ISIN owns the slice [offset, offset + total bought) of that axis.
+        buy_qty = buys['qty'].to_numpy()
+        buy_end = np.cumsum(buy_qty)
+        buy_start = buy_end - buy_qty
+
+        isin_codes, isins = pd.factorize(pd.concat([buys['isin'], sells['isin']]), sort=True)
+        buy_isin = isin_codes[:len(buys)]
+        sell_isin = isin_codes[len(buys):]
+
+        bought_per_isin = np.bincount(buy_isin, weights=buy_qty, minlength=len(isins)).astype(np.int64)
+        isin_offset = np.concatenate(([0], np.cumsum(bought_per_isin)[:-1]))
+
+        sell_qty = sells['qty'].to_numpy()
+        sell_local_end = sells.groupby('isin', sort=False)['qty'].cumsum().to_numpy()
+        sell_end = isin_offset[sell_isin] + sell_local_end
+        sell_start = sell_end - sell_qty
+
+        oversold = sell_local_end > bought_per_isin[sell_isin]
+        if oversold.any():
+            row = sells.iloc[int(np.argmax(oversold))]
+            raise ValueError(
+                f"Sell of {row['isin']} on {row['date']:%d %b %Y} exceeds units bought in the ledger"
+            )
+
+        # Every sell overlaps a contiguous run of buy lots [lo, hi]
+        lo = np.searchsorted(buy_end, sell_start, side='right')
+        hi = np.searchsorted(buy_end, sell_end, side='left')
+        counts = hi - lo + 1
+
+        sell_idx = np.repeat(np.arange(len(sells)), counts)
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        buy_idx = np.repeat(lo, counts) + (np.arange(counts.sum()) - run_start)
+
+        matched_qty = (np.minimum(sell_end[sell_idx], buy_end[buy_idx]) -
+                       np.maximum(sell_start[sell_idx], buy_start[buy_idx]))
+
+        buy_dates = buys['date'].to_numpy()[buy_idx]
+        sell_dates = sells['date'].to_numpy()[sell_idx]
+
+        early = buy_dates > sell_dates
+        if early.any():
+            row = sells.iloc[int(sell_idx[np.argmax(early)])]
+            raise ValueError(
+                f"Sell of {row['isin']} on {row['date']:%d %b %Y} exceeds units held on that date"
+            )
+
+        units = matched_qty / self.QTY_SCALE
+        buy_price = buys['price'].to_numpy()[buy_idx]
+        sell_price = sells['price'].to_numpy()[sell_idx]
+        asset_class = sells['asset_class'].to_numpy()[sell_idx]
+        holding_days = (sell_dates - buy_dates).astype('timedelta64[D]').astype(np.int64)
+
+        threshold = np.where(asset_class == 'equity',
+                             self.HOLDING_PERIOD_DAYS['equity'],
+                             self.HOLDING_PERIOD_DAYS['debt'])
+
+        self.matched = pd.DataFrame({
+            'isin': sells['isin'].to_numpy()[sell_idx],
+            'asset_class': asset_class,
+            'buy_date': buy_dates,
+            'sell_date': sell_dates,
+            'quantity': units,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'cost': units * buy_price,
+            'proceeds': units * sell_price,
+            'gain': units * (sell_price - buy_price),
+            'holding_days': holding_days,
+            'term': np.where(holding_days > threshold, 'LTCG', 'STCG'),
+            'fy': self._financial_year(sell_dates)
+        })
+
+        # Whatever is left of each ISIN's queue after its last sell stays open
+        sold_per_isin = np.bincount(sell_isin, weights=sell_qty, minlength=len(isins)).astype(np.int64)
+        consumed_to = isin_offset[buy_isin] + sold_per_isin[buy_isin]
+        remaining = buy_end - np.maximum(buy_start, consumed_to)
+        still_open = remaining > 0
+
+        self.open_lots = pd.DataFrame({
+            'isin': buys['isin'].to_numpy()[still_open],
+            'asset_class': buys['asset_class'].to_numpy()[still_open],
+            'buy_date': buys['date'].to_numpy()[still_open],
+            'quantity': remaining[still_open] / self.QTY_SCALE,
+            'buy_price': buys['price'].to_numpy()[still_open]
+        })
+
+        return self.matched
+
+    def summarize(self, fy=None):
+        """
+        Aggregate matched lots into taxable gains for one financial year
+        Args:
+            fy: Financial year label like '2024-25' (default: latest in ledger)
+        Returns:
+            Dict with net STCG / LTCG buckets after loss set-off and exemption
+        """
+        if self.matched is None or self.matched.empty:
+            return self._empty_summary(fy)
+
+        fy = fy or self.matched['fy'].max()
+        lots = self.matched[self.matched['fy'] == fy]
+
+        buckets = lots.groupby(['asset_class', 'term'])['gain'].sum()
+        stcg_equity = float(buckets.get(('equity', 'STCG'), 0.0))
+        stcg_debt = float(buckets.get(('debt', 'STCG'), 0.0))
+        ltcg_equity = float(buckets.get(('equity', 'LTCG'), 0.0))
+        ltcg_debt = float(buckets.get(('debt', 'LTCG'), 0.0))
+
+        # Short-term losses offset any gain, long-term losses only LTCG
+        st_loss = -min(stcg_equity, 0) - min(stcg_debt, 0)
+        lt_loss = -min(ltcg_equity, 0) - min(ltcg_debt, 0)
+        stcg_equity, stcg_debt = max(stcg_equity, 0), max(stcg_debt, 0)
+        ltcg_equity, ltcg_debt = max(ltcg_equity, 0), max(ltcg_debt, 0)
+
+        stcg_equity, st_loss = self._set_off(stcg_equity, st_loss)
+        stcg_debt, st_loss = self._set_off(stcg_debt, st_loss)
+        ltcg_debt, lt_loss = self._set_off(ltcg_debt, lt_loss)
+        ltcg_equity, lt_loss = self._set_off(ltcg_equity, lt_loss)
+        ltcg_debt, st_loss = self._set_off(ltcg_debt, st_loss)
+        ltcg_equity, st_loss = self._set_off(ltcg_equity, st_loss)
+
+        ltcg_exemption = min(ltcg_equity, self.LTCG_EXEMPTION)
+
+        return {
+            'fy': fy,
+            'stcg_equity': stcg_equity,
+            'stcg_debt': stcg_debt,
+            'ltcg_equity': ltcg_equity,
+            'ltcg_debt': ltcg_debt,
+            'ltcg_exemption': ltcg_exemption,
+            'loss_carried_forward': st_loss + lt_loss,
+            'total_gains': stcg_equity + stcg_debt + ltcg_equity + ltcg_debt
+        }
+
+    def _set_off(self, gain, loss):
+        """Absorb as much loss as possible into a gain bucket"""
+        used = min(gain, loss)
+        return gain - used, loss - used
+
+    def _empty_summary(self, fy):
+        """Summary for a ledger with no realised gains"""
+        return {
+            'fy': fy,
+            'stcg_equity': 0.0,
+            'stcg_debt': 0.0,
+            'ltcg_equity': 0.0,
+            'ltcg_debt': 0.0,
+            'ltcg_exemption': 0.0,
+            'loss_carried_forward': 0.0,
+            'total_gains': 0.0
+        }
+
+    def _normalize_ledger(self, ledger):
+        """Validate ledger columns and convert to matching-friendly dtypes"""
+        df = pd.DataFrame(ledger).copy()
+        df.columns = [str(c).strip().lower() for c in df.columns]
+
+        missing = {'date', 'isin', 'side', 'quantity', 'price'} - set(df.columns)
+        if missing:
+            raise ValueError(f"Ledger is missing columns: {', '.join(sorted(missing))}")
+
+        if 'asset_class' not in df.columns:
+            df['asset_class'] = 'equity'
+        df['asset_class'] = df['asset_class'].fillna('equity').astype(str).str.lower()
+
+        # Normalise the handful of distinct side labels, not every row
+        side_codes, sides = pd.factorize(df['side'])
+        labels = [str(side).strip().upper() for side in sides]
+        unknown = [side for side, label in zip(sides, labels) if label not in self.BUY_SIDES | self.SELL_SIDES]
+        if unknown:
+            raise ValueError(f"Unknown transaction side: {unknown[0]}")
+
+        df['is_sell'] = np.isin(np.array(labels, dtype=object), list(self.SELL_SIDES))[side_codes]
+        df['date'] = pd.to_datetime(df['date']).astype('datetime64[ns]')
+        df['price'] = df['price'].astype(np.float64)
+        df['qty'] = np.rint(df['quantity'].astype(np.float64).abs() * self.QTY_SCALE).astype(np.int64)
+
+        return df[df['qty'] > 0]
+
+    @staticmethod
+    def _financial_year(dates):
+        """Indian financial year label (April to March) for each date"""
+        index = pd.DatetimeIndex(dates)
+        start = (index.year - (index.month < 4)).to_numpy()
+        years, inverse = np.unique(start, return_inverse=True)
+        labels = np.array([f"{y}-{(y + 1) % 100:02d}" for y in years], dtype=object)
+        return labels[inverse]
@@ -0,0 +1,232 @@
+"""
+Columnar Time-Series Store
+Memory-mapped per-field arrays with a date index and per-instrument offsets, for bulk history reads
+"""
+
+import fcntl
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnarDataset:
+    """Read-only view of one stored generation; every slice is a view of the mapped files"""
+
+    def __init__(self, directory):
+        """
+        Args:
+            directory: Generation directory written by ColumnarStore.write
+        """
+        self.directory = Path(directory)
+        with open(self.directory / "manifest.json") as f:
+            manifest = json.load(f)
+        self.fields = manifest["fields"]
+        self.keys = manifest["keys"]
+        self.rows = manifest["rows"]
+        self.created_at = manifest["created_at"]
+        self._positions = {key: i for i, key in enumerate(self.keys)}
+
+        # Read-only maps: processes opening the same generation share its pages
+        self.offsets = self._map("offsets.bin", np.int64, len(self.keys) + 1)
+        self.dates = self._map("dates.bin", "datetime64[D]", self.rows)
+        self.columns = {field: self._map(f"{field}.bin", np.float64, self.rows) for field in self.fields}
+
+    def _map(self, name, dtype, length):
+        if length == 0:
+            return np.empty(0, dtype=dtype)  # mmap cannot map an empty file
+        return np.memmap(self.directory / name, dtype=dtype, mode="r", shape=(length,))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return str(key) in self._positions
+
+    def bounds(self, key, start=None, end=None):
+        """
+        Row range of one instrument between two dates (inclusive)
+        Returns:
+            (first row, end row) for slicing the field arrays
+        """
+        i = self._positions[str(key)]
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        dates = self.dates[lo:hi]
+        first = lo + (int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start), "D"), "left"))
+                      if start is not None else 0)
+        last = lo + (int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end), "D"), "right"))
+                     if end is not None else hi - lo)
+        return first, last
+
+    def last_date(self, key):
+        """Last stored date of one instrument, or None if it has no rows"""
+        i = self._positions[str(key)]
+        lo, hi = int(self.offsets[i]), int(self.offsets[i + 1])
+        return pd.Timestamp(self.dates[hi - 1]) if hi > lo else None
+
+    def slice(self, key, field, start=None, end=None):
+        """
+        Dates and values of one field for one instrument, without copying
+        Args:
+            key: Scheme code or symbol
+            field: Stored field, e.g. 'nav' or 'close'
+            start: First date (inclusive), or None
+            end: Last date (inclusive), or None
+        Returns:
+            (dates, values) memmap views
+        """
+        first, last = self.bounds(key, start, end)
+        return self.dates[first:last], self.columns[field][first:last]
+
+    def series(self, key, field, start=None, end=None):
+        """Series of one field indexed by date (values are not copied)"""
+        dates, values = self.slice(key, field, start, end)
+        return pd.Series(values, index=pd.DatetimeIndex(dates), name=str(key), copy=False)
+
+    def frame(self, keys, field, start=None, end=None):
+        """
+        One field for many instruments aligned on the union of their dates
+        Returns:
+            DataFrame indexed by date, one column per stored key (NaN where an
+            instrument has no row)
+        """
+        keys = [str(k) for k in keys if str(k) in self._positions]
+        slices = [self.slice(key, field, start, end) for key in keys]
+        if not slices:
+            return pd.DataFrame()
+        index = np.unique(np.concatenate([dates for dates, _ in slices]))
+
+        block = np.full((len(index), len(keys)), np.nan)
+        for column, (dates, values) in enumerate(slices):
+            block[np.searchsorted(index, dates), column] = values
+        return pd.DataFrame(block, index=pd.DatetimeIndex(index), columns=keys)
+
+
+class ColumnarStore:
+    """Directory of columnar datasets, each replaced atomically by a new generation"""
+
+    VERSION = 1
+    CURRENT = "CURRENT"  # Name of the active generation, per dataset
+    OPEN_ATTEMPTS = 5  # Reads retried when writers replace the generation being mapped
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Store directory (default shared cache location)
+        """
+        self.path = Path(path) if path else self.default_path()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def default_path():
+        """Shared location so every process maps the same files"""
+        cache_dir = os.getenv('CODENCASH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'codencash'))
+        return Path(cache_dir) / 'columnar'
+
+    def write(self, dataset, keys, dates, columns):
+        """
+        Store rows as a new generation of a dataset
+        Args:
+            dataset: Dataset name, e.g. 'nav' or 'ohlc'
+            keys: Instrument key per row (scheme code or symbol)
+            dates: Date per row; for a repeated (key, date) the last row wins
+            columns: Dict of field name -> value per row
+        Returns:
+            Number of rows written
+        """
+        keys = np.asarray(keys).astype(str)
+        dates = np.asarray(dates, dtype="datetime64[D]")
+        order = np.lexsort((dates, keys))  # Stable, so repeats stay in input order
+        keys, dates = keys[order], dates[order]
+        last = np.ones(len(keys), dtype=bool)
+        last[:-1] = (keys[1:] != keys[:-1]) | (dates[1:] != dates[:-1])
+        order, keys, dates = order[last], keys[last], dates[last]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        offsets = np.append(starts, len(keys)).astype(np.int64)
+
+        directory = self.path / dataset
+        directory.mkdir(parents=True, exist_ok=True)
+        # Writers take turns, so one never deletes a generation another is still writing
+        with open(directory / ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            generation = Path(tempfile.mkdtemp(dir=directory, prefix="gen-"))
+            try:
+                offsets.tofile(generation / "offsets.bin")
+                dates.tofile(generation / "dates.bin")
+                for field, values in columns.items():
+                    np.asarray(values, dtype=np.float64)[order].tofile(generation / f"{field}.bin")
+                with open(generation / "manifest.json", "w") as f:
+                    json.dump({
+                        "version": self.VERSION,
+                        "rows": len(keys),
+                        "fields": list(columns),
+                        "keys": unique_keys.tolist(),
+                        "created_at": time.time()
+                    }, f)
+                os.chmod(generation, 0o755)
+            except BaseException:
+                shutil.rmtree(generation, ignore_errors=True)
+                raise
+
+            current = directory / self.CURRENT
+            previous = current.read_text().strip() if current.exists() else None
+
+            # Atomic switch; readers that mapped the old generation keep their pages
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                f.write(generation.name)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, current)
+
+            # The previous generation stays for readers that resolved CURRENT just before the switch
+            for old in directory.glob("gen-*"):
+                if old.name not in (generation.name, previous):
+                    shutil.rmtree(old, ignore_errors=True)
+        return len(keys)
+
+    def write_frame(self, dataset, frame, key_column, date_column, fields):
+        """Store a long-format DataFrame (one row per instrument and date)"""
+        return self.write(dataset, frame[key_column].to_numpy(), frame[date_column].to_numpy(),
+                          {field: frame[field].to_numpy() for field in fields})
+
+    def has(self, dataset):
+        """True once a generation of the dataset has been written"""
+        return (self.path / dataset / self.CURRENT).exists()
+
+    def open(self, dataset):
+        """
+        Map the current generation of a dataset
+        Returns:
+            ColumnarDataset
+        """
+        directory = self.path / dataset
+        for attempt in range(self.OPEN_ATTEMPTS):
+            generation = (directory / self.CURRENT).read_text().strip()
+            try:
+                return ColumnarDataset(directory / generation)
+            except FileNotFoundError:
+                # Replaced twice while it was being mapped; CURRENT names a newer generation
+                if attempt == self.OPEN_ATTEMPTS - 1:
+                    raise
+
+    def export_history(self, history_store, datasets=None):
+        """
+        Snapshot a HistoryStore into 'nav' and 'ohlc' datasets
+        Args:
+            history_store: HistoryStore to dump
+            datasets: Subset of ('nav', 'ohlc') to export (default both)
+        Returns:
+            Dict of dataset -> rows written
+        """
+        written = {}
+        for dataset, fields in (("nav", ["nav"]), ("ohlc", ["open", "high", "low", "close", "volume"])):
+            if datasets is not None and dataset not in datasets:
+                continue
+            frame = history_store.dump(dataset)
+            written[dataset] = self.write_frame(dataset, frame, "key", "date", fields)
+        return written
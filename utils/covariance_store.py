@@ -0,0 +1,265 @@
+"""
+EWMA Covariance Store
+Incrementally updated means, covariances and volatilities for the universe
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class EWMACovarianceStore:
+    """Exponentially weighted covariance, updated one return vector at a time"""
+
+    DECAY = 0.94  # RiskMetrics daily decay factor
+    TRADING_DAYS = 252
+    
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, instruments, decay=None, path=None):
+        """
+        Args:
+            instruments: Ordered list of instrument identifiers
+            decay: EWMA decay factor lambda (default 0.94)
+            path: .npz file used by save() / load()
+        """
+        self.instruments = list(instruments)
+        self.index = {name: i for i, name in enumerate(self.instruments)}
+        self.decay = decay or self.DECAY
+        self.path = Path(path) if path else self.default_path()
+
+        n = len(self.instruments)
+        self._mean = np.zeros(n)
+        self._cov = np.zeros((n, n))
+        self.counts = np.zeros(n, dtype=np.int64)  # Returns seen per instrument
+        self.observations = 0
+        self.last_date = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_path():
+        """Shared location so every process reads the same state"""
+        cache_dir = os.getenv('CODENCASH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'codencash'))
+        return Path(cache_dir) / 'ewma_covariance.npz'
+
+    @classmethod
+    def shared(cls, instruments):
+        """
+        Process-wide store for a universe, resumed from the saved state when it
+        covers the same instruments
+        Args:
+            instruments: Ordered list of instrument identifiers
+        Returns:
+            EWMACovarianceStore
+        """
+        instruments = list(instruments)
+        if cls._shared is None or cls._shared.instruments != instruments:
+            with cls._shared_lock:
+                if cls._shared is None or cls._shared.instruments != instruments:
+                    saved = cls.load()
+                    cls._shared = saved if saved is not None and saved.instruments == instruments else cls(instruments)
+        return cls._shared
+
+    def update(self, returns, date=None):
+        """
+        Fold one day's returns into the running mean and covariance in O(n^2)
+        Args:
+            returns: Array aligned with instruments, or dict / Series by instrument;
+                missing instruments (NaN) keep their mean and variance
+            date: Optional date of the observation; stale dates are ignored
+        Returns:
+            True if the state changed
+        """
+        r = self._align(returns)
+        present = ~np.isnan(r)
+        if not present.any():
+            return False
+
+        date = pd.Timestamp(date) if date is not None else None
+        lam = self.decay
+        with self._lock:
+            if date is not None and self.last_date is not None and date <= self.last_date:
+                return False
+
+            # A missing return counts as equal to the mean (d = 0), so the update
+            # stays one PSD rank-1 step for the whole matrix; the missing block then
+            # keeps its previous value, which adds back a PSD principal block
+            d = np.where(present, r - self._mean, 0.0)
+            self._mean += (1 - lam) * d
+            if present.all():
+                self._cov = lam * (self._cov + (1 - lam) * np.outer(d, d))
+            else:
+                missing = np.ix_(~present, ~present)
+                kept = self._cov[missing]
+                self._cov = lam * (self._cov + (1 - lam) * np.outer(d, d))
+                self._cov[missing] = kept
+
+            self.counts += present
+            self.observations += 1
+            if date is not None:
+                self.last_date = date
+
+        return True
+
+    def update_many(self, returns):
+        """
+        Bootstrap or catch up from a history of returns
+        Args:
+            returns: DataFrame indexed by date, columns are instruments
+        Returns:
+            Number of rows applied
+        """
+        frame = returns.reindex(columns=self.instruments).sort_index()
+        applied = 0
+        for date, row in zip(frame.index, frame.to_numpy(dtype=np.float64)):
+            applied += self.update(row, date if isinstance(date, pd.Timestamp) else None)
+        return applied
+
+    def catch_up(self, returns):
+        """
+        Fold in return rows dated after the last observation and persist the
+        state if any were applied (call whenever new prices arrive)
+        Args:
+            returns: DataFrame indexed by date, columns are instruments
+        Returns:
+            Number of rows applied
+        """
+        applied = self.update_many(returns)
+        if applied:
+            self.save()
+        return applied
+
+    def _align(self, returns):
+        """Convert an update into an array in instrument order"""
+        if isinstance(returns, (dict, pd.Series)):
+            return pd.Series(returns, dtype=np.float64).reindex(self.instruments).to_numpy()
+        r = np.asarray(returns, dtype=np.float64)
+        if r.shape != (len(self.instruments),):
+            raise ValueError(f"Expected {len(self.instruments)} returns, got shape {r.shape}")
+        return r
+
+    def mean(self, annualize=True):
+        """EWMA mean return per instrument"""
+        with self._lock:
+            mean = self._mean.copy()
+        return mean * self.TRADING_DAYS if annualize else mean
+
+    def covariance(self, annualize=True, instruments=None):
+        """
+        EWMA covariance matrix
+        Args:
+            annualize: Scale daily covariance to annual
+            instruments: Optional subset (and order) of instruments
+        Returns:
+            NumPy array
+        """
+        with self._lock:
+            cov = self._cov.copy()
+        if instruments is not None:
+            idx = [self.index[name] for name in instruments]
+            cov = cov[np.ix_(idx, idx)]
+        return cov * self.TRADING_DAYS if annualize else cov
+
+    def volatility(self, annualize=True):
+        """EWMA volatility per instrument"""
+        return pd.Series(np.sqrt(np.diag(self.covariance(annualize))), index=self.instruments)
+
+    def correlation(self):
+        """Correlation matrix implied by the EWMA covariance"""
+        cov = self.covariance(annualize=False)
+        vol = np.sqrt(np.diag(cov))
+        denom = np.outer(vol, vol)
+        corr = np.divide(cov, denom, out=np.zeros_like(cov), where=denom > 0)
+        np.fill_diagonal(corr, 1.0)
+        return pd.DataFrame(corr, index=self.instruments, columns=self.instruments)
+
+    def observed(self, min_observations=1):
+        """
+        Instruments with enough returns folded in to be used; the rest still
+        have zero mean and variance and would look riskless
+        Args:
+            min_observations: Returns an instrument needs
+        Returns:
+            List of instrument identifiers, in store order
+        """
+        with self._lock:
+            counts = self.counts.copy()
+        return [name for name, count in zip(self.instruments, counts) if count >= min_observations]
+
+    def state_key(self):
+        """Identifier of the current state, for caches built on top of it"""
+        with self._lock:
+            return self._state_key()
+
+    def _state_key(self):
+        digest = hashlib.sha1(self._cov.tobytes())
+        digest.update(self._mean.tobytes())
+        return f"{self.observations}:{self.last_date}:{digest.hexdigest()}"
+
+    def snapshot(self, annualize=True, instruments=None):
+        """
+        State key, mean and covariance read under one lock, so a cache keyed
+        on the state never holds moments from a later update
+        Args:
+            annualize: Scale daily moments to annual
+            instruments: Optional subset (and order) of instruments
+        Returns:
+            (state key, mean array, covariance array)
+        """
+        idx = None if instruments is None else [self.index[name] for name in instruments]
+        with self._lock:
+            key = self._state_key()
+            mean, cov = self._mean.copy(), self._cov.copy()
+        if idx is not None:
+            mean, cov = mean[idx], cov[np.ix_(idx, idx)]
+        scale = self.TRADING_DAYS if annualize else 1
+        return key, mean * scale, cov * scale
+
+    def save(self):
+        """Persist state atomically so readers never load a half-written file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            fd, tmp = tempfile.mkstemp(dir=self.path.parent, suffix='.npz')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f,
+                         instruments=np.array(self.instruments, dtype=str),
+                         decay=self.decay,
+                         mean=self._mean,
+                         cov=self._cov,
+                         counts=self.counts,
+                         observations=self.observations,
+                         last_date=str(self.last_date) if self.last_date is not None else '')
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, self.path)
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Load a saved store
+        Args:
+            path: .npz file (default shared location)
+        Returns:
+            EWMACovarianceStore, or None if nothing has been saved yet
+        """
+        path = Path(path) if path else cls.default_path()
+        if not path.exists():
+            return None
+
+        with np.load(path) as data:
+            store = cls(data['instruments'].tolist(), float(data['decay']), path)
+            store._mean = data['mean'].copy()
+            store._cov = data['cov'].copy()
+            store.observations = int(data['observations'])
+            # Files saved before per-instrument counts only know the total
+            store.counts = (data['counts'].copy() if 'counts' in data.files
+                            else np.where(np.diag(store._cov) > 0, store.observations, 0))
+            last_date = str(data['last_date'])
+            store.last_date = pd.Timestamp(last_date) if last_date else None
+
+        return store
@@ -0,0 +1,325 @@
+"""
+NAV and Price History Store
+Local SQLite history of scheme NAVs and stock OHLC, synced incrementally
+"""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+from utils.http_client import HTTPClient
+
+
+class HistoryStore:
+    """Embedded store of daily NAV and OHLC rows that fetches only new dates"""
+
+    MF_API_BASE = "https://api.mfapi.in"
+    SYNC_TTL = 3600  # Seconds before a series is checked upstream again
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS nav (
+            scheme_code TEXT NOT NULL,
+            date TEXT NOT NULL,
+            nav REAL NOT NULL,
+            PRIMARY KEY (scheme_code, date)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS ohlc (
+            symbol TEXT NOT NULL,
+            date TEXT NOT NULL,
+            open REAL, high REAL, low REAL, close REAL, volume REAL,
+            PRIMARY KEY (symbol, date)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS series (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            name TEXT,
+            synced_at REAL NOT NULL,
+            PRIMARY KEY (kind, key)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path=None, http_client=None, mf_api_base=None):
+        """
+        Args:
+            path: SQLite file (default shared cache location)
+            http_client: HTTPClient for MFapi (default shared client)
+            mf_api_base: MFapi base URL
+        """
+        self.path = Path(path) if path else self.default_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.http = http_client or HTTPClient.shared()
+        self.mf_api_base = mf_api_base or self.MF_API_BASE
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @staticmethod
+    def default_path():
+        """Shared location so every process reads the same history"""
+        cache_dir = os.getenv('CODENCASH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'codencash'))
+        return Path(cache_dir) / 'market_history.sqlite3'
+
+    def _connect(self):
+        """One connection per thread; WAL lets readers run alongside a writer"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _synced_at(self, kind, key):
+        row = self._connect().execute(
+            "SELECT synced_at FROM series WHERE kind = ? AND key = ?", (kind, key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _is_fresh(self, kind, key):
+        synced_at = self._synced_at(kind, key)
+        return synced_at is not None and time.time() - synced_at < self.SYNC_TTL
+
+    def _last_date(self, table, column, key):
+        row = self._connect().execute(
+            f"SELECT MAX(date) FROM {table} WHERE {column} = ?", (key,)
+        ).fetchone()
+        return row[0]
+
+    # ---- Mutual fund NAVs -------------------------------------------------
+
+    def sync_nav(self, scheme_code, timeout=None):
+        """
+        Fetch NAVs newer than the last stored date for one scheme
+        Args:
+            scheme_code: AMFI scheme code
+            timeout: Optional request timeout override
+        Returns:
+            Number of new rows stored
+        """
+        scheme_code = str(scheme_code)
+        last = self._last_date('nav', 'scheme_code', scheme_code)
+        params = None
+        if last:
+            start = (datetime.strptime(last, "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d")
+            params = {"startDate": start, "endDate": datetime.now().strftime("%Y-%m-%d")}
+
+        data = self.http.get_json(f"{self.mf_api_base}/mf/{scheme_code}", params=params, timeout=timeout)
+
+        # MFapi dates are DD-MM-YYYY; slicing them is ~10x cheaper than strptime,
+        # which matters when many full histories are parsed under the GIL at once
+        rows = []
+        for point in data.get('data') or []:
+            day = point['date']
+            date = f"{day[6:10]}-{day[3:5]}-{day[0:2]}"
+            if last is None or date > last:
+                rows.append((scheme_code, date, float(point['nav'])))
+
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO nav VALUES (?, ?, ?)", rows)
+            conn.execute(
+                "INSERT OR REPLACE INTO series VALUES ('nav', ?, ?, ?)",
+                (scheme_code, (data.get('meta') or {}).get('scheme_name'), time.time())
+            )
+        return len(rows)
+
+    def latest_nav(self, scheme_code, sync=True, timeout=None):
+        """
+        Latest stored NAV, syncing first if the series is older than SYNC_TTL
+        Returns:
+            Dict with fund_name, nav, date (DD-MM-YYYY) and scheme_code, or None
+        """
+        scheme_code = str(scheme_code)
+        if sync and not self._is_fresh('nav', scheme_code):
+            self.sync_nav(scheme_code, timeout)
+
+        row = self._connect().execute(
+            "SELECT n.date, n.nav, s.name FROM nav n LEFT JOIN series s "
+            "ON s.kind = 'nav' AND s.key = n.scheme_code "
+            "WHERE n.scheme_code = ? ORDER BY n.date DESC LIMIT 1",
+            (scheme_code,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "fund_name": row[2],
+            "nav": row[1],
+            "date": datetime.strptime(row[0], "%Y-%m-%d").strftime("%d-%m-%Y"),
+            "scheme_code": scheme_code
+        }
+
+    def nav_history(self, scheme_code, start=None, end=None):
+        """
+        Stored NAVs for a date range (index range scan, no network)
+        Returns:
+            Series of NAV indexed by date
+        """
+        frame = pd.read_sql_query(
+            "SELECT date, nav FROM nav WHERE scheme_code = ? AND date >= ? AND date <= ? ORDER BY date",
+            self._connect(),
+            params=(str(scheme_code), self._iso(start, "0000-01-01"), self._iso(end, "9999-12-31")),
+            parse_dates=["date"], index_col="date"
+        )
+        return frame['nav']
+
+    def nav_frame(self, scheme_codes, start=None, end=None):
+        """
+        Stored NAVs for several schemes (index range scans, no network)
+        Returns:
+            DataFrame indexed by date, one column per scheme code with rows
+        """
+        scheme_codes = list(dict.fromkeys(str(c) for c in scheme_codes))
+        if not scheme_codes:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='date'))
+        placeholders = ", ".join("?" * len(scheme_codes))
+        frame = pd.read_sql_query(
+            f"SELECT scheme_code, date, nav FROM nav WHERE scheme_code IN ({placeholders}) "
+            "AND date >= ? AND date <= ?",
+            self._connect(),
+            params=scheme_codes + [self._iso(start, "0000-01-01"), self._iso(end, "9999-12-31")],
+            parse_dates=["date"]
+        )
+        navs = frame.pivot(index='date', columns='scheme_code', values='nav').sort_index()
+        return navs.reindex(columns=[c for c in scheme_codes if c in navs.columns])
+
+    # ---- Stock OHLC -------------------------------------------------------
+
+    def sync_prices(self, symbols, download=None):
+        """
+        Fetch OHLC rows from the last stored date on for each symbol
+        Args:
+            symbols: NSE symbols or index tickers (e.g. 'TCS', '^NSEI')
+            download: yf.download-compatible callable (default yfinance)
+        Returns:
+            Number of rows stored
+        """
+        stale = [s for s in dict.fromkeys(symbols) if not self._is_fresh('ohlc', s)]
+        if not stale:
+            return 0
+        if download is None:
+            import yfinance as yf
+            download = yf.download
+
+        last = {s: self._last_date('ohlc', 'symbol', s) for s in stale}
+        new = [s for s in stale if last[s] is None]
+        known = [s for s in stale if last[s] is not None]
+
+        # One download for never-seen symbols, one delta download for the rest
+        stored = 0
+        if new:
+            stored += self._store_ohlc(download, new, last, period="max")[0]
+        if known:
+            # The last stored bar is fetched again: it may have been stored before the close
+            start = min(last[s] for s in known)
+            delta, adjusted = self._store_ohlc(download, known, last, start=start)
+            stored += delta
+            if adjusted:
+                # Adjusted prices before a split or dividend all change, so those symbols are reloaded whole
+                stored += self._store_ohlc(download, adjusted, {}, replace=True, period="max")[0]
+
+        conn = self._connect()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO series VALUES ('ohlc', ?, NULL, ?)",
+                             [(s, time.time()) for s in stale])
+        return stored
+
+    def _store_ohlc(self, download, symbols, last, replace=False, **window):
+        """
+        Download and store adjusted OHLC rows dated on or after each symbol's last stored date
+        Args:
+            download: yf.download-compatible callable
+            symbols: Symbols to download together
+            last: Dict of symbol -> last stored date (missing or None: store every row)
+            replace: Delete the stored rows of every downloaded symbol first, in the same transaction
+            **window: period= or start= for the download
+        Returns:
+            (rows stored, symbols with a split or dividend after their last stored date)
+        """
+        tickers = {s if s.startswith('^') else f"{s}.NS": s for s in symbols}
+        data = download(list(tickers), progress=False, auto_adjust=True, actions=True, **window)
+        if data is None or data.empty:
+            return 0, []
+        if not isinstance(data.columns, pd.MultiIndex):
+            data.columns = pd.MultiIndex.from_product([data.columns, list(tickers)])
+
+        fields = ['Open', 'High', 'Low', 'Close', 'Volume']
+        present = set(data.columns.get_level_values(0))
+
+        adjusted = set()
+        dates = pd.to_datetime(data.index).strftime("%Y-%m-%d")
+        for action in ('Dividends', 'Stock Splits'):
+            if action not in present:
+                continue
+            events = data[action].reindex(columns=list(tickers)).fillna(0).ne(0)
+            for ticker, symbol in tickers.items():
+                if last.get(symbol) and (dates[events[ticker].to_numpy()] > last[symbol]).any():
+                    adjusted.add(symbol)
+
+        frame = pd.DataFrame({
+            field: data[field].reindex(columns=list(tickers)).stack(future_stack=True)
+            if field in present else float('nan')
+            for field in fields
+        })
+        frame = frame.dropna(subset=['Close']).reset_index()
+        frame.columns = ['date', 'ticker'] + fields
+        frame['symbol'] = frame['ticker'].map(tickers)
+        frame['date'] = pd.to_datetime(frame['date']).dt.strftime("%Y-%m-%d")
+
+        # The stored rows of an adjusted symbol are reloaded by the caller, not patched
+        since = frame['symbol'].map(last).fillna("")
+        frame = frame[(frame['date'] >= since) & ~frame['symbol'].isin(adjusted)]
+
+        rows = frame[['symbol', 'date'] + fields].itertuples(index=False, name=None)
+        conn = self._connect()
+        with conn:
+            if replace:
+                conn.executemany("DELETE FROM ohlc WHERE symbol = ?", [(s,) for s in frame['symbol'].unique()])
+            conn.executemany("INSERT OR REPLACE INTO ohlc VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(frame), sorted(adjusted)
+
+    def price_history(self, symbols, start=None, end=None, field='close'):
+        """
+        Stored daily prices for several symbols (index range scans, no network)
+        Returns:
+            DataFrame indexed by date, one column per symbol
+        """
+        if field not in ('open', 'high', 'low', 'close', 'volume'):
+            raise ValueError(f"Unknown price field '{field}'")
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return pd.DataFrame(index=pd.DatetimeIndex([], name='date'))
+        placeholders = ", ".join("?" * len(symbols))
+        frame = pd.read_sql_query(
+            f"SELECT symbol, date, {field} FROM ohlc WHERE symbol IN ({placeholders}) "
+            "AND date >= ? AND date <= ?",
+            self._connect(),
+            params=symbols + [self._iso(start, "0000-01-01"), self._iso(end, "9999-12-31")],
+            parse_dates=["date"]
+        )
+        prices = frame.pivot(index='date', columns='symbol', values=field).sort_index()
+        return prices.reindex(columns=[s for s in symbols if s in prices.columns])
+
+    def dump(self, table):
+        """
+        Every stored row of 'nav' or 'ohlc', for bulk export
+        Returns:
+            DataFrame with key (scheme code or symbol), date and the value columns
+        """
+        queries = {
+            'nav': "SELECT scheme_code AS key, date, nav FROM nav",
+            'ohlc': "SELECT symbol AS key, date, open, high, low, close, volume FROM ohlc"
+        }
+        if table not in queries:
+            raise ValueError(f"Unknown history table '{table}'")
+        return pd.read_sql_query(queries[table], self._connect(), parse_dates=["date"])
+
+    @staticmethod
+    def _iso(value, default):
+        return pd.Timestamp(value).strftime("%Y-%m-%d") if value is not None else default
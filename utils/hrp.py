@@ -0,0 +1,153 @@
+"""
+Hierarchical Risk Parity
+Correlation-clustered stock selection and weighting
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, leaves_list, linkage
+from scipy.spatial.distance import squareform
+
+
+class HRPAllocator:
+    """Cluster candidates on return correlations once, then allocate cheaply"""
+
+    # Linkage trees already built, keyed by universe snapshot
+    _trees = OrderedDict()
+    _trees_lock = threading.Lock()
+    CACHE_SIZE = 32
+
+    def __init__(self, returns, method="single"):
+        """
+        Args:
+            returns: DataFrame of daily returns, one column per candidate instrument
+            method: scipy linkage method used for the clustering
+        """
+        self.returns = returns.dropna(how="all").fillna(0.0)
+        self.instruments = list(self.returns.columns)
+        self.method = method
+        self.snapshot = self._snapshot_key()
+
+    def _snapshot_key(self):
+        """Hash of the return data identifying this universe"""
+        digest = hashlib.sha1(np.ascontiguousarray(self.returns.to_numpy()).tobytes())
+        digest.update(repr((self.instruments, self.method)).encode())
+        return digest.hexdigest()
+
+    def tree(self):
+        """
+        Build (or fetch from cache) the clustering for this snapshot
+        Returns:
+            Dict with linkage matrix, quasi-diagonal leaf order and covariance
+        """
+        with self._trees_lock:
+            if self.snapshot in self._trees:
+                self._trees.move_to_end(self.snapshot)
+                return self._trees[self.snapshot]
+
+        # Built outside the lock; two threads racing on a new snapshot both
+        # build the same tree and the second insert is harmless
+        tree = self._build_tree()
+        with self._trees_lock:
+            self._trees[self.snapshot] = tree
+            self._trees.move_to_end(self.snapshot)
+            while len(self._trees) > self.CACHE_SIZE:
+                self._trees.popitem(last=False)
+        return tree
+
+    def _build_tree(self):
+        """Correlation distance -> linkage -> seriated order"""
+        cov = self.returns.cov().to_numpy()
+        vol = np.sqrt(np.diag(cov))
+        denom = np.outer(vol, vol)
+        corr = np.divide(cov, denom, out=np.zeros_like(cov), where=denom > 0)
+        np.fill_diagonal(corr, 1.0)
+
+        distance = np.sqrt(np.clip((1 - corr) / 2, 0, None))
+        link = linkage(squareform(distance, checks=False), method=self.method)
+        return {
+            "linkage": link,
+            "order": leaves_list(link),
+            "cov": cov
+        }
+
+    def allocate(self, instruments=None):
+        """
+        HRP weights by recursive bisection of the cached leaf order
+        Args:
+            instruments: Optional subset of instruments to weight (default all)
+        Returns:
+            Series of weights summing to 1, in leaf order
+        """
+        tree = self.tree()
+        order = tree["order"]
+        if instruments is not None:
+            wanted = np.isin(np.asarray(self.instruments)[order], list(instruments))
+            order = order[wanted]
+        cov = tree["cov"]
+
+        weights = np.ones(len(order))
+        clusters = [np.arange(len(order))] if len(order) else []
+        while clusters:
+            split = []
+            for cluster in clusters:
+                if len(cluster) < 2:
+                    continue
+                half = len(cluster) // 2
+                left, right = cluster[:half], cluster[half:]
+                left_var = self._cluster_variance(cov, order[left])
+                right_var = self._cluster_variance(cov, order[right])
+                total = left_var + right_var
+                alpha = 1 - left_var / total if total > 0 else 0.5
+                weights[left] *= alpha
+                weights[right] *= 1 - alpha
+                split.extend([left, right])
+            clusters = split
+
+        return pd.Series(weights, index=np.asarray(self.instruments)[order])
+
+    @staticmethod
+    def _cluster_variance(cov, members):
+        """Variance of the inverse-variance portfolio of a cluster"""
+        sub = cov[np.ix_(members, members)]
+        inv = 1 / np.maximum(np.diag(sub), 1e-12)
+        w = inv / inv.sum()
+        return w @ sub @ w
+
+    def select(self, n, scores=None):
+        """
+        Pick n diversified instruments, one from each correlation cluster
+        Args:
+            n: Number of picks
+            scores: Optional Series of instrument -> score; the best-scored
+                member of each cluster is picked (default lowest volatility)
+        Returns:
+            Series of HRP weights for the picks, largest first
+        """
+        tree = self.tree()
+        n = min(n, len(self.instruments))
+        if n == 0:
+            return pd.Series(dtype=np.float64)
+        if len(self.instruments) == 1:
+            return pd.Series([1.0], index=self.instruments)
+
+        labels = fcluster(tree["linkage"], n, criterion="maxclust")
+        if scores is None:
+            scores = pd.Series(-np.sqrt(np.diag(tree["cov"])), index=self.instruments)
+
+        ranked = pd.DataFrame({
+            "instrument": self.instruments,
+            "cluster": labels,
+            "score": pd.Series(scores, dtype=np.float64).reindex(self.instruments).fillna(-np.inf).to_numpy()
+        }).sort_values("score", ascending=False, kind="stable")
+        picks = ranked.drop_duplicates("cluster")["instrument"].tolist()
+
+        # maxclust can return fewer clusters than asked for on tied distances
+        if len(picks) < n:
+            picks += [i for i in ranked["instrument"] if i not in picks][:n - len(picks)]
+
+        return self.allocate(picks[:n]).sort_values(ascending=False)
@@ -0,0 +1,125 @@
+"""
+Shared HTTP Client
+Keep-alive connection pools with jittered exponential retries for market data sources
+"""
+
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.rate_limiter import RateLimiter
+
+_held = threading.local()  # Host slot held by the current thread's request
+
+
+class _SlotRetry(Retry):
+    """Retry that hands the host slot back while it sleeps between attempts"""
+
+    def sleep(self, response=None):
+        slot = getattr(_held, "slot", None)
+        if slot is None:
+            return super().sleep(response)
+        slot.release()
+        try:
+            super().sleep(response)
+        finally:
+            slot.acquire()
+
+
+class HTTPClient:
+    """Thread-safe pooled HTTP client shared by all data sources"""
+
+    DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    HOST_CONCURRENCY = 8  # Requests in flight per upstream host, across all clients
+
+    _shared = None
+    _shared_lock = threading.Lock()
+    _host_slots = {}
+
+    def __init__(self, timeout=None, retries=3, backoff=0.5, jitter=0.5, pool_size=16, rate_limiter=None):
+        """
+        Args:
+            timeout: Default (connect, read) timeout in seconds, or a single number
+            retries: Retries on connection errors and RETRY_STATUSES
+            backoff: Base of the exponential backoff in seconds (0.5, 1, 2, ...)
+            jitter: Maximum random seconds added to each backoff
+            pool_size: Keep-alive connections kept per host
+            rate_limiter: Per-host token buckets (default process-wide limiter)
+        """
+        self.timeout = timeout or self.DEFAULT_TIMEOUT
+        self.rate_limiter = rate_limiter or RateLimiter.shared()
+
+        retry = _SlotRetry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            backoff_factor=backoff,
+            backoff_jitter=jitter,
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+        # urllib3 pools are thread-safe; the session only holds shared config
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Accept-Encoding": "gzip, deflate",
+            "User-Agent": "CodeNCash/1.0"
+        })
+
+    @classmethod
+    def shared(cls):
+        """Process-wide client, created on first use"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    @classmethod
+    def _host_slot(cls, host):
+        """Semaphore capping concurrent requests to a host"""
+        with cls._shared_lock:
+            if host not in cls._host_slots:
+                cls._host_slots[host] = threading.BoundedSemaphore(cls.HOST_CONCURRENCY)
+            return cls._host_slots[host]
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        """
+        GET with pooling, per-host rate limiting and retries
+        Args:
+            url: Request URL
+            params: Optional query parameters
+            timeout: Override of the default timeout
+        Returns:
+            requests.Response (retry statuses are returned after the last attempt)
+        """
+        host = urlparse(url).hostname or ""
+        self.rate_limiter.acquire(host)
+        # The host slot is held per attempt: retry backoff sleeps release it, so
+        # a failing request does not keep others to the host waiting
+        slot = self._host_slot(host)
+        with slot:
+            _held.slot = slot
+            try:
+                return self.session.get(url, params=params, timeout=timeout or self.timeout, **kwargs)
+            finally:
+                _held.slot = None
+
+    def get_json(self, url, params=None, timeout=None, **kwargs):
+        """GET a JSON document, raising requests.HTTPError on a failed status"""
+        response = self.get(url, params=params, timeout=timeout, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def close(self):
+        self.session.close()
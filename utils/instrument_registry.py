@@ -0,0 +1,120 @@
+"""
+Instrument Universe Registry
+Loads stocks, mutual funds and debt options once, with hash indexes
+"""
+
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+class InstrumentRegistry:
+    """In-memory instrument universe with O(1) lookups and filtered views"""
+
+    DEFAULT_PATH = Path(__file__).resolve().parent.parent / "data" / "instruments.csv"
+
+    NUMERIC_FIELDS = ("returns_3y", "interest_rate", "market_cap", "expense_ratio")
+    INDEXED_FIELDS = ("instrument_type", "sector", "category", "fund_type")
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: CSV universe file (default data/instruments.csv, or the
+                CODENCASH_INSTRUMENTS_FILE environment variable)
+        """
+        self.path = Path(path or os.getenv("CODENCASH_INSTRUMENTS_FILE") or self.DEFAULT_PATH)
+
+        frame = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        for field in self.NUMERIC_FIELDS:
+            if field in frame.columns:
+                frame[field] = pd.to_numeric(frame[field].replace("", np.nan), errors="coerce")
+        self.frame = frame
+
+        self._records = [
+            {k: v for k, v in row.items() if v != "" and not (isinstance(v, float) and np.isnan(v))}
+            for row in frame.to_dict("records")
+        ]
+
+        self._by_symbol = self._unique_index("symbol")
+        self._by_isin = self._unique_index("isin")
+        self._by_scheme_code = self._unique_index("scheme_code")
+        self._groups = {
+            field: {value: positions for value, positions in frame.groupby(field, sort=False).indices.items()
+                    if value != ""}
+            for field in self.INDEXED_FIELDS if field in frame.columns
+        }
+
+    @classmethod
+    def default(cls):
+        """Process-wide registry, loaded on first use"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    def _unique_index(self, field):
+        """Hash index from a unique key column to row position"""
+        if field not in self.frame.columns:
+            return {}
+        return {key: pos for pos, key in enumerate(self.frame[field]) if key != ""}
+
+    def __len__(self):
+        return len(self._records)
+
+    def get(self, symbol):
+        """Instrument by NSE symbol"""
+        return self._record(self._by_symbol.get(symbol))
+
+    def get_by_isin(self, isin):
+        """Instrument by ISIN"""
+        return self._record(self._by_isin.get(isin))
+
+    def get_by_scheme_code(self, scheme_code):
+        """Mutual fund by AMFI scheme code"""
+        return self._record(self._by_scheme_code.get(str(scheme_code)))
+
+    def _record(self, pos):
+        """Copy of a record so callers can't mutate the registry"""
+        return dict(self._records[pos]) if pos is not None else None
+
+    def positions(self, **filters):
+        """
+        Row positions matching every filter
+        Args:
+            filters: Indexed field=value pairs, e.g. instrument_type='stock', sector='IT'
+        Returns:
+            Sorted NumPy array of row positions
+        """
+        result = None
+        for field, value in filters.items():
+            if field not in self._groups:
+                raise ValueError(f"'{field}' is not an indexed field")
+            matches = self._groups[field].get(value, np.empty(0, dtype=np.int64))
+            result = matches if result is None else np.intersect1d(result, matches, assume_unique=True)
+        return np.arange(len(self._records)) if result is None else np.sort(result)
+
+    def view(self, limit=None, **filters):
+        """
+        Records matching the filters, in file order
+        Args:
+            limit: Optional maximum number of records
+            filters: Indexed field=value pairs
+        Returns:
+            List of instrument dicts
+        """
+        return self.records(self.positions(**filters)[:limit])
+
+    def records(self, positions):
+        """Copies of the records at the given row positions, in that order"""
+        return [dict(self._records[pos]) for pos in positions]
+
+    def columns(self, **filters):
+        """Columnar DataFrame slice of the matching instruments"""
+        return self.frame.iloc[self.positions(**filters)]
@@ -3,28 +3,77 @@ Live Market Data Integration
 Fetches real-time data from Yahoo Finance and MFapi
 """
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 import yfinance as yf
-import requests
+import pandas as pd
 from typing import Dict, List, Optional
 import streamlit as st
 from datetime import datetime
+from utils.amfi_nav_index import AMFINavIndex
+from utils.columnar_store import ColumnarStore
+from utils.http_client import HTTPClient
+from utils.history_store import HistoryStore
+from utils.shared_cache import SharedCache
+from utils.single_flight import SingleFlight
 
 class LiveMarketData:
     """Fetch live market data from various sources"""
     
-    def __init__(self):
+    # Shared cache lifetimes (seconds) per key family
+    QUOTE_TTL = 300
+    INDEX_TTL = 300
+    NAV_TTL = 3600  # NAVs update once a day
+    HISTORY_TTL = 3600  # Daily closes
+    STALE_TTL = 24 * 3600  # Last good quote/NAV/index level kept for stale reads
+    
+    INDICES_KEY = "nifty_sensex"
+    YAHOO_HOST = "query2.finance.yahoo.com"  # Rate-limit bucket for yfinance calls
+    
+    NAV_INDEX_RETRY = 300  # Seconds before a failed AMFI NAV file download is retried
+    NAV_TIMEOUT = 5  # Seconds per NAV request
+    NAV_BATCH_DEADLINE = 8  # Seconds a page waits for a batch of NAVs
+    MAX_FETCH_WORKERS = 16
+    
+    # Fetch pool shared by all sessions (per-host concurrency is capped by HTTPClient)
+    _pool = None
+    _pool_lock = threading.Lock()
+    _refreshing = set()  # (family, key) background refreshes in flight
+    _exporting = {}  # Columnar dataset -> True if rows were stored while its export ran
+    _flights = SingleFlight()  # Concurrent fetches of the same key share one request
+    _nav_index_failed_at = 0.0
+    
+    def __init__(self, http_client=None, history_store=None, cache=None, nav_index=None, columnar_store=None):
         self.mf_api_base = "https://api.mfapi.in"
+        self.http = http_client or HTTPClient.shared()  # Pooled keep-alive connections with retries
+        self.rate_limiter = self.http.rate_limiter  # Per-host token buckets, also applied to yfinance
+        self.history = history_store or HistoryStore(http_client=self.http, mf_api_base=self.mf_api_base)
+        self.cache = cache or SharedCache.default()  # Shared by every server process
+        self._nav_index = nav_index  # Fixed AMFINavIndex (default: process-wide daily file)
+        # Mapped snapshot of the history store for bulk reads, kept next to a custom store
+        self.columnar = columnar_store or ColumnarStore(
+            None if history_store is None else self.history.path.with_suffix('.columnar'))
     
-    @st.cache_data(ttl=300)  # Cache for 5 minutes
-    def get_stock_price(_self, symbol: str) -> Optional[Dict]:
+    def get_stock_price(self, symbol: str) -> Optional[Dict]:
         """
         Get live stock price from NSE
         Args:
             symbol: Stock symbol (e.g., 'TCS', 'RELIANCE')
         Returns:
-            Dict with price, change, name
+            Dict with price, change, name, as_of and stale; a stale quote is
+            returned at once while a refresh runs in the background
         """
+        quotes = self._cached("quote", [symbol], self.refresh_quotes)
+        if symbol in quotes:
+            return quotes[symbol]
+        
+        return self._flights.do(("quote", symbol), lambda: self._fetch_stock_price(symbol))
+    
+    def _fetch_stock_price(self, symbol: str) -> Optional[Dict]:
+        """Quote for one symbol straight from Yahoo, stored in the cache"""
         try:
+            self.rate_limiter.acquire(self.YAHOO_HOST, 2)  # .info and .history
             ticker = yf.Ticker(f"{symbol}.NS")
             info = ticker.info
             history = ticker.history(period="1d")
@@ -34,86 +83,518 @@ class LiveMarketData:
                 prev_close = info.get('previousClose', current_price)
                 change_pct = ((current_price - prev_close) / prev_close) * 100 if prev_close else 0
                 
-                return {
+                quote = {
                     "symbol": symbol,
                     "name": info.get('longName', symbol),
-                    "price": round(current_price, 2),
-                    "change_percent": round(change_pct, 2),
+                    "price": round(float(current_price), 2),
+                    "change_percent": round(float(change_pct), 2),
                     "currency": "INR",
                     "timestamp": datetime.now().strftime("%H:%M:%S")
                 }
+                return self._store("quote", {symbol: quote}, self.QUOTE_TTL)[symbol]
         except Exception as e:
             st.warning(f"Could not fetch live data for {symbol}: {str(e)}")
             return None
     
-    @st.cache_data(ttl=3600)  # Cache for 1 hour (NAV updates once daily)
-    def get_mutual_fund_nav(_self, scheme_code: str) -> Optional[Dict]:
+    def get_stock_prices(self, symbols: tuple) -> Dict[str, Dict]:
         """
-        Get mutual fund NAV from MFapi
+        Get live prices for many NSE stocks from one multi-ticker download
         Args:
-            scheme_code: Scheme code from AMFI
+            symbols: Tuple of stock symbols
         Returns:
-            Dict with NAV, date, fund name
+            Dict of symbol -> quote (same shape as get_stock_price)
         """
+        quotes = self._cached("quote", symbols, self.refresh_quotes)
+        missing = [s for s in symbols if s not in quotes]
+        if not missing:
+            return quotes
+        
         try:
-            url = f"{_self.mf_api_base}/mf/{scheme_code}"
-            response = requests.get(url, timeout=5)
+            fetched = self.refresh_quotes(missing)
+        except Exception as e:
+            st.warning(f"Could not fetch live prices: {str(e)}")
+            return quotes
+        return {**quotes, **fetched}
+    
+    def refresh_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """
+        Download quotes for several symbols and store them (raises on failure)
+        Returns:
+            Dict of symbol -> quote for the symbols Yahoo returned
+        """
+        symbols = tuple(symbols)
+        return self._flights.do(("quotes", symbols), lambda: self._download_quotes(symbols))
+    
+    def _download_quotes(self, symbols: tuple) -> Dict[str, Dict]:
+        tickers = {f"{s}.NS": s for s in symbols}
+        self.rate_limiter.acquire(self.YAHOO_HOST, len(tickers))
+        # Previous close is the prior row of the same frame, so no .info calls
+        data = yf.download(list(tickers), period="5d", progress=False, auto_adjust=False)
+        closes = self._closes(data, tickers)
+        
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        fetched = {}
+        for symbol in closes.columns:
+            series = closes[symbol].dropna()
+            if series.empty:
+                continue
+            current_price = float(series.iloc[-1])
+            prev_close = float(series.iloc[-2]) if len(series) > 1 else current_price
+            change_pct = ((current_price - prev_close) / prev_close) * 100 if prev_close else 0
             
-            if response.status_code == 200:
-                data = response.json()
-                latest = data['data'][0] if data.get('data') else None
-                
-                if latest:
-                    return {
-                        "fund_name": data['meta']['scheme_name'],
-                        "nav": float(latest['nav']),
-                        "date": latest['date'],
-                        "scheme_code": scheme_code
-                    }
+            fetched[symbol] = {
+                "symbol": symbol,
+                "name": symbol,
+                "price": round(current_price, 2),
+                "change_percent": round(change_pct, 2),
+                "currency": "INR",
+                "timestamp": timestamp
+            }
+        
+        # Each quote gets its own key, so single-symbol lookups hit too
+        return self._store("quote", fetched, self.QUOTE_TTL)
+    
+    @staticmethod
+    def _closes(data: pd.DataFrame, tickers: Dict[str, str]) -> pd.DataFrame:
+        """Close prices from a yf.download frame, one column per symbol"""
+        if isinstance(data.columns, pd.MultiIndex):
+            closes = data['Close']
+        else:
+            closes = data[['Close']]
+            closes.columns = list(tickers)
+        return closes.rename(columns=tickers).dropna(how='all')
+    
+    def get_mutual_fund_nav(self, scheme_code: str) -> Optional[Dict]:
+        """
+        Get mutual fund NAV from the AMFI NAV file, falling back to MFapi
+        Args:
+            scheme_code: Scheme code from AMFI
+        Returns:
+            Dict with NAV, date, fund name, as_of and stale
+        """
+        navs = self.indexed_navs([scheme_code])
+        if scheme_code in navs:
+            return navs[scheme_code]
+        
+        navs = self._cached("nav", [scheme_code], self.refresh_navs)
+        if scheme_code in navs:
+            return navs[scheme_code]
+        
+        try:
+            return self._fetch_nav(scheme_code)
         except Exception as e:
             st.warning(f"Could not fetch NAV for scheme {scheme_code}: {str(e)}")
             return None
     
-    @st.cache_data(ttl=300)  # Cache for 5 minutes
-    def get_market_indices(_self) -> Dict:
+    def get_mutual_fund_nav_by_isin(self, isin: str) -> Optional[Dict]:
+        """
+        Get mutual fund NAV by growth/payout or reinvestment ISIN
+        Returns:
+            Dict with NAV, date, fund name and scheme code, or None
+        """
+        index = self.nav_index()
+        nav = index.get_by_isin(isin) if index is not None else None
+        if not nav or nav['nav'] is None:
+            return None
+        return self._annotate(nav, index.loaded_at, False)
+    
+    def nav_index(self) -> Optional[AMFINavIndex]:
+        """AMFI NAV index for all schemes, or None while the file is unavailable"""
+        if self._nav_index is not None:
+            return self._nav_index
+        if time.time() - self._nav_index_failed_at < self.NAV_INDEX_RETRY:
+            return None
+        try:
+            # Never waits on a rebuild once an index exists; a stale one is rebuilt in the background
+            return AMFINavIndex.shared(wait=False)
+        except Exception:
+            # Only raised while there is no index at all
+            LiveMarketData._nav_index_failed_at = time.time()
+            return None
+    
+    def refresh_nav_index(self, max_age: Optional[float] = None) -> AMFINavIndex:
+        """
+        Process-wide AMFI NAV index, rebuilt from the daily file once older
+        than max_age seconds (raises on failure; the previous index stays in
+        service for readers)
+        """
+        if self._nav_index is not None:
+            return self._nav_index
+        index = AMFINavIndex.shared(max_age)
+        LiveMarketData._nav_index_failed_at = 0.0
+        return index
+    
+    def indexed_navs(self, scheme_codes: List[str]) -> Dict[str, Dict]:
+        """NAVs found in the AMFI NAV index, with no request per scheme"""
+        index = self.nav_index()
+        if index is None:
+            return {}
+        
+        navs = {}
+        for code in scheme_codes:
+            nav = index.get(code)
+            if nav and nav['nav'] is not None:
+                navs[code] = self._annotate(nav, index.loaded_at, False)
+        return navs
+    
+    def _fetch_nav(self, scheme_code: str, force: bool = False) -> Optional[Dict]:
+        """Sync one scheme's NAV history and cache its latest NAV (raises on failure)"""
+        return self._flights.do(("nav", scheme_code), lambda: self._sync_nav(scheme_code, force))
+    
+    def _sync_nav(self, scheme_code: str, force: bool) -> Optional[Dict]:
+        # The history store only asks MFapi for dates after its last stored row
+        if force:
+            self.history.sync_nav(scheme_code, timeout=self.NAV_TIMEOUT)
+        nav = self.history.latest_nav(scheme_code, sync=not force, timeout=self.NAV_TIMEOUT)
+        if not nav:
+            return None
+        return self._store("nav", {scheme_code: nav}, self.NAV_TTL)[scheme_code]
+    
+    def refresh_navs(self, scheme_codes: List[str]) -> Dict[str, Dict]:
+        """
+        Re-sync NAVs one scheme at a time, skipping failures (for background use)
+        Returns:
+            Dict of scheme code -> NAV dict for the schemes refreshed
+        """
+        navs = {}
+        for code in scheme_codes:
+            try:
+                nav = self._fetch_nav(code, force=True)
+            except Exception:
+                nav = None
+            if nav:
+                navs[code] = nav
+        return navs
+    
+    @classmethod
+    def _fetch_pool(cls) -> ThreadPoolExecutor:
+        """Process-wide worker pool for concurrent fetches"""
+        with cls._pool_lock:
+            if cls._pool is None:
+                cls._pool = ThreadPoolExecutor(max_workers=cls.MAX_FETCH_WORKERS,
+                                               thread_name_prefix="market-data")
+            return cls._pool
+    
+    def get_mutual_fund_navs(self, scheme_codes: List[str], deadline: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Get NAVs for many schemes: AMFI NAV index first, then MFapi concurrently
+        Args:
+            scheme_codes: AMFI scheme codes
+            deadline: Seconds to wait for the whole batch (default NAV_BATCH_DEADLINE)
+        Returns:
+            Dict of scheme code -> NAV dict for the schemes that arrived in time;
+            failed or late schemes are left out
+        """
+        # The deadline covers the whole call, including the index and cache lookups
+        expires = time.monotonic() + (deadline or self.NAV_BATCH_DEADLINE)
+        codes = list(dict.fromkeys(scheme_codes))
+        navs = self.indexed_navs(codes)
+        remaining = [code for code in codes if code not in navs]
+        navs.update(self._cached("nav", remaining, self.refresh_navs))
+        pending = [code for code in remaining if code not in navs]
+        
+        if not pending:
+            return navs
+        
+        pool = self._fetch_pool()
+        futures = {pool.submit(self._fetch_nav, code): code for code in pending}
+        done, not_done = wait(futures, timeout=max(expires - time.monotonic(), 0))
+        
+        # Late fetches are not cancelled: they keep running and land in the shared cache for the next render
+        late = len(not_done)
+        failed = 0
+        for future in done:
+            try:
+                nav = future.result()
+            except Exception:
+                nav = None
+            if nav:
+                navs[futures[future]] = nav
+            else:
+                failed += 1
+        
+        if failed:
+            st.warning(f"Live NAV unavailable for {failed} of {len(pending)} schemes")
+        if late:
+            st.info(f"Live NAV still loading for {late} of {len(pending)} schemes; they will appear on refresh")
+        return navs
+    
+    def get_market_indices(self) -> Dict:
         """
         Get Nifty 50 and Sensex indices
         Returns:
-            Dict with index values and changes
+            Dict with index values and changes, plus as_of and stale
         """
+        indices = self._cached("indices", [self.INDICES_KEY], lambda keys: self.refresh_indices())
+        if self.INDICES_KEY in indices:
+            return indices[self.INDICES_KEY]
+        
         try:
-            nifty = yf.Ticker("^NSEI")
-            sensex = yf.Ticker("^BSESN")
-            
-            nifty_hist = nifty.history(period="2d")
-            sensex_hist = sensex.history(period="2d")
-            
-            result = {}
-            
-            if len(nifty_hist) >= 2:
-                nifty_current = nifty_hist['Close'].iloc[-1]
-                nifty_prev = nifty_hist['Close'].iloc[-2]
-                nifty_change = ((nifty_current - nifty_prev) / nifty_prev) * 100
-                
-                result['nifty'] = {
-                    "value": round(nifty_current, 2),
-                    "change": round(nifty_change, 2)
-                }
+            return self.refresh_indices()
+        except Exception as e:
+            st.warning(f"Could not fetch market indices: {str(e)}")
+            return {}
+    
+    def refresh_indices(self) -> Dict:
+        """Nifty 50 and Sensex straight from Yahoo, stored when complete (raises on failure)"""
+        return self._flights.do(("indices",), self._download_indices)
+    
+    def _download_indices(self) -> Dict:
+        self.rate_limiter.acquire(self.YAHOO_HOST, 2)
+        nifty = yf.Ticker("^NSEI")
+        sensex = yf.Ticker("^BSESN")
+        
+        nifty_hist = nifty.history(period="2d")
+        sensex_hist = sensex.history(period="2d")
+        
+        result = {}
+        
+        if len(nifty_hist) >= 2:
+            nifty_current = nifty_hist['Close'].iloc[-1]
+            nifty_prev = nifty_hist['Close'].iloc[-2]
+            nifty_change = ((nifty_current - nifty_prev) / nifty_prev) * 100
             
-            if len(sensex_hist) >= 2:
-                sensex_current = sensex_hist['Close'].iloc[-1]
-                sensex_prev = sensex_hist['Close'].iloc[-2]
-                sensex_change = ((sensex_current - sensex_prev) / sensex_prev) * 100
-                
-                result['sensex'] = {
-                    "value": round(sensex_current, 2),
-                    "change": round(sensex_change, 2)
-                }
+            result['nifty'] = {
+                "value": round(float(nifty_current), 2),
+                "change": round(float(nifty_change), 2)
+            }
+        
+        if len(sensex_hist) >= 2:
+            sensex_current = sensex_hist['Close'].iloc[-1]
+            sensex_prev = sensex_hist['Close'].iloc[-2]
+            sensex_change = ((sensex_current - sensex_prev) / sensex_prev) * 100
             
+            result['sensex'] = {
+                "value": round(float(sensex_current), 2),
+                "change": round(float(sensex_change), 2)
+            }
+        
+        if not result:
             return result
+        return self._store("indices", {self.INDICES_KEY: result}, self.INDEX_TTL)[self.INDICES_KEY]
+    
+    def request_stats(self) -> Dict:
+        """
+        Outbound request counters for this process
+        Returns:
+            Dict with single-flight leaders/coalesced counts and per-host
+            requests/throttled/wait_seconds from the rate limiter
+        """
+        return {"single_flight": self._flights.stats(), "rate_limits": self.rate_limiter.stats()}
+    
+    def _cached(self, family: str, keys, refresh) -> Dict:
+        """
+        Cached values for keys, stale ones included (stale-while-revalidate)
+        Args:
+            family: Cache key family
+            keys: Keys to look up
+            refresh: Callable taking a list of keys that re-fetches and stores them
+        Returns:
+            Dict of key -> value with as_of (fetch time) and stale flags; stale
+            keys get one background refresh
+        """
+        entries = self.cache.get_entries(family, keys)
+        stale = [key for key, entry in entries.items() if entry.stale]
+        if stale:
+            self._revalidate(family, stale, refresh)
+        return {key: self._annotate(entry.value, entry.stored_at, entry.stale) for key, entry in entries.items()}
+    
+    def _store(self, family: str, values: Dict, ttl: int) -> Dict:
+        """Cache fresh values, keeping them as last good values for STALE_TTL"""
+        self.cache.set_many(family, values, ttl, self.STALE_TTL)
+        now = time.time()
+        return {key: self._annotate(value, now, False) for key, value in values.items()}
+    
+    @staticmethod
+    def _annotate(value: Dict, as_of: float, stale: bool) -> Dict:
+        return {**value, "as_of": as_of, "stale": stale}
+    
+    def _revalidate(self, family: str, keys: List[str], refresh) -> None:
+        """Refresh stale keys on the fetch pool unless a refresh is already in flight"""
+        with self._pool_lock:
+            keys = [key for key in keys if (family, key) not in self._refreshing]
+            self._refreshing.update((family, key) for key in keys)
+        if not keys:
+            return
+        
+        def run():
+            try:
+                refresh(keys)
+            except Exception:
+                pass  # The last good value keeps being served until a refresh succeeds
+            finally:
+                with self._pool_lock:
+                    self._refreshing.difference_update((family, key) for key in keys)
+        
+        self._fetch_pool().submit(run)
+    
+    def get_price_history(self, symbols: tuple, period: str = "1y") -> pd.DataFrame:
+        """
+        Get daily closing prices for several NSE symbols and indices
+        Args:
+            symbols: Tuple of stock symbols (e.g. 'TCS') or index tickers (e.g. '^NSEI')
+            period: yfinance period string
+        Returns:
+            DataFrame of closes indexed by date, one column per symbol
+        """
+        key = f"{period}:{','.join(symbols)}"
+        history = self.cache.get("history", key)
+        if history is None:
+            # Re-checked inside the flight in case one finished since the lookup
+            load = lambda: self._load_price_history(symbols, period)
+            history = self._flights.do(("history", key),
+                                       lambda: self.cache.get_or_set("history", key, self.HISTORY_TTL, load))
+        return history if history is not None else pd.DataFrame()
+    
+    def _load_price_history(self, symbols: tuple, period: str) -> Optional[pd.DataFrame]:
+        """Sync the history store and slice it (None on failure)"""
+        try:
+            # Only dates from each symbol's last stored row on are downloaded
+            self.history.sync_prices(symbols, download=self._download)
+            start = self._period_start(period)
+            read = lambda keys, since: self.history.price_history(keys, start=since)
+            prices = self._columnar_frame("ohlc", symbols, "close", start, read)
+            if prices is None:
+                prices = read(symbols, start)
+            prices = prices.rename_axis(index="date", columns="symbol").dropna(how='all')
+            return prices if not prices.empty else None
         except Exception as e:
-            st.warning(f"Could not fetch market indices: {str(e)}")
-            return {}
+            st.warning(f"Could not fetch price history: {str(e)}")
+            return None
+    
+    def _columnar_frame(self, dataset: str, keys: tuple, field: str, start: Optional[pd.Timestamp],
+                        read_stored) -> Optional[pd.DataFrame]:
+        """
+        One field for many instruments from the memory-mapped columnar snapshot,
+        topped up with rows the history store gained since the snapshot was written
+        Args:
+            dataset: 'ohlc' or 'nav'
+            keys: Symbols or scheme codes
+            field: Stored field, e.g. 'close' or 'nav'
+            start: First date, or None
+            read_stored: Callable (keys, start) -> DataFrame of the field from the history store
+        Returns:
+            DataFrame indexed by date, one column per instrument, or None until a
+            snapshot exists or if it cannot be read
+        """
+        keys = [str(k) for k in keys]
+        try:
+            if not self.columnar.has(dataset):
+                self._export_columnar(dataset)
+                return None
+            snapshot = self.columnar.open(dataset)
+        except OSError:
+            return None
+        
+        # Rows from each instrument's last snapshot date on (a re-fetched last bar,
+        # days synced since the export) and instruments new to the store come from
+        # SQLite; if it has anything newer, a fresh snapshot is exported in the background
+        frame = snapshot.frame(keys, field, start=start)
+        last = {key: snapshot.last_date(key) for key in keys if key in snapshot}
+        last = {key: date for key, date in last.items() if date is not None}
+        missing = [key for key in keys if key not in last]
+        since = min(last.values()) if last else None
+        if start is not None and (since is None or since < start):
+            since = start
+        recent = read_stored(list(last), since) if last else pd.DataFrame()
+        added = read_stored(missing, start) if missing else pd.DataFrame()
+        
+        behind = not added.dropna(how='all').empty or any(
+            recent[key].last_valid_index() is not None and recent[key].last_valid_index() > date
+            for key, date in last.items() if key in recent.columns
+        )
+        if behind:
+            self._export_columnar(dataset)
+        
+        frame = recent.combine_first(frame) if not recent.empty else frame
+        if not added.empty:
+            frame = frame.join(added, how='outer') if not frame.empty else added
+        frame.index.name = "date"
+        return frame.reindex(columns=[key for key in keys if key in frame.columns])
+    
+    def _export_columnar(self, dataset: str) -> None:
+        """Re-export a columnar dataset on the fetch pool, once at a time per process"""
+        with self._pool_lock:
+            if dataset in self._exporting:
+                self._exporting[dataset] = True  # Rows landed mid-export; run once more
+                return
+            self._exporting[dataset] = False
+        
+        def run():
+            while True:
+                try:
+                    self.columnar.export_history(self.history, [dataset])
+                except Exception:
+                    pass  # Reads keep using the previous snapshot plus the history store
+                with self._pool_lock:
+                    if not self._exporting[dataset]:
+                        del self._exporting[dataset]
+                        return
+                    self._exporting[dataset] = False
+        
+        self._fetch_pool().submit(run)
+    
+    def get_nav_history(self, scheme_codes: tuple, period: str = "1y", deadline: Optional[float] = None) -> pd.DataFrame:
+        """
+        Daily NAVs for several schemes, synced from MFapi into the history store
+        Args:
+            scheme_codes: Tuple of AMFI scheme codes
+            period: yfinance-style period (1mo, 6mo, 1y, 5y, max)
+            deadline: Seconds to wait for the syncs (default NAV_BATCH_DEADLINE);
+                schemes still syncing are served from what is already stored
+        Returns:
+            DataFrame of NAVs indexed by date, one column per scheme code
+        """
+        key = f"{period}:{','.join(scheme_codes)}"
+        history = self.cache.get("nav_history", key)
+        if history is None:
+            load = lambda: self._load_nav_history(scheme_codes, period, deadline or self.NAV_BATCH_DEADLINE)
+            history, complete = self._flights.do(("nav_history", key), load)
+            # A partial result is served but not cached, so the next render picks up late syncs
+            if complete and history is not None:
+                self.cache.set("nav_history", key, history, self.HISTORY_TTL)
+        return history if history is not None else pd.DataFrame()
+    
+    def _load_nav_history(self, scheme_codes: tuple, period: str, deadline: float):
+        """
+        Sync every scheme concurrently for up to deadline seconds and slice the store
+        Returns:
+            (DataFrame or None if nothing is stored, whether every sync finished)
+        """
+        def sync(code):
+            try:
+                self._fetch_nav(code)
+            except Exception:
+                pass  # Rows stored by earlier syncs are still served
+        
+        pool = self._fetch_pool()
+        # Late syncs keep running and store their rows for later reads
+        _, not_done = wait([pool.submit(sync, code) for code in scheme_codes], timeout=deadline)
+        start = self._period_start(period)
+        navs = self._columnar_frame("nav", scheme_codes, "nav", start, self.history.nav_frame)
+        if navs is None:
+            navs = self.history.nav_frame(scheme_codes, start)
+        navs = navs.dropna(how='all')
+        return (navs if not navs.empty else None), not not_done
+    
+    def _download(self, tickers: List[str], **kwargs) -> pd.DataFrame:
+        """yf.download behind the Yahoo rate limit (one request per ticker)"""
+        self.rate_limiter.acquire(self.YAHOO_HOST, len(tickers))
+        return yf.download(tickers, **kwargs)
+    
+    @staticmethod
+    def _period_start(period: str) -> Optional[pd.Timestamp]:
+        """First date covered by a yfinance period string such as '5d', '6mo', '1y' or 'max'"""
+        today = pd.Timestamp.today().normalize()
+        if period == "max":
+            return None
+        if period == "ytd":
+            return today.replace(month=1, day=1)
+        units = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+        for suffix, unit in sorted(units.items(), key=lambda u: -len(u[0])):
+            if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+                return today - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+        raise ValueError(f"Unsupported period '{period}'")
     
     def enrich_stock_data(self, stocks: List[Dict]) -> List[Dict]:
         """
@@ -123,16 +604,20 @@ class LiveMarketData:
         Returns:
             Enhanced list with live data
         """
+        symbols = tuple(dict.fromkeys(s['symbol'] for s in stocks if s.get('symbol')))
+        quotes = self.get_stock_prices(symbols) if symbols else {}
+        
         enriched = []
         for stock in stocks:
             symbol = stock.get('symbol')
-            live_data = self.get_stock_price(symbol) if symbol else None
+            live_data = quotes.get(symbol) or (self.get_stock_price(symbol) if symbol else None)
             
             enriched_stock = stock.copy()
             if live_data:
                 enriched_stock['live_price'] = live_data['price']
                 enriched_stock['change_percent'] = live_data['change_percent']
                 enriched_stock['timestamp'] = live_data['timestamp']
+                enriched_stock['price_stale'] = live_data['stale']
             
             enriched.append(enriched_stock)
         
@@ -146,10 +631,12 @@ class LiveMarketData:
         Returns:
             Enhanced list with live NAV
         """
+        navs = self.get_mutual_fund_navs([f['scheme_code'] for f in funds if f.get('scheme_code')])
+        
         enriched = []
         for fund in funds:
             scheme_code = fund.get('scheme_code')
-            nav_data = self.get_mutual_fund_nav(scheme_code) if scheme_code else None
+            nav_data = navs.get(scheme_code)
             
             enriched_fund = fund.copy()
             if nav_data:
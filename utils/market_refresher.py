@@ -0,0 +1,131 @@
+"""
+Market Data Refresher
+Background thread that re-fetches hot quotes, index levels, NAVs and the AMFI NAV file before they expire,
+and rebuilds the name search index when that file changes
+"""
+
+import threading
+import time
+
+from utils.amfi_nav_index import AMFINavIndex
+from utils.name_search import NameSearchIndex
+
+
+class MarketRefresher:
+    """Keeps hot shared-cache keys fresh so page renders never wait on upstream"""
+
+    INTERVAL = 30  # Seconds between sweeps
+    REFRESH_AHEAD = 60  # Refresh keys this many seconds before their TTL ends
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, market, symbols=(), scheme_codes=(), interval=None, refresh_ahead=None, registry=None):
+        """
+        Args:
+            market: LiveMarketData whose cache and fetchers are used
+            symbols: NSE symbols whose quotes are kept warm
+            scheme_codes: AMFI scheme codes whose NAVs are kept warm
+            interval: Seconds between sweeps
+            refresh_ahead: Seconds before expiry at which a key is refreshed
+            registry: InstrumentRegistry indexed for name search (default process-wide one)
+        """
+        self.market = market
+        self.registry = registry
+        self.symbols = list(dict.fromkeys(symbols))
+        self.scheme_codes = list(dict.fromkeys(str(c) for c in scheme_codes))
+        self.interval = interval or self.INTERVAL
+        self.refresh_ahead = self.REFRESH_AHEAD if refresh_ahead is None else refresh_ahead
+        self.sweeps = 0
+        self.refreshed = {"indices": 0, "quote": 0, "nav_index": 0, "name_search": 0, "nav": 0}
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def start_shared(cls, market, symbols=(), scheme_codes=(), registry=None):
+        """
+        Start the process-wide refresher once; later calls return the running one
+        Returns:
+            MarketRefresher
+        """
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    refresher = cls(market, symbols, scheme_codes, registry=registry)
+                    refresher.start()
+                    cls._shared = refresher
+        return cls._shared
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="market-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                self.errors += 1
+            if self._stop.wait(self.interval):
+                return
+
+    def _due(self, family, keys):
+        """Keys missing from the cache or expiring within refresh_ahead seconds"""
+        # Other processes share the cache, so a key one of them refreshed is skipped here
+        entries = self.market.cache.get_entries(family, keys, track=False)
+        horizon = time.time() + self.refresh_ahead
+        return [key for key in keys if key not in entries or entries[key].fresh_until <= horizon]
+
+    def run_once(self):
+        """
+        One sweep: refresh every hot key that is missing or about to expire
+        Returns:
+            Dict of family -> number of keys refreshed
+        """
+        market = self.market
+        refreshed = {"indices": 0, "quote": 0, "nav_index": 0, "name_search": 0, "nav": 0}
+
+        if self._due("indices", [market.INDICES_KEY]):
+            refreshed["indices"] = self._refresh(lambda: 1 if market.refresh_indices() else 0)
+        symbols = self._due("quote", self.symbols)
+        if symbols:
+            refreshed["quote"] = self._refresh(lambda: len(market.refresh_quotes(symbols)))
+        codes = []
+        if self.scheme_codes:
+            # Schemes listed in the AMFI file need no per-scheme request
+            refreshed["nav_index"] = self._refresh(self._refresh_nav_index)
+            # Built here, not on a request thread, and swapped in whole
+            refreshed["name_search"] = self._refresh(
+                lambda: int(NameSearchIndex.refresh(market.nav_index(), self.registry)))
+            indexed = market.indexed_navs(self.scheme_codes)
+            codes = self._due("nav", [c for c in self.scheme_codes if c not in indexed])
+        if codes:
+            refreshed["nav"] = self._refresh(lambda: len(market.refresh_navs(codes)))
+
+        self.sweeps += 1
+        for family, n in refreshed.items():
+            self.refreshed[family] += n
+        return refreshed
+
+    def _refresh_nav_index(self):
+        """Rebuild the AMFI NAV index ahead of its MAX_AGE; 1 if it was rebuilt"""
+        started = time.time()
+        index = self.market.refresh_nav_index(AMFINavIndex.MAX_AGE - self.refresh_ahead)
+        return int(index.loaded_at >= started)
+
+    def _refresh(self, fetch):
+        # One failing source must not stop the others from being refreshed
+        try:
+            return fetch()
+        except Exception:
+            self.errors += 1
+            return 0
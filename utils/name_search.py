@@ -0,0 +1,222 @@
+"""
+Scheme and Stock Name Search
+In-memory token, prefix and trigram index resolving free text to AMFI scheme codes and NSE symbols
+"""
+
+import bisect
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+class NameSearchIndex:
+    """Ranked fuzzy lookup over fund and company names, built once per process"""
+
+    PREFIX_WEIGHT = 0.9  # Query token is the start of a name token ('flexi' -> 'flexicap')
+    FUZZY_WEIGHT = 0.8  # Scaled by trigram similarity ('parikh' -> 'parik')
+    MIN_SIMILARITY = 0.45  # Dice coefficient of trigram sets
+    MAX_EXPANSIONS = 64  # Name tokens tried per query token
+
+    _default = None
+    _default_source = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, entries):
+        """
+        Args:
+            entries: Iterable of (kind, key, name) or (kind, key, name, extra), e.g.
+                ('scheme', '122639', 'Parag Parikh Flexi Cap Fund - Direct Plan - Growth',
+                'PPFAS Mutual Fund') or ('stock', 'TCS', 'Tata Consultancy Services');
+                extra text is searchable but not shown, and later duplicates of a
+                (kind, key) are ignored
+        """
+        self.kinds, self.keys, self.names = [], [], []
+        seen = set()
+        doc_tokens = []
+        for kind, key, name, *extra in entries:
+            key = str(key)
+            if (kind, key) in seen or not name:
+                continue
+            seen.add((kind, key))
+            self.kinds.append(kind)
+            self.keys.append(key)
+            self.names.append(name)
+            tokens = self._tokens(name)
+            # Joined neighbours too, so 'midcap' finds 'Mid-Cap' and 'flexicap' finds 'Flexi Cap'
+            doc_tokens.append(set(tokens) | {a + b for a, b in zip(tokens, tokens[1:]) if a.isalpha() and b.isalpha()}
+                              | set(self._tokens(" ".join(e for e in extra if e))))
+
+        self._kind_array = np.array(self.kinds)
+
+        # Vocabulary sorted for prefix ranges, with one postings array per token
+        postings = {}
+        for doc, tokens in enumerate(doc_tokens):
+            for token in tokens:
+                postings.setdefault(token, []).append(doc)
+        self.vocabulary = sorted(postings)
+        self._token_ids = {token: i for i, token in enumerate(self.vocabulary)}
+        self._postings = [np.array(postings[token], dtype=np.int32) for token in self.vocabulary]
+
+        df = np.array([len(p) for p in self._postings], dtype=np.float32)
+        self._idf = np.log1p(len(self.names) / np.maximum(df, 1)).astype(np.float32)
+        # Ties go to the shorter name ('... Direct Growth' before '... Direct Growth Bonus')
+        self._length_penalty = np.array([0.01 * len(t) for t in doc_tokens], dtype=np.float32)
+
+        trigrams = {}
+        for token_id, token in enumerate(self.vocabulary):
+            for gram in self._trigrams(token):
+                trigrams.setdefault(gram, []).append(token_id)
+        self._trigram_postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in trigrams.items()}
+        self._trigram_counts = np.array([len(self._trigrams(t)) for t in self.vocabulary], dtype=np.int32)
+
+    @classmethod
+    def default(cls, registry=None):
+        """
+        Process-wide index, never rebuilt on the caller's thread once it exists;
+        until refresh() has indexed the AMFI NAV file it covers the universe only
+        Args:
+            registry: InstrumentRegistry (default process-wide registry)
+        Returns:
+            NameSearchIndex
+        """
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls.build(None, registry)
+        return cls._default
+
+    @classmethod
+    def refresh(cls, nav_index, registry=None):
+        """
+        Rebuild the process-wide index for a new AMFI NAV index and swap it in
+        (for the market refresher; searches keep using the old index meanwhile)
+        Args:
+            nav_index: AMFINavIndex for scheme names
+            registry: InstrumentRegistry (default process-wide registry)
+        Returns:
+            True if the index was rebuilt
+        """
+        if nav_index is None or cls._default_source is nav_index:
+            return False
+        index = cls.build(nav_index, registry)
+        with cls._default_lock:
+            cls._default, cls._default_source = index, nav_index
+        return True
+
+    @classmethod
+    def build(cls, nav_index=None, registry=None, nse_equity_file=None):
+        """
+        Index from local sources
+        Args:
+            nav_index: AMFINavIndex whose scheme names are indexed
+            registry: InstrumentRegistry for universe funds and stocks
+            nse_equity_file: NSE EQUITY_L.csv listing every equity (default
+                CODENCASH_NSE_EQUITY_FILE, skipped if unset)
+        Returns:
+            NameSearchIndex
+        """
+        if registry is None:
+            from utils.instrument_registry import InstrumentRegistry
+            registry = InstrumentRegistry.default()
+
+        entries = []
+        if nav_index is not None:
+            amcs = [nav_index.amcs[i] if i >= 0 else None for i in nav_index.amc_ids.tolist()]
+            entries += [("scheme", code, name, amc)
+                        for code, name, amc in zip(nav_index.codes.tolist(), nav_index.names, amcs)]
+        entries += [("scheme", f["scheme_code"], f["name"])
+                    for f in registry.view(instrument_type="mutual_fund") if f.get("scheme_code")]
+        entries += [("stock", s["symbol"], s["name"]) for s in registry.view(instrument_type="stock")]
+
+        nse_equity_file = nse_equity_file or os.getenv("CODENCASH_NSE_EQUITY_FILE")
+        if nse_equity_file:
+            equities = pd.read_csv(nse_equity_file, dtype=str, skipinitialspace=True)
+            equities.columns = equities.columns.str.strip()
+            entries += [("stock", symbol, name) for symbol, name
+                        in zip(equities["SYMBOL"], equities["NAME OF COMPANY"])]
+        return cls(entries)
+
+    @staticmethod
+    def _tokens(text):
+        return re.findall(r"[a-z0-9]+", text.lower().replace("&", " and "))
+
+    @staticmethod
+    def _trigrams(token):
+        padded = f" {token} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _expand(self, token, prefix):
+        """Name tokens matching one query token, as {token id: weight}"""
+        matches = {}
+        token_id = self._token_ids.get(token)
+        if token_id is not None:
+            matches[token_id] = 1.0
+
+        if prefix:
+            start = bisect.bisect_left(self.vocabulary, token)
+            end = bisect.bisect_left(self.vocabulary, token + "\uffff", start)
+            candidates = range(start, end)
+            if end - start > self.MAX_EXPANSIONS:
+                # Most common completions first ('g' -> 'growth', not 'gsec')
+                candidates = sorted(candidates, key=lambda i: -len(self._postings[i]))[:self.MAX_EXPANSIONS]
+            for i in candidates:
+                matches.setdefault(i, self.PREFIX_WEIGHT)
+
+        if token_id is None and len(token) >= 3:
+            grams = [self._trigram_postings[g] for g in self._trigrams(token) if g in self._trigram_postings]
+            if grams:
+                shared = np.bincount(np.concatenate(grams), minlength=len(self.vocabulary))
+                similarity = 2 * shared / (self._trigram_counts + len(self._trigrams(token)))
+                close = np.flatnonzero(similarity >= self.MIN_SIMILARITY)
+                close = close[np.argsort(-similarity[close])][:self.MAX_EXPANSIONS]
+                for i in close.tolist():
+                    matches.setdefault(i, self.FUZZY_WEIGHT * float(similarity[i]))
+        return matches
+
+    def search(self, query, limit=10, kind=None):
+        """
+        Rank names against free text
+        Args:
+            query: Free text, e.g. 'parag parikh flexi direct growth'
+            limit: Maximum results
+            kind: Only 'scheme' or only 'stock' results
+        Returns:
+            List of dicts with kind, key (scheme code or symbol), name and score,
+            best first
+        """
+        tokens = self._tokens(query)
+        if not tokens or not self.names or limit <= 0:
+            return []
+
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        for position, token in enumerate(tokens):
+            # Every token may be abbreviated; the last one may be half typed
+            matches = self._expand(token, prefix=position == len(tokens) - 1 or len(token) >= 3)
+            # Expansions count no more than an exact match: compounds such as
+            # 'axisbank' are rarer than 'axis' itself and would outrank it on idf
+            exact = self._token_ids.get(token)
+            cap = self._idf[exact] if exact is not None else np.inf
+            token_scores = np.zeros(len(self.names), dtype=np.float32)
+            for token_id, weight in matches.items():
+                # Each document keeps its best match for this token
+                np.maximum.at(token_scores, self._postings[token_id], weight * min(self._idf[token_id], cap))
+            scores += token_scores
+
+        scores -= self._length_penalty
+        if kind is not None:
+            scores[self._kind_array != kind] = -np.inf
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        return [
+            {"kind": self.kinds[i], "key": self.keys[i], "name": self.names[i], "score": round(float(scores[i]), 3)}
+            for i in candidates.tolist()
+        ]
@@ -0,0 +1,64 @@
+"""
+Order Sizing
+Turns rupee budgets per stock into whole-share (lot-size aware) buy orders
+"""
+
+import numpy as np
+
+
+class OrderSizer:
+    """Convert per-stock budgets into integer quantities for many users at once"""
+
+    def size_orders(self, budgets, prices, lot_sizes=None):
+        """
+        Integer share counts that track the budgets with minimal leftover cash
+        Args:
+            budgets: Array (n_stocks,) or (n_users, n_stocks) of rupee targets
+            prices: Array (n_stocks,) or (n_users, n_stocks) of live prices
+                (NaN or <= 0 means the stock cannot be bought)
+            lot_sizes: Optional array (n_stocks,) of minimum lot sizes (default 1)
+        Returns:
+            Dict with shares, invested amount, leftover cash and tracking error
+        """
+        budgets = np.asarray(budgets, dtype=np.float64)
+        single = budgets.ndim == 1
+        budgets = np.atleast_2d(budgets)
+        prices = np.broadcast_to(np.asarray(prices, dtype=np.float64), budgets.shape)
+        lots = np.ones(budgets.shape[1]) if lot_sizes is None else np.asarray(lot_sizes, dtype=np.float64)
+
+        lot_cost = prices * lots
+        tradable = np.isfinite(lot_cost) & (lot_cost > 0)
+        lot_cost = np.where(tradable, lot_cost, np.inf)
+        targets = np.where(tradable, budgets, 0.0)
+
+        # Start from whole lots that fit inside each stock's budget
+        n_lots = np.floor(targets / lot_cost)
+        cash = budgets.sum(axis=1) - (n_lots * np.where(tradable, lot_cost, 0)).sum(axis=1)
+        rows = np.arange(len(budgets))
+
+        # Each remaining deficit is below one lot, so at most n_stocks extra lots
+        # are ever worth buying; add the one that cuts squared error most per round
+        for _ in range(budgets.shape[1]):
+            deficit = targets - n_lots * np.where(tradable, lot_cost, 0)
+            gain = np.where(lot_cost <= cash[:, None], lot_cost * (lot_cost - 2 * deficit), np.inf)
+            best = np.argmin(gain, axis=1)
+            improves = gain[rows, best] < 0
+            if not improves.any():
+                break
+            n_lots[rows[improves], best[improves]] += 1
+            cash[improves] -= lot_cost[rows[improves], best[improves]]
+
+        shares = (n_lots * lots).astype(np.int64)
+        invested = np.where(tradable, shares * prices, 0.0)
+        total = budgets.sum(axis=1, keepdims=True)
+        tracking_error = np.abs(invested - targets).sum(axis=1) / np.where(total[:, 0] > 0, total[:, 0], 1)
+
+        result = {
+            'shares': shares,
+            'invested': invested,
+            'leftover_cash': cash,
+            'tracking_error': tracking_error
+        }
+        if single:
+            result = {key: value[0] for key, value in result.items()}
+        return result
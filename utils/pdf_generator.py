@@ -54,25 +54,33 @@ def create_pie_chart(allocation_data):
     return buf
 
 
-def create_returns_chart(projected_returns, capital, monthly_sip):
+def create_returns_chart(projected_returns, capital, monthly_sip, projection_curve=None, max_years=10):
     """Create a line chart for projected returns"""
     fig, ax = plt.subplots(figsize=(8, 5), facecolor='#151B3D')
     
-    years = []
-    total_values = []
-    invested_amounts = []
-    
-    for period, values in sorted(projected_returns.items()):
-        year = int(period.split('_')[0])
-        years.append(f"{year}Y")
-        total_values.append(values['total_value'])
-        invested = capital + (monthly_sip * 12 * year)
-        invested_amounts.append(invested)
+    if projection_curve is not None:
+        # Smooth curve straight from the precomputed yearly projection
+        years = [f"{y}Y" for y in projection_curve['years'][:max_years + 1]]
+        total_values = projection_curve['total_value'][:max_years + 1]
+        invested_amounts = projection_curve['invested'][:max_years + 1]
+        marker_size = 4
+    else:
+        years = []
+        total_values = []
+        invested_amounts = []
+        marker_size = 10
+        
+        for period, values in sorted(projected_returns.items()):
+            year = int(period.split('_')[0])
+            years.append(f"{year}Y")
+            total_values.append(values['total_value'])
+            invested = capital + (monthly_sip * 12 * year)
+            invested_amounts.append(invested)
     
     ax.plot(years, invested_amounts, marker='o', linewidth=3, 
-            color='#FFB800', label='Invested Amount', linestyle='--', markersize=8)
+            color='#FFB800', label='Invested Amount', linestyle='--', markersize=marker_size - 2)
     ax.plot(years, total_values, marker='o', linewidth=3, 
-            color='#00D9A3', label='Expected Value', markersize=10)
+            color='#00D9A3', label='Expected Value', markersize=marker_size)
     
     ax.fill_between(range(len(years)), invested_amounts, total_values, 
                      alpha=0.2, color='#00D9A3')
@@ -283,7 +291,8 @@ def generate_portfolio_pdf(portfolio_data):
         returns_chart_buf = create_returns_chart(
             portfolio_data['projected_returns'],
             portfolio_data['total_investment'],
-            portfolio_data['monthly_sip']
+            portfolio_data['monthly_sip'],
+            portfolio_data.get('projection_curve')
         )
         returns_img = Image(returns_chart_buf, width=6*inch, height=3.5*inch)
         elements.append(Spacer(1, 0.2*inch))
@@ -344,7 +353,7 @@ def generate_portfolio_pdf(portfolio_data):
                 mf_data.append([
                     fund['name'][:30],
                     fund['category'],
-                    fund['returns_3y'],
+                    f"{fund['returns_3y']:.1f}%",
                     f"₹{sip_per_fund:,.0f}/mo"
                 ])
             
@@ -378,7 +387,7 @@ def generate_portfolio_pdf(portfolio_data):
                 debt_data.append([
                     debt['name'][:25],
                     debt['type'],
-                    debt.get('interest_rate', 'N/A'),
+                    f"{debt['interest_rate']:.1f}%" if 'interest_rate' in debt else 'N/A',
                     f"₹{allocation_per_debt:,.0f}"
                 ])
             
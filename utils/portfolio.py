@@ -1,14 +1,52 @@
+import numpy as np
 import pandas as pd
 from utils.market_data import IndianMarketData
+from utils.order_sizing import OrderSizer
+from utils.screener import Screener
+from utils.hrp import HRPAllocator
+from utils.portfolio_optimizer import PortfolioOptimizer
 
 class PortfolioGenerator:
     """Generate investment portfolio based on user preferences"""
     
-    def __init__(self):
+    # Expected annual return for each asset class bucket
+    EXPECTED_RETURNS = {
+        "equity": 0.16,
+        "mutual_funds": 0.13,
+        "debt": 0.07,
+        "liquid": 0.04
+    }
+    MAX_PROJECTION_YEARS = 40
+    
+    # Screener weights for picking recommendations (negative = lower is better)
+    STOCK_SCORE_WEIGHTS = {"market_cap": 1.0, "returns_3y": 0.5, "volatility": -0.5}
+    FUND_SCORE_WEIGHTS = {"returns_3y": 1.0, "expense_ratio": -0.5, "volatility": -0.5}
+    MAX_STOCKS_PER_SECTOR = 2
+    HRP_CANDIDATES = 15
+    
+    # Total weight range per asset class for frontier-based allocation
+    CLASS_BOUNDS = {
+        "equity": (0.10, 0.60),
+        "mutual_funds": (0.10, 0.50),
+        "debt": (0.10, 0.60),
+        "liquid": (0.05, 0.20)
+    }
+    MIN_HISTORY_DAYS = 120  # Daily returns an instrument needs to join the optimizer
+    FRONTIER_DEADLINE = 2  # Seconds an allocation waits for a frontier still being solved
+    
+    def __init__(self, optimizer=None, screener=None):
         self.market_data = IndianMarketData()
+        self.optimizer = optimizer  # Optional PortfolioOptimizer for frontier-based allocation
+        self.order_sizer = OrderSizer()
+        self.screener = screener or Screener(self.market_data.registry)
     
-    def generate_portfolio(self, capital, monthly_investment, risk_appetite, preferences):
-        """Generate diversified portfolio based on risk appetite"""
+    def generate_portfolio(self, capital, monthly_investment, risk_appetite, preferences, stock_returns=None):
+        """
+        Generate diversified portfolio based on risk appetite
+        Args:
+            stock_returns: Optional DataFrame of daily returns by NSE symbol; when
+                given, stocks are picked across correlation clusters with HRP weights
+        """
         
         # Asset allocation based on risk
         allocation = self.get_asset_allocation(risk_appetite)
@@ -23,7 +61,14 @@ class PortfolioGenerator:
         
         # Add stock recommendations if selected
         if preferences.get("stocks"):
-            stocks = self.market_data.get_top_stocks(5)
+            if stock_returns is not None:
+                stocks = self.select_diversified_stocks(5, stock_returns)
+            else:
+                stocks = self.screener.top(
+                    5, self.STOCK_SCORE_WEIGHTS,
+                    max_per_sector=self.MAX_STOCKS_PER_SECTOR,
+                    instrument_type="stock"
+                )
             stock_amount = capital * (allocation["equity"] / 100)
             portfolio["recommendations"]["stocks"] = {
                 "amount": stock_amount,
@@ -32,11 +77,14 @@ class PortfolioGenerator:
         
         # Add mutual fund recommendations if selected
         if preferences.get("mutual_funds"):
-            mf_equity = self.market_data.get_mutual_funds("equity")
+            mf_equity = self.screener.top(
+                3, self.FUND_SCORE_WEIGHTS,
+                instrument_type="mutual_fund", fund_type="equity"
+            )
             mf_amount = capital * (allocation["mutual_funds"] / 100)
             portfolio["recommendations"]["mutual_funds"] = {
                 "amount": mf_amount,
-                "list": mf_equity[:3]
+                "list": mf_equity
             }
         
         # Add debt recommendations if selected
@@ -49,12 +97,139 @@ class PortfolioGenerator:
             }
         
         # Calculate projected returns
+        portfolio["projection_curve"] = self.project_growth(capital, monthly_investment, allocation)
         portfolio["projected_returns"] = self.calculate_returns(
-            capital, monthly_investment, risk_appetite
+            capital, monthly_investment, risk_appetite, portfolio["projection_curve"]
         )
         
         return portfolio
     
+    def select_diversified_stocks(self, n, stock_returns):
+        """
+        Pick stocks from distinct correlation clusters with HRP weights
+        Args:
+            n: Number of stocks
+            stock_returns: DataFrame of daily returns by NSE symbol
+        Returns:
+            List of stock dicts with 'score' and 'weight'
+        """
+        candidates = self.screener.top(self.HRP_CANDIDATES, self.STOCK_SCORE_WEIGHTS, instrument_type="stock")
+        by_symbol = {stock["symbol"]: stock for stock in candidates}
+        columns = [symbol for symbol in by_symbol if symbol in stock_returns.columns]
+        if len(columns) < n:
+            # Not enough history to cluster; fall back to the sector-capped screen
+            return self.screener.top(n, self.STOCK_SCORE_WEIGHTS,
+                                     max_per_sector=self.MAX_STOCKS_PER_SECTOR, instrument_type="stock")
+        
+        # Linkage is cached per return snapshot, so repeat requests only re-allocate
+        hrp = HRPAllocator(stock_returns[columns])
+        scores = pd.Series({symbol: by_symbol[symbol]["score"] for symbol in columns})
+        weights = hrp.select(n, scores)
+        
+        return [
+            {**by_symbol[symbol], "weight": round(float(weight), 4)}
+            for symbol, weight in weights.items()
+        ]
+    
+    def size_stock_orders(self, stocks, amount, prices, lot_sizes=None):
+        """
+        Turn the stock budget (HRP weights, else an equal split) into whole-share buy orders
+        Args:
+            stocks: List of stock dicts (as in recommendations['stocks']['list'])
+            amount: Total rupee budget for these stocks
+            prices: Live price per stock (NaN if unavailable)
+            lot_sizes: Optional minimum lot size per stock
+        Returns:
+            Dict with per-stock orders, leftover cash and tracking error
+        """
+        if stocks and all("weight" in stock for stock in stocks):
+            weights = np.array([stock["weight"] for stock in stocks], dtype=np.float64)
+            budgets = amount * weights / weights.sum()
+        else:
+            budgets = np.full(len(stocks), amount / len(stocks)) if stocks else np.zeros(0)
+        sized = self.order_sizer.size_orders(budgets, prices, lot_sizes)
+        
+        orders = []
+        for stock, qty, price, value in zip(stocks, sized['shares'], prices, sized['invested']):
+            orders.append({
+                **stock,
+                "quantity": int(qty),
+                "price": float(price),
+                "order_value": round(float(value), 2)
+            })
+        
+        return {
+            "orders": orders,
+            "leftover_cash": round(float(sized['leftover_cash']), 2),
+            "tracking_error": float(sized['tracking_error'])
+        }
+    
+    def fit_optimizer(self, prices, asset_classes, covariance_store=None):
+        """
+        Allocate from the efficient frontier of historical returns from now on
+        Args:
+            prices: DataFrame of daily prices or NAVs, one column per instrument
+            asset_classes: Dict of instrument -> asset class bucket
+            covariance_store: Optional EWMACovarianceStore; it is caught up (and
+                saved) with the new returns and the frontier uses its moments
+        Returns:
+            PortfolioOptimizer, or None (static allocations are used) when a
+            bucket has no instrument with enough history
+        """
+        self.optimizer = None
+        returns = prices.sort_index().pct_change(fill_method=None).iloc[1:]
+        # Liquid funds are modelled as a riskless asset earning their expected return
+        self.use_risk_metrics(returns)
+        returns = returns.assign(liquid=(1 + self.EXPECTED_RETURNS["liquid"]) ** (1 / PortfolioOptimizer.TRADING_DAYS) - 1)
+        if covariance_store is not None:
+            covariance_store.catch_up(returns)
+            return self.use_covariance_store(covariance_store, asset_classes)
+        
+        returns = returns.loc[:, (returns.count() >= self.MIN_HISTORY_DAYS) & returns.columns.isin(list(asset_classes) + ["liquid"])]
+        classes = {**{c: asset_classes[c] for c in returns.columns if c != "liquid"}, "liquid": "liquid"}
+        if set(classes.values()) != set(self.CLASS_BOUNDS):
+            return None
+        
+        self.optimizer = PortfolioOptimizer(returns, classes, self.CLASS_BOUNDS)
+        self.optimizer.efficient_frontier(timeout=0)  # Start solving in the background now
+        return self.optimizer
+    
+    def use_risk_metrics(self, returns):
+        """
+        Rank recommendations with volatility measured from recent returns
+        Args:
+            returns: DataFrame of daily returns, one column per symbol or scheme code
+        Returns:
+            Screener now used for picks
+        """
+        returns = returns.loc[:, returns.count() >= self.MIN_HISTORY_DAYS]
+        volatility = returns.std() * np.sqrt(PortfolioOptimizer.TRADING_DAYS)
+        self.screener = Screener(self.screener.registry, metrics=volatility.to_frame("volatility"))
+        return self.screener
+    
+    def use_covariance_store(self, covariance_store, asset_classes):
+        """
+        Allocate from the efficient frontier of an EWMA covariance store from now on
+        Args:
+            covariance_store: EWMACovarianceStore over the universe (plus 'liquid')
+            asset_classes: Dict of instrument -> asset class bucket
+        Returns:
+            PortfolioOptimizer, or None (static allocations are used) when a
+            bucket has no instrument the store has seen enough returns for
+        """
+        self.optimizer = None
+        # Unobserved instruments still have zero mean and variance, so only
+        # those with enough history join the frontier
+        classes = {**asset_classes, "liquid": "liquid"}
+        instruments = [i for i in covariance_store.observed(self.MIN_HISTORY_DAYS) if i in classes]
+        if {classes[i] for i in instruments} != set(self.CLASS_BOUNDS):
+            return None
+        
+        self.optimizer = PortfolioOptimizer(asset_classes=classes, class_bounds=self.CLASS_BOUNDS,
+                                            covariance_store=covariance_store, instruments=instruments)
+        self.optimizer.efficient_frontier(timeout=0)  # Start solving in the background now
+        return self.optimizer
+    
     def get_asset_allocation(self, risk_appetite):
         """Get asset allocation percentages based on risk"""
         allocations = {
@@ -77,29 +252,68 @@ class PortfolioGenerator:
                 "liquid": 5
             }
         }
+        
+        if self.optimizer is not None:
+            # Frontier is cached per universe snapshot, so this is a lookup; if the
+            # solver failed or is still running the static allocation below is used
+            weights = self.optimizer.weights_for_risk(risk_appetite, timeout=self.FRONTIER_DEADLINE)
+            if weights is not None:
+                optimized = self.optimizer.class_allocation(weights)
+                return {bucket: optimized.get(bucket, 0) for bucket in allocations["Medium"]}
+        
         return allocations.get(risk_appetite, allocations["Medium"])
     
-    def calculate_returns(self, capital, monthly_investment, risk_appetite):
-        """Calculate projected returns over 1, 3, 5 years"""
-        # Expected annual returns based on risk
-        returns_rate = {
-            "Low": 0.08,    # 8% annual return
-            "Medium": 0.12, # 12% annual return
-            "High": 0.15    # 15% annual return
-        }
+    def project_growth(self, capital, monthly_investment, allocation, years=None):
+        """
+        Exact year-by-year projection of lump sum and monthly SIP per asset class
+        Args:
+            capital: Initial lump sum
+            monthly_investment: Monthly SIP amount
+            allocation: Dict of asset class -> percentage
+            years: Projection horizon (default MAX_PROJECTION_YEARS)
+        Returns:
+            Dict of arrays indexed by year (0 to years)
+        """
+        years = years or self.MAX_PROJECTION_YEARS
+        classes = list(allocation.keys())
+        weights = np.array([allocation[c] for c in classes], dtype=np.float64) / 100
+        annual = np.array([self.EXPECTED_RETURNS.get(c, 0.0) for c in classes], dtype=np.float64)
+        monthly_rate = (1 + annual) ** (1 / 12) - 1
+        
+        year_index = np.arange(years + 1)
+        growth = (1 + monthly_rate) ** (year_index[:, None] * 12)
         
-        rate = returns_rate.get(risk_appetite, 0.12)
+        # SIP is invested at the start of each month (annuity due), like SIPCalculator
+        sip_factor = np.where(
+            monthly_rate > 0,
+            (growth - 1) / np.where(monthly_rate > 0, monthly_rate, 1) * (1 + monthly_rate),
+            year_index[:, None] * 12
+        )
+        
+        by_class = capital * weights * growth + monthly_investment * weights * sip_factor
+        total_value = by_class.sum(axis=1)
+        invested = capital + monthly_investment * 12 * year_index
+        
+        return {
+            "years": year_index,
+            "total_value": total_value,
+            "invested": invested,
+            "gains": total_value - invested,
+            "by_asset_class": dict(zip(classes, by_class.T))
+        }
+    
+    def calculate_returns(self, capital, monthly_investment, risk_appetite, projection_curve=None):
+        """Calculate projected returns over 1, 3, 5 years"""
+        if projection_curve is None:
+            projection_curve = self.project_growth(
+                capital, monthly_investment, self.get_asset_allocation(risk_appetite)
+            )
         
         projections = {}
         for years in [1, 3, 5]:
-            # Calculate with compound interest and monthly SIP
-            future_value = capital * ((1 + rate) ** years)
-            sip_value = monthly_investment * 12 * years * (1 + rate/2)
-            total = future_value + sip_value
-            
             projections[f"{years}_year"] = {
-                "total_value": round(total, 2),
-                "gains": round(total - (capital + monthly_investment * 12 * years), 2)
+                "total_value": round(float(projection_curve["total_value"][years]), 2),
+                "gains": round(float(projection_curve["gains"][years]), 2)
             }
         
         return projections
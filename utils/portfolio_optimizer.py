@@ -0,0 +1,237 @@
+"""
+Mean-Variance Portfolio Optimizer
+Efficient frontier over the instrument universe with per-class bounds
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import minimize
+
+
+class PortfolioOptimizer:
+    """Solve the efficient frontier once per universe snapshot"""
+
+    TRADING_DAYS = 252
+    RISK_FREE_RATE = 0.065  # ~ 1 year T-bill yield
+
+    # Where each risk profile sits on the frontier (0 = min variance, 1 = max return)
+    RISK_POSITIONS = {
+        "Low": 0.15,
+        "Medium": 0.45,
+        "High": 0.80
+    }
+
+    # Frontiers already solved (None if the solver failed), keyed by universe snapshot + constraints
+    _frontiers = OrderedDict()
+    _frontiers_lock = threading.Lock()
+    _solving = {}  # Snapshot -> Future of a solve in progress
+    _solver = None  # Background thread solving frontiers one at a time
+    CACHE_SIZE = 32
+    FEASIBILITY_TOL = 1e-6  # Largest constraint violation accepted from the solver
+
+    def __init__(self, returns=None, asset_classes=None, class_bounds=None, n_points=50,
+                 covariance_store=None, instruments=None):
+        """
+        Args:
+            returns: DataFrame of periodic (daily) returns, one column per instrument
+            asset_classes: Dict of instrument -> asset class bucket (default 'equity')
+            class_bounds: Dict of asset class -> (min, max) total weight
+            n_points: Number of frontier portfolios to solve
+            covariance_store: Optional EWMACovarianceStore used instead of
+                recomputing moments from the full return history
+            instruments: Subset of the store's instruments to optimise over
+                (default every instrument it has observed)
+        """
+        self.covariance_store = covariance_store
+        if covariance_store is not None:
+            self.returns = None
+            self.instruments = list(instruments or covariance_store.observed())
+        else:
+            self.returns = returns.dropna(how='all').fillna(0.0)
+            self.instruments = list(self.returns.columns)
+        self.asset_classes = asset_classes or {}
+        self.class_bounds = class_bounds or {}
+        self.n_points = n_points
+
+        self.classes = [self.asset_classes.get(i, 'equity') for i in self.instruments]
+
+        # Annualised moments are computed once per optimizer; the store's key and
+        # moments come from one snapshot so the frontier cache key matches them
+        self._state_key = None
+        if covariance_store is not None:
+            self._state_key, self.mean, self.cov = covariance_store.snapshot(instruments=self.instruments)
+        else:
+            self.mean = self.returns.mean().to_numpy() * self.TRADING_DAYS
+            self.cov = self.returns.cov().to_numpy() * self.TRADING_DAYS
+        self.snapshot = self._snapshot_key()
+
+    @classmethod
+    def from_prices(cls, prices, **kwargs):
+        """Build an optimizer from a price (or NAV) history DataFrame"""
+        return cls(prices.sort_index().pct_change(fill_method=None).iloc[1:], **kwargs)
+
+    def _snapshot_key(self):
+        """Hash of the return data and constraints identifying this universe"""
+        if self.covariance_store is not None:
+            digest = hashlib.sha1(self._state_key.encode())
+        else:
+            digest = hashlib.sha1(np.ascontiguousarray(self.returns.to_numpy()).tobytes())
+        digest.update(repr((self.instruments, self.classes,
+                            sorted(self.class_bounds.items()), self.n_points)).encode())
+        return digest.hexdigest()
+
+    def efficient_frontier(self, timeout=None):
+        """
+        Solve (or fetch from cache) the efficient frontier
+        Args:
+            timeout: Seconds to wait for the solve (None waits until it is done);
+                a solve still running afterwards finishes in the background and
+                is cached for later calls
+        Returns:
+            Dict with frontier weights, returns, volatilities, Sharpe ratios
+            and the min-variance / max-Sharpe portfolios, or None if the
+            constraints could not be met or the solve is still running
+        """
+        with self._frontiers_lock:
+            if self.snapshot in self._frontiers:
+                self._frontiers.move_to_end(self.snapshot)
+                return self._frontiers[self.snapshot]
+            future = self._solving.get(self.snapshot)
+            if future is None:
+                if PortfolioOptimizer._solver is None:
+                    PortfolioOptimizer._solver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="frontier")
+                future = self._solving[self.snapshot] = self._solver.submit(self._solve_and_cache)
+
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            return None
+
+    def _solve_and_cache(self):
+        try:
+            frontier = self._solve_frontier()
+        except BaseException:
+            with self._frontiers_lock:
+                self._solving.pop(self.snapshot, None)
+            raise
+        # Cached and no longer in progress in one step, so no caller starts a second solve
+        with self._frontiers_lock:
+            self._solving.pop(self.snapshot, None)
+            self._frontiers[self.snapshot] = frontier
+            if len(self._frontiers) > self.CACHE_SIZE:
+                self._frontiers.popitem(last=False)
+        return frontier
+
+    def _solve_frontier(self):
+        """Min-variance, max-Sharpe and target-return portfolios"""
+        n = len(self.instruments)
+        bounds = [(0.0, 1.0)] * n
+        base_constraints = [{'type': 'eq', 'fun': lambda w: w.sum() - 1.0}] + self._class_constraints()
+        start = np.full(n, 1.0 / n)
+
+        def variance(w):
+            return w @ self.cov @ w
+
+        def variance_grad(w):
+            return 2 * self.cov @ w
+
+        min_var = self._solve(variance, variance_grad, start, bounds, base_constraints)
+
+        def neg_return(w):
+            return -w @ self.mean
+
+        max_ret = self._solve(neg_return, lambda w: -self.mean, start, bounds, base_constraints)
+        if min_var is None or max_ret is None:
+            return None
+
+        def neg_sharpe(w):
+            vol = np.sqrt(max(variance(w), 1e-12))
+            return -(w @ self.mean - self.RISK_FREE_RATE) / vol
+
+        max_sharpe = self._solve(neg_sharpe, None, min_var, bounds, base_constraints)
+        if max_sharpe is None:
+            max_sharpe = min_var
+
+        # Trace the frontier between the two extremes, warm-starting each solve;
+        # points the solver cannot reach are left out
+        targets = np.linspace(min_var @ self.mean, max_ret @ self.mean, self.n_points)
+        points = []
+        previous = min_var
+        for target in targets:
+            constraints = base_constraints + [{'type': 'eq', 'fun': lambda w, t=target: w @ self.mean - t}]
+            solved = self._solve(variance, variance_grad, previous, bounds, constraints)
+            if solved is not None:
+                points.append(solved)
+                previous = solved
+        if not points:
+            return None
+        weights = np.array(points)
+
+        rets = weights @ self.mean
+        vols = np.sqrt(np.maximum(np.einsum('ij,jk,ik->i', weights, self.cov, weights), 0))
+
+        return {
+            'instruments': self.instruments,
+            'weights': weights,
+            'returns': rets,
+            'volatility': vols,
+            'sharpe': (rets - self.RISK_FREE_RATE) / np.where(vols > 0, vols, np.nan),
+            'min_variance': min_var,
+            'max_sharpe': max_sharpe
+        }
+
+    def _class_constraints(self):
+        """Linear inequality constraints keeping each class within its bounds"""
+        constraints = []
+        classes = np.array(self.classes)
+        for cls_name, (lo, hi) in self.class_bounds.items():
+            mask = (classes == cls_name).astype(np.float64)
+            constraints.append({'type': 'ineq', 'fun': lambda w, m=mask, lo=lo: m @ w - lo})
+            constraints.append({'type': 'ineq', 'fun': lambda w, m=mask, hi=hi: hi - m @ w})
+        return constraints
+
+    @classmethod
+    def _solve(cls, objective, jac, start, bounds, constraints):
+        """Run SLSQP; long-only weights, or None if it failed or broke a constraint"""
+        result = minimize(objective, start, jac=jac, method='SLSQP', bounds=bounds,
+                          constraints=constraints, options={'maxiter': 200, 'ftol': 1e-10})
+        if not result.success:
+            return None
+        # Only round-off below zero is clipped; the result is checked rather than renormalised
+        w = np.clip(result.x, 0, None)
+        for constraint in constraints:
+            value = constraint['fun'](w)
+            violation = abs(value) if constraint['type'] == 'eq' else -value
+            if violation > cls.FEASIBILITY_TOL:
+                return None
+        return w
+
+    def weights_for_risk(self, risk_level, timeout=None):
+        """
+        Look up frontier weights for a risk profile without solving
+        Args:
+            risk_level: 'Low' / 'Medium' / 'High', or a position in [0, 1]
+            timeout: Seconds to wait for a frontier still being solved
+        Returns:
+            Series of instrument weights, or None if no frontier could be solved
+            (or it is not ready within timeout)
+        """
+        frontier = self.efficient_frontier(timeout)
+        if frontier is None or not len(frontier['weights']):
+            return None
+        if isinstance(risk_level, str):
+            position = self.RISK_POSITIONS.get(risk_level, self.RISK_POSITIONS["Medium"])
+        else:
+            position = float(np.clip(risk_level, 0, 1))
+        idx = int(round(position * (len(frontier['weights']) - 1)))
+        return pd.Series(frontier['weights'][idx], index=self.instruments)
+
+    def class_allocation(self, weights):
+        """Aggregate instrument weights into asset class percentages"""
+        totals = pd.Series(np.asarray(weights), index=self.classes).groupby(level=0).sum() * 100
+        return {cls_name: round(float(pct), 1) for cls_name, pct in totals.items()}
@@ -0,0 +1,104 @@
+"""
+Outbound Rate Limiter
+Process-wide token buckets per upstream host, so bursts stay under provider limits
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` per second up to `burst` tokens"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n=1):
+        """
+        Take n tokens, borrowing against future refills if the bucket runs dry
+        Returns:
+            Seconds the caller must wait before sending
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= n
+            return max(0.0, -self._tokens / self.rate)
+
+
+class RateLimiter:
+    """Per-host token buckets shared by every data source in the process"""
+
+    # Requests per second and burst size; other hosts are not limited
+    HOST_RATES = {
+        "finance.yahoo.com": (10, 50),
+        "api.mfapi.in": (10, 20)
+    }
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, host_rates=None):
+        """
+        Args:
+            host_rates: Dict of host -> (rate per second, burst); a host also
+                matches its subdomains (default HOST_RATES)
+        """
+        self.host_rates = dict(self.HOST_RATES if host_rates is None else host_rates)
+        self._buckets = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Process-wide limiter, created on first use"""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def _limited_host(self, host):
+        for limited in self.host_rates:
+            if host == limited or host.endswith("." + limited):
+                return limited
+        return None
+
+    def acquire(self, host, n=1):
+        """
+        Block until n requests to host may be sent
+        Args:
+            host: Host name (e.g. 'query1.finance.yahoo.com')
+            n: Number of requests about to be sent
+        Returns:
+            Seconds spent waiting
+        """
+        limited = self._limited_host(host)
+        if limited is None:
+            return 0.0
+
+        with self._lock:
+            bucket = self._buckets.get(limited)
+            if bucket is None:
+                bucket = self._buckets[limited] = TokenBucket(*self.host_rates[limited])
+            counts = self._counts.setdefault(limited, {"requests": 0, "throttled": 0, "wait_seconds": 0.0})
+        wait = bucket.reserve(n)
+
+        with self._lock:
+            counts["requests"] += n
+            if wait > 0:
+                counts["throttled"] += 1
+                counts["wait_seconds"] += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def stats(self):
+        """Requests, throttled acquisitions and total wait per limited host"""
+        with self._lock:
+            return {host: dict(counts) for host, counts in self._counts.items()}
@@ -0,0 +1,140 @@
+"""
+Batch Rebalancing Engine
+Drift-based trade lists for many portfolios at once
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.portfolio import PortfolioGenerator
+
+
+class RebalancingEngine:
+    """Compute rebalancing trades for a whole book of portfolios"""
+
+    def __init__(self, asset_classes=None, band=5.0, relative_band=0.25, min_trade=500,
+                 portfolio_generator=None, covariance_store=None, instrument_classes=None):
+        """
+        Args:
+            asset_classes: Ordered asset class buckets (columns of the holdings matrix)
+            band: Absolute tolerance band in percentage points
+            relative_band: Tolerance as a fraction of the target weight
+                (the wider of the two bands applies)
+            min_trade: Trades smaller than this (₹) are skipped
+            portfolio_generator: Source of target allocations per risk level
+            covariance_store: Optional EWMACovarianceStore; targets then come from
+                the efficient frontier of its current state
+            instrument_classes: Dict of instrument -> asset class bucket for the
+                covariance store's instruments
+        """
+        self.portfolio_generator = portfolio_generator or PortfolioGenerator()
+        if covariance_store is not None:
+            self.portfolio_generator.use_covariance_store(covariance_store, instrument_classes or {})
+        self.asset_classes = asset_classes or list(self.portfolio_generator.get_asset_allocation("Medium"))
+        self.band = band / 100
+        self.relative_band = relative_band
+        self.min_trade = min_trade
+
+    def targets_from_risk(self, risk_levels):
+        """
+        Target weight matrix from each portfolio's risk level
+        Args:
+            risk_levels: Sequence of 'Low' / 'Medium' / 'High'
+        Returns:
+            Array (n_portfolios, n_classes) of weights summing to 1
+        """
+        levels, inverse = np.unique(np.asarray(risk_levels, dtype=object).astype(str), return_inverse=True)
+        table = np.array([
+            [self.portfolio_generator.get_asset_allocation(level).get(c, 0) for c in self.asset_classes]
+            for level in levels
+        ], dtype=np.float64)
+        table /= table.sum(axis=1, keepdims=True)
+        return table[inverse]
+
+    def rebalance(self, holdings, targets, cash_flows=None):
+        """
+        Compute trades for every portfolio
+        Args:
+            holdings: Array (n_portfolios, n_classes) of current market value (₹)
+            targets: Array (n_portfolios, n_classes) of target weights
+            cash_flows: Optional array (n_portfolios,) of new money, e.g. this month's SIP
+        Returns:
+            Dict with trades matrix (+buy / -sell), rebalance flags, drift and
+            the cash left uninvested because its trades were below min_trade
+        """
+        holdings = np.asarray(holdings, dtype=np.float64)
+        targets = np.asarray(targets, dtype=np.float64)
+        cash = np.zeros(len(holdings)) if cash_flows is None else np.asarray(cash_flows, dtype=np.float64)
+
+        current_total = holdings.sum(axis=1)
+        new_total = current_total + cash
+
+        weights = np.divide(holdings, current_total[:, None],
+                            out=np.zeros_like(holdings), where=current_total[:, None] > 0)
+        drift = weights - targets
+        threshold = np.maximum(self.band, self.relative_band * targets)
+        breached = (np.abs(drift) > threshold).any(axis=1)
+
+        # Breached portfolios go fully back to target
+        full_trades = targets * new_total[:, None] - holdings
+
+        # Others only invest new cash, filling underweight buckets first
+        shortfall = np.maximum(targets * new_total[:, None] - holdings, 0)
+        shortfall_total = shortfall.sum(axis=1, keepdims=True)
+        cash_only = np.where(shortfall_total > 0,
+                             shortfall / np.where(shortfall_total > 0, shortfall_total, 1),
+                             targets) * cash[:, None]
+
+        trades = np.where(breached[:, None], full_trades, cash_only)
+
+        # Drop small trades, then fund buys only from new cash plus the sells that
+        # survived: if dropped sells leave them short, every buy is scaled down and
+        # any cut below min_trade is dropped too
+        trades[np.abs(trades) < self.min_trade] = 0.0
+        available = np.maximum(cash - np.minimum(trades, 0).sum(axis=1), 0)
+        spend = np.maximum(trades, 0).sum(axis=1)
+        scale = np.divide(available, spend, out=np.ones_like(spend), where=spend > available)
+        trades = np.where(trades > 0, trades * scale[:, None], trades)
+        trades[(trades > 0) & (trades < self.min_trade)] = 0.0
+
+        # Leftover cash tops up the most underweight bucket, unless that would
+        # recreate a trade below min_trade (it then stays as cash)
+        residual = np.maximum(cash - trades.sum(axis=1), 0)
+        gap = targets * new_total[:, None] - (holdings + trades)
+        rows = np.arange(len(trades))
+        sink = np.argmax(gap, axis=1)
+        current = trades[rows, sink]
+        routed = current + residual
+        trades[rows, sink] = np.where(np.abs(routed) < self.min_trade, current, routed)
+        uninvested = cash - trades.sum(axis=1)
+
+        return {
+            'asset_classes': self.asset_classes,
+            'trades': trades,
+            'needs_rebalance': breached,
+            'drift': drift,
+            'uninvested_cash': uninvested,
+            'post_trade_weights': np.divide(holdings + trades, new_total[:, None],
+                                            out=np.zeros_like(holdings), where=new_total[:, None] > 0)
+        }
+
+    def trade_list(self, result, portfolio_ids=None):
+        """
+        Flatten a trades matrix into buy/sell orders
+        Args:
+            result: Output of rebalance()
+            portfolio_ids: Optional identifiers for the portfolios
+        Returns:
+            DataFrame with portfolio, asset_class, action and amount
+        """
+        trades = result['trades']
+        rows, cols = np.nonzero(np.abs(trades) >= 0.01)
+        ids = np.asarray(portfolio_ids) if portfolio_ids is not None else np.arange(len(trades))
+        amounts = trades[rows, cols]
+
+        return pd.DataFrame({
+            'portfolio': ids[rows],
+            'asset_class': np.asarray(result['asset_classes'])[cols],
+            'action': np.where(amounts > 0, 'BUY', 'SELL'),
+            'amount': np.round(np.abs(amounts), 2)
+        })
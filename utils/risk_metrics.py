@@ -0,0 +1,168 @@
+"""
+Portfolio Risk Analytics
+VaR, CVaR, drawdown, volatility, Sharpe/Sortino and beta for many portfolios at once
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+
+class RiskAnalytics:
+    """Vectorized risk metrics over holdings and over portfolios"""
+
+    TRADING_DAYS = 252
+    RISK_FREE_RATE = 0.065
+
+    def __init__(self, returns, benchmark=None, covariance_store=None):
+        """
+        Args:
+            returns: DataFrame of daily returns, one column per instrument
+            benchmark: Optional Series of daily benchmark (^NSEI) returns
+            covariance_store: Optional EWMACovarianceStore for parametric VaR
+        """
+        self.returns = returns.sort_index().fillna(0.0)
+        self.instruments = list(self.returns.columns)
+        self.benchmark = benchmark.reindex(self.returns.index).fillna(0.0) if benchmark is not None else None
+        self.covariance_store = covariance_store
+
+    def portfolio_returns(self, weights):
+        """
+        Daily returns of one or many portfolios
+        Args:
+            weights: Array (n_instruments,) or (n_portfolios, n_instruments),
+                or Series / DataFrame labelled by instrument
+        Returns:
+            Array of shape (days, n_portfolios)
+        """
+        return self.returns.to_numpy() @ self._weight_matrix(weights).T
+
+    def _weight_matrix(self, weights):
+        """Normalise any weights input to (n_portfolios, n_instruments)"""
+        if isinstance(weights, pd.Series):
+            weights = weights.reindex(self.instruments).fillna(0.0).to_numpy()
+        elif isinstance(weights, pd.DataFrame):
+            weights = weights.reindex(columns=self.instruments).fillna(0.0).to_numpy()
+        return np.atleast_2d(np.asarray(weights, dtype=np.float64))
+
+    def analyze(self, weights, confidence=0.95, window=63, labels=None):
+        """
+        Full risk report for one or many portfolios
+        Args:
+            weights: Portfolio weights (see portfolio_returns)
+            confidence: VaR / CVaR confidence level
+            window: Rolling window (trading days) for volatility and beta
+            labels: Optional names for the portfolios
+        Returns:
+            DataFrame with one row per portfolio
+        """
+        w = self._weight_matrix(weights)
+        port = self.returns.to_numpy() @ w.T
+
+        hist_var, hist_cvar = self.historical_var(port, confidence)
+        param_var, param_cvar = self.parametric_var(w, port, confidence)
+        rolling_vol = self.rolling_volatility(port, window)
+
+        report = pd.DataFrame({
+            'annual_return': port.mean(axis=0) * self.TRADING_DAYS,
+            'annual_volatility': port.std(axis=0, ddof=1) * np.sqrt(self.TRADING_DAYS),
+            'historical_var': hist_var,
+            'historical_cvar': hist_cvar,
+            'parametric_var': param_var,
+            'parametric_cvar': param_cvar,
+            'max_drawdown': self.max_drawdown(port),
+            'sharpe': self.sharpe(port),
+            'sortino': self.sortino(port),
+            'current_volatility': rolling_vol[-1] if len(rolling_vol) else np.full(port.shape[1], np.nan)
+        }, index=labels)
+
+        if self.benchmark is not None:
+            report['beta'] = self.beta(port)
+            rolling = self.rolling_beta(port, window)
+            report['current_beta'] = rolling[-1] if len(rolling) else np.nan
+
+        return report
+
+    @staticmethod
+    def historical_var(port, confidence=0.95):
+        """One-day historical VaR and CVaR as positive loss fractions"""
+        cutoff = np.quantile(port, 1 - confidence, axis=0)
+        tail = np.where(port <= cutoff, port, np.nan)
+        return -cutoff, -np.nanmean(tail, axis=0)
+
+    def parametric_var(self, w, port, confidence=0.95):
+        """
+        One-day Gaussian VaR and CVaR, using the EWMA covariance when the store
+        has observed every instrument (an unobserved one would look riskless)
+        """
+        store = self.covariance_store
+        if store is not None and set(self.instruments) <= set(store.observed()):
+            _, mu, cov = store.snapshot(annualize=False, instruments=self.instruments)
+            sigma = np.sqrt(np.maximum(np.einsum('pi,ij,pj->p', w, cov, w), 0))
+            mean = w @ mu
+        else:
+            sigma = port.std(axis=0, ddof=1)
+            mean = port.mean(axis=0)
+
+        z = norm.ppf(confidence)
+        var = z * sigma - mean
+        cvar = sigma * norm.pdf(z) / (1 - confidence) - mean
+        return var, cvar
+
+    @staticmethod
+    def max_drawdown(port):
+        """Worst peak-to-trough fall of cumulative wealth (negative fraction)"""
+        wealth = np.cumprod(1 + port, axis=0)
+        peaks = np.maximum.accumulate(wealth, axis=0)
+        return (wealth / peaks - 1).min(axis=0)
+
+    def rolling_volatility(self, port, window=63):
+        """Annualised rolling volatility, shape (days - window + 1, n_portfolios)"""
+        if len(port) < window:
+            return np.empty((0, port.shape[1]))
+        csum = np.cumsum(np.vstack([np.zeros(port.shape[1]), port]), axis=0)
+        csq = np.cumsum(np.vstack([np.zeros(port.shape[1]), port ** 2]), axis=0)
+        s1 = csum[window:] - csum[:-window]
+        s2 = csq[window:] - csq[:-window]
+        var = (s2 - s1 ** 2 / window) / (window - 1)
+        return np.sqrt(np.maximum(var, 0) * self.TRADING_DAYS)
+
+    def sharpe(self, port):
+        """Annualised Sharpe ratio"""
+        excess = port.mean(axis=0) * self.TRADING_DAYS - self.RISK_FREE_RATE
+        vol = port.std(axis=0, ddof=1) * np.sqrt(self.TRADING_DAYS)
+        return np.divide(excess, vol, out=np.full_like(excess, np.nan), where=vol > 0)
+
+    def sortino(self, port):
+        """Annualised Sortino ratio against the daily risk-free rate"""
+        daily_rf = self.RISK_FREE_RATE / self.TRADING_DAYS
+        downside = np.minimum(port - daily_rf, 0)
+        downside_dev = np.sqrt((downside ** 2).mean(axis=0) * self.TRADING_DAYS)
+        excess = port.mean(axis=0) * self.TRADING_DAYS - self.RISK_FREE_RATE
+        return np.divide(excess, downside_dev, out=np.full_like(excess, np.nan), where=downside_dev > 0)
+
+    def beta(self, port):
+        """Full-period beta of each portfolio against the benchmark"""
+        b = self.benchmark.to_numpy()
+        b_dev = b - b.mean()
+        cov = (port - port.mean(axis=0)).T @ b_dev / (len(b) - 1)
+        return cov / b.var(ddof=1)
+
+    def rolling_beta(self, port, window=63):
+        """Rolling beta against the benchmark, shape (days - window + 1, n_portfolios)"""
+        if self.benchmark is None or len(port) < window:
+            return np.empty((0, port.shape[1]))
+        b = self.benchmark.to_numpy()[:, None]
+
+        def windowed(x):
+            c = np.cumsum(np.vstack([np.zeros((1, x.shape[1])), x]), axis=0)
+            return c[window:] - c[:-window]
+
+        sum_p = windowed(port)
+        sum_b = windowed(b)
+        sum_pb = windowed(port * b)
+        sum_bb = windowed(b * b)
+
+        cov = sum_pb - sum_p * sum_b / window
+        var = sum_bb - sum_b ** 2 / window
+        return np.divide(cov, var, out=np.full_like(cov, np.nan), where=var > 0)
@@ -0,0 +1,176 @@
+"""
+Instrument Screener
+Columnar filters and rankings over the full stock and fund universe
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.instrument_registry import InstrumentRegistry
+
+
+class Screener:
+    """Filter and rank instruments using precomputed sort indexes"""
+
+    NUMERIC_FIELDS = ("returns_1y", "returns_3y", "volatility", "market_cap", "expense_ratio")
+    CATEGORICAL_FIELDS = ("instrument_type", "sector", "category", "fund_type")
+
+    def __init__(self, registry=None, metrics=None):
+        """
+        Args:
+            registry: InstrumentRegistry supplying the universe (default process-wide one)
+            metrics: Optional DataFrame of extra or fresher numeric fields (e.g.
+                volatility from RiskAnalytics), indexed by symbol or scheme code
+        """
+        self.registry = registry or InstrumentRegistry.default()
+        frame = self.registry.frame.reset_index(drop=True).copy()
+
+        if metrics is not None:
+            keys = frame["symbol"].where(frame["symbol"] != "", frame["scheme_code"])
+            metrics = metrics.copy()
+            metrics.index = metrics.index.astype(str)
+            for field in metrics.columns:
+                fresh = metrics[field].reindex(keys).to_numpy(dtype=np.float64)
+                current = frame[field].to_numpy(dtype=np.float64) if field in frame.columns else np.nan
+                frame[field] = np.where(np.isnan(fresh), current, fresh)
+        self.frame = frame
+
+        n = len(frame)
+        self._values = {
+            field: frame[field].to_numpy(dtype=np.float64) if field in frame.columns else np.full(n, np.nan)
+            for field in self.NUMERIC_FIELDS
+        }
+
+        # Descending order with NaN last; the negated sorted values are ascending,
+        # so range filters become a binary search plus a prefix of the order
+        self._order = {}
+        self._neg_sorted = {}
+        self._valid = {}
+        for field, values in self._values.items():
+            order = np.argsort(-values, kind="stable")
+            self._order[field] = order
+            self._neg_sorted[field] = -values[order]
+            self._valid[field] = int(np.count_nonzero(~np.isnan(values)))
+
+        self._codes = {
+            field: pd.factorize(frame[field])
+            for field in self.CATEGORICAL_FIELDS if field in frame.columns
+        }
+
+        # Standardised fields for scoring, within each instrument type so stocks
+        # are ranked against stocks and funds against funds; missing values score as average
+        groups = self._codes["instrument_type"][0] if "instrument_type" in self._codes else np.zeros(n, dtype=np.intp)
+        self._zscores = np.zeros((n, len(self.NUMERIC_FIELDS)))
+        for group in np.unique(groups):
+            rows = np.flatnonzero(groups == group)
+            for column, field in enumerate(self.NUMERIC_FIELDS):
+                values = self._values[field][rows]
+                std = np.nanstd(values) if np.count_nonzero(~np.isnan(values)) > 1 else 0.0
+                if std > 0:
+                    self._zscores[rows, column] = np.nan_to_num((values - np.nanmean(values)) / std, nan=0.0)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def mask(self, min_values=None, max_values=None, **filters):
+        """
+        Boolean mask of instruments passing every condition
+        Args:
+            min_values: Dict of numeric field -> inclusive lower bound
+            max_values: Dict of numeric field -> inclusive upper bound
+            filters: Categorical field=value pairs; a list matches any of its values
+        Returns:
+            NumPy bool array over the universe
+        """
+        mask = np.ones(len(self.frame), dtype=bool)
+
+        for field, value in filters.items():
+            if field not in self._codes:
+                raise ValueError(f"'{field}' is not a categorical field")
+            codes, uniques = self._codes[field]
+            wanted = [value] if isinstance(value, str) else list(value)
+            mask &= np.isin(codes, np.flatnonzero(np.isin(uniques, wanted)))
+
+        for field, bound in (min_values or {}).items():
+            k = np.searchsorted(self._sorted(field), -bound, side="right")
+            mask &= self._prefix_mask(field, 0, k)
+
+        for field, bound in (max_values or {}).items():
+            k = np.searchsorted(self._sorted(field), -bound, side="left")
+            mask &= self._prefix_mask(field, k, self._valid[field])
+
+        return mask
+
+    def _sorted(self, field):
+        if field not in self._neg_sorted:
+            raise ValueError(f"'{field}' is not a numeric field")
+        return self._neg_sorted[field]
+
+    def _prefix_mask(self, field, start, stop):
+        """Mask selecting positions start:stop of a field's sort order"""
+        selected = np.zeros(len(self.frame), dtype=bool)
+        selected[self._order[field][start:stop]] = True
+        return selected
+
+    def screen(self, sort_by="market_cap", ascending=False, limit=None,
+               min_values=None, max_values=None, **filters):
+        """
+        Filter and sort the universe
+        Args:
+            sort_by: Numeric field to order by (instruments missing it come last)
+            ascending: Sort direction
+            limit: Optional maximum number of rows
+            min_values / max_values / filters: See mask()
+        Returns:
+            DataFrame of matching instruments
+        """
+        mask = self.mask(min_values, max_values, **filters)
+        self._sorted(sort_by)
+        order = self._order[sort_by]
+        if ascending:
+            valid = self._valid[sort_by]
+            order = np.concatenate([order[:valid][::-1], order[valid:]])
+        return self.frame.iloc[order[mask[order]][:limit]]
+
+    def score(self, weights):
+        """
+        Composite score per instrument
+        Args:
+            weights: Dict of numeric field -> weight (negative when lower is better)
+        Returns:
+            NumPy array of weighted z-scores over the universe
+        """
+        vector = np.zeros(len(self.NUMERIC_FIELDS))
+        for field, weight in weights.items():
+            if field not in self._values:
+                raise ValueError(f"'{field}' is not a numeric field")
+            vector[self.NUMERIC_FIELDS.index(field)] = weight
+        return self._zscores @ vector
+
+    def top(self, n, weights, max_per_sector=None, min_values=None, max_values=None, **filters):
+        """
+        Best n instruments by score within the constraints
+        Args:
+            n: Number of instruments to pick
+            weights: Scoring weights (see score())
+            max_per_sector: Optional cap on picks from any one sector
+            min_values / max_values / filters: See mask()
+        Returns:
+            List of instrument dicts with an added 'score'
+        """
+        candidates = np.flatnonzero(self.mask(min_values, max_values, **filters))
+        scores = self.score(weights)
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        if max_per_sector is not None and "sector" in self._codes:
+            codes, uniques = self._codes["sector"]
+            sector = codes[ranked]
+            seen = pd.Series(sector).groupby(sector).cumcount().to_numpy()
+            unsectored = np.isin(sector, np.flatnonzero(uniques == ""))
+            ranked = ranked[(seen < max_per_sector) | unsectored]
+
+        picks = ranked[:n]
+        records = self.registry.records(picks)
+        for record, value in zip(records, scores[picks]):
+            record["score"] = round(float(value), 4)
+        return records
@@ -0,0 +1,457 @@
+"""
+Shared Market Data Cache
+Cross-process cache with TTLs, compact serialization and per-family metrics
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlparse
+
+import numpy as np
+import orjson
+import ormsgpack
+import pandas as pd
+
+
+class Serializer:
+    """msgpack or JSON encoding of cache values, including DataFrames"""
+
+    FORMATS = ("msgpack", "json")
+
+    def __init__(self, fmt="msgpack"):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown cache format '{fmt}'")
+        self.fmt = fmt
+
+    def dumps(self, value):
+        if self.fmt == "msgpack":
+            return ormsgpack.packb(value, default=self._default,
+                                   option=ormsgpack.OPT_SERIALIZE_NUMPY | ormsgpack.OPT_NON_STR_KEYS)
+        return orjson.dumps(value, default=self._default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, payload):
+        value = ormsgpack.unpackb(payload) if self.fmt == "msgpack" else orjson.loads(payload)
+        return self._restore(value)
+
+    @classmethod
+    def _restore(cls, value):
+        """Rebuild DataFrames at any depth, e.g. inside SharedCache's [value, stored_at, fresh_until] envelope"""
+        if isinstance(value, dict):
+            if "__frame__" in value:
+                return cls._frame(value["__frame__"])
+            return {k: cls._restore(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [cls._restore(v) for v in value]
+        return value
+
+    @staticmethod
+    def _default(obj):
+        if isinstance(obj, pd.DataFrame):
+            dated = isinstance(obj.index, pd.DatetimeIndex)
+            return {"__frame__": {
+                "index": obj.index.tz_localize(None).as_unit("ns").asi8 if dated else obj.index.tolist(),
+                "dated": dated,
+                "index_name": obj.index.name,
+                "columns": [str(c) for c in obj.columns],
+                "columns_name": obj.columns.name,
+                "data": np.ascontiguousarray(obj.to_numpy(dtype=np.float64))
+            }}
+        if isinstance(obj, pd.Timestamp):
+            return obj.isoformat()
+        raise TypeError(f"Cannot cache value of type {type(obj).__name__}")
+
+    @staticmethod
+    def _frame(spec):
+        if spec["dated"]:
+            index = pd.DatetimeIndex(np.asarray(spec["index"], dtype=np.int64).view("datetime64[ns]"))
+        else:
+            index = pd.Index(spec["index"])
+        index.name = spec["index_name"]
+        frame = pd.DataFrame(np.array(spec["data"], dtype=np.float64).reshape(len(index), len(spec["columns"])),
+                             index=index, columns=spec["columns"])
+        frame.columns.name = spec["columns_name"]
+        return frame
+
+
+class MemoryBackend:
+    """In-process backend (single replica, tests and benchmarks)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        now = time.time()
+        with self._lock:
+            entries = [self._data.get(k) for k in keys]
+        return [e[1] if e and e[0] > now else None for e in entries]
+
+    def set(self, key, payload, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, payload)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class FileBackend:
+    """One file per key under a shared directory, replaced atomically"""
+
+    HEADER = struct.Struct("<d")  # expiry timestamp
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key):
+        digest = hashlib.sha1(key.encode()).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def get_many(self, keys):
+        now = time.time()
+        values = []
+        for key in keys:
+            try:
+                blob = self._path(key).read_bytes()
+            except FileNotFoundError:
+                values.append(None)
+                continue
+            expires_at, = self.HEADER.unpack_from(blob)
+            values.append(blob[self.HEADER.size:] if expires_at > now else None)
+        return values
+
+    def set(self, key, payload, ttl):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self.HEADER.pack(time.time() + ttl))
+            f.write(payload)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+
+    def delete(self, key):
+        self._path(key).unlink(missing_ok=True)
+
+
+class SQLiteBackend:
+    """Single SQLite file shared by every process on the host"""
+
+    PURGE_EVERY = 1000  # Writes between sweeps of expired rows
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        with self._connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS cache ("
+                         "key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value BLOB NOT NULL"
+                         ") WITHOUT ROWID")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        if not keys:
+            return []
+        placeholders = ", ".join("?" * len(keys))
+        rows = self._connect().execute(
+            f"SELECT key, value FROM cache WHERE key IN ({placeholders}) AND expires_at > ?",
+            list(keys) + [time.time()]
+        ).fetchall()
+        found = dict(rows)
+        return [found.get(k) for k in keys]
+
+    def set(self, key, payload, ttl):
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", (key, time.time() + ttl, payload))
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+
+    def delete(self, key):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+
+class RedisBackend:
+    """Minimal RESP client for Redis or any Redis-protocol server"""
+
+    def __init__(self, host="localhost", port=6379, db=0, password=None, timeout=2.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.create_connection(self.address, timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = (sock, sock.makefile("rb"))
+            self._local.conn = conn
+            if self.password:
+                self._roundtrip(conn, "AUTH", self.password)
+            if self.db:
+                self._roundtrip(conn, "SELECT", str(self.db))
+        return conn
+
+    def _command(self, *args):
+        """Run one command, reconnecting once if the connection dropped"""
+        for attempt in range(2):
+            try:
+                return self._roundtrip(self._connect(), *args)
+            except (OSError, EOFError):
+                self._close()
+                if attempt:
+                    raise
+
+    def _roundtrip(self, conn, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        conn[0].sendall(b"".join(parts))
+        return self._read(conn[1])
+
+    def _read(self, reader):
+        line = reader.readline()
+        if not line:
+            raise EOFError("Connection closed by cache server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = reader.read(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read(reader) for _ in range(count)]
+        raise RuntimeError(f"Unexpected reply {line!r}")
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn:
+            try:
+                conn[0].close()
+            except OSError:
+                pass
+
+    def get_many(self, keys):
+        return self._command("MGET", *keys) if keys else []
+
+    def set(self, key, payload, ttl):
+        self._command("SET", key, payload, "PX", int(ttl * 1000))
+
+    def delete(self, key):
+        self._command("DEL", key)
+
+
+class CacheEntry(NamedTuple):
+    """A cached value with its write time and the end of its fresh period"""
+
+    value: object
+    stored_at: float
+    fresh_until: float
+
+    @property
+    def stale(self):
+        return time.time() >= self.fresh_until
+
+
+class SharedCache:
+    """Cache front end: key families, TTLs, serialization and hit/miss metrics"""
+
+    NAMESPACE = "codencash:v2"
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, backend=None, fmt="msgpack"):
+        """
+        Args:
+            backend: Memory/File/SQLite/Redis backend (default SQLite in the cache dir)
+            fmt: Serialization format, 'msgpack' or 'json'
+        """
+        self.backend = backend or SQLiteBackend(self._cache_dir() / "shared_cache.sqlite3")
+        self.serializer = Serializer(fmt)
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    @staticmethod
+    def _cache_dir():
+        return Path(os.getenv('CODENCASH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'codencash')))
+
+    @classmethod
+    def from_url(cls, url, fmt="msgpack"):
+        """
+        Build a cache from a URL
+        Args:
+            url: 'memory://', 'file:///dir', 'sqlite:///path.sqlite3' or
+                'redis://[:password@]host:port/db'
+        Returns:
+            SharedCache
+        """
+        parsed = urlparse(url)
+        if parsed.scheme == "memory":
+            backend = MemoryBackend()
+        elif parsed.scheme == "file":
+            backend = FileBackend(parsed.path or cls._cache_dir() / "shared_cache")
+        elif parsed.scheme == "sqlite":
+            backend = SQLiteBackend(parsed.path or cls._cache_dir() / "shared_cache.sqlite3")
+        elif parsed.scheme == "redis":
+            backend = RedisBackend(parsed.hostname or "localhost", parsed.port or 6379,
+                                   int(parsed.path.strip("/") or 0), parsed.password)
+        else:
+            raise ValueError(f"Unsupported cache URL '{url}'")
+        return cls(backend, fmt)
+
+    @classmethod
+    def default(cls):
+        """Process-wide cache from CODENCASH_CACHE_URL / CODENCASH_CACHE_FORMAT"""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    url = os.getenv("CODENCASH_CACHE_URL")
+                    fmt = os.getenv("CODENCASH_CACHE_FORMAT", "msgpack")
+                    cls._default = cls.from_url(url, fmt) if url else cls(fmt=fmt)
+        return cls._default
+
+    def _key(self, family, key):
+        return f"{self.NAMESPACE}:{self.serializer.fmt}:{family}:{key}"
+
+    def _count(self, family, **counts):
+        with self._metrics_lock:
+            stats = self._metrics.setdefault(family, {"hits": 0, "stale": 0, "misses": 0, "writes": 0, "errors": 0})
+            for name, n in counts.items():
+                stats[name] += n
+
+    def _load(self, family, keys):
+        """CacheEntry per key still retained by the backend, plus the error count"""
+        try:
+            payloads = self.backend.get_many([self._key(family, k) for k in keys])
+        except Exception:
+            return {}, 1
+
+        entries, errors = {}, 0
+        for key, payload in zip(keys, payloads):
+            if payload is None:
+                continue
+            try:
+                entries[key] = CacheEntry(*self.serializer.loads(payload))
+            except Exception:
+                errors += 1
+        return entries, errors
+
+    def get_many(self, family, keys):
+        """
+        Look up several keys of one family
+        Returns:
+            Dict of key -> value for the fresh hits (stale entries and backend
+            errors count as misses)
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        entries, errors = self._load(family, keys)
+        now = time.time()
+        found = {key: entry.value for key, entry in entries.items() if entry.fresh_until > now}
+        self._count(family, hits=len(found), misses=len(keys) - len(found), errors=errors)
+        return found
+
+    def get_entries(self, family, keys, track=True):
+        """
+        Look up several keys, including entries past their TTL but still
+        retained for stale_ttl (see set)
+        Args:
+            family: Key family
+            keys: Keys to look up
+            track: Count the lookup in stats() (off for background sweeps)
+        Returns:
+            Dict of key -> CacheEntry
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        entries, errors = self._load(family, keys)
+        if track:
+            stale = sum(entry.stale for entry in entries.values())
+            self._count(family, hits=len(entries) - stale, stale=stale,
+                        misses=len(keys) - len(entries), errors=errors)
+        return entries
+
+    def get(self, family, key, default=None):
+        return self.get_many(family, [key]).get(key, default)
+
+    def set(self, family, key, value, ttl, stale_ttl=0):
+        """
+        Store a value that is fresh for ttl seconds and kept as a last good
+        value for stale_ttl seconds after that; failures are counted, never raised
+        """
+        now = time.time()
+        try:
+            payload = self.serializer.dumps([value, now, now + ttl])
+            self.backend.set(self._key(family, key), payload, ttl + stale_ttl)
+            self._count(family, writes=1)
+        except Exception:
+            self._count(family, errors=1)
+
+    def set_many(self, family, values, ttl, stale_ttl=0):
+        for key, value in values.items():
+            self.set(family, key, value, ttl, stale_ttl)
+
+    def delete(self, family, key):
+        try:
+            self.backend.delete(self._key(family, key))
+        except Exception:
+            self._count(family, errors=1)
+
+    def get_or_set(self, family, key, ttl, compute):
+        """
+        Cached value, or compute() stored for ttl seconds
+        None results are returned but not stored, so failures are retried
+        """
+        found = self.get_many(family, [key])
+        if key in found:
+            return found[key]
+        value = compute()
+        if value is not None:
+            self.set(family, key, value, ttl)
+        return value
+
+    def stats(self):
+        """Hit/stale/miss/write/error counts and fresh hit rate per key family in this process"""
+        with self._metrics_lock:
+            rows = {family: dict(stats) for family, stats in self._metrics.items()}
+        for stats in rows.values():
+            lookups = stats["hits"] + stats["stale"] + stats["misses"]
+            stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return rows
@@ -0,0 +1,54 @@
+"""
+Single-Flight Request Coalescing
+Concurrent calls for the same key share one execution and its result
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; callers arriving meanwhile wait for it"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counts = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key, fn):
+        """
+        Run fn() for key, or wait for the run already in flight
+        Args:
+            key: Hashable identity of the request
+            fn: Zero-argument callable doing the work
+        Returns:
+            fn()'s result (its exception is raised in every waiting caller)
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+                self._counts["leaders"] += 1
+            else:
+                self._counts["coalesced"] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        """Calls that executed (leaders) and calls that joined one in flight (coalesced)"""
+        with self._lock:
+            return dict(self._counts, in_flight=len(self._calls))
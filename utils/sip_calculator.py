@@ -75,6 +75,19 @@ class SIPCalculator:
             'yearly_summary': self._create_yearly_summary(monthly_data)
         }
     
+    def yearly_contributions(self, monthly_investment, years, step_up_percent=0):
+        """
+        Annual SIP contributions with an optional yearly step-up
+        Args:
+            monthly_investment: Monthly SIP amount in year 1
+            years: Number of years
+            step_up_percent: Annual increase in SIP amount
+        Returns:
+            NumPy array of total contribution for each year
+        """
+        growth = (1 + step_up_percent / 100) ** np.arange(years)
+        return monthly_investment * self.months_in_year * growth
+    
     def _create_yearly_summary(self, monthly_data):
         """Create year-wise summary from monthly data"""
         yearly_summary = []
@@ -0,0 +1,143 @@
+"""
+Historical Stress Testing
+Replays past market crises against many portfolios in one matrix product
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class StressTester:
+    """Peak-to-trough loss and recovery time of portfolios through historical crises"""
+
+    # Observation windows start at the pre-crisis peak and run long enough to
+    # capture the recovery
+    SCENARIOS = {
+        "2008 Global Financial Crisis": ("2008-01-08", "2010-12-31"),
+        "2013 Taper Tantrum": ("2013-05-20", "2014-06-30"),
+        "2020 COVID Crash": ("2020-01-17", "2021-06-30"),
+        "2022 Rate Shock": ("2022-01-03", "2023-06-30")
+    }
+
+    def __init__(self, returns, scenarios=None):
+        """
+        Args:
+            returns: DataFrame of daily returns indexed by date, one column per
+                factor (asset class proxy or instrument); days without data for
+                a factor count as a flat (cash) day
+            scenarios: Dict of name -> (start, end) dates (default SCENARIOS)
+        """
+        returns = returns.sort_index()
+        returns.index = pd.to_datetime(returns.index)
+        self.factors = list(returns.columns)
+        scenarios = scenarios or self.SCENARIOS
+
+        windows = {name: returns.loc[start:end] for name, (start, end) in scenarios.items()}
+        self.scenarios = [name for name, window in windows.items() if len(window)]
+        self.dates = [windows[name].index for name in self.scenarios]
+        self.coverage = pd.Series(
+            [windows[name].notna().any(axis=1).mean() if name in self.scenarios else 0.0 for name in scenarios],
+            index=list(scenarios)
+        )
+
+        # Scenario tensor (scenarios, days, factors), zero-padded to the longest window
+        length = max((len(d) for d in self.dates), default=0)
+        self._tensor = np.zeros((len(self.scenarios), length, len(self.factors)))
+        self._lengths = np.array([len(d) for d in self.dates], dtype=np.int64)
+        self._date_table = np.empty((len(self.scenarios), length + 1), dtype="datetime64[ns]")
+        for s, name in enumerate(self.scenarios):
+            self._tensor[s, :self._lengths[s]] = windows[name].fillna(0.0).to_numpy()
+            dates = self.dates[s].to_numpy()
+            self._date_table[s] = dates[np.clip(np.arange(length + 1) - 1, 0, len(dates) - 1)]
+
+    def _weight_matrix(self, weights):
+        """Normalise any weights input to (n_portfolios, n_factors)"""
+        if isinstance(weights, dict):
+            weights = pd.Series(weights, dtype=np.float64)
+        if isinstance(weights, pd.Series):
+            weights = weights.reindex(self.factors).fillna(0.0).to_numpy()
+        elif isinstance(weights, pd.DataFrame):
+            weights = weights.reindex(columns=self.factors).fillna(0.0).to_numpy()
+        return np.atleast_2d(np.asarray(weights, dtype=np.float64))
+
+    def run(self, weights, labels=None, chunk_size=256):
+        """
+        Stress every portfolio under every scenario
+        Args:
+            weights: Array (n_factors,) or (n_portfolios, n_factors), or dict /
+                Series / DataFrame labelled by factor
+            labels: Optional names for the portfolios
+            chunk_size: Portfolios per block, bounding memory on large books
+        Returns:
+            DataFrame indexed by (scenario, portfolio) with max_loss (negative
+            fraction), peak_date, trough_date, drawdown_days, recovery_days
+            (NaN if not recovered within the window) and window_return
+        """
+        w = self._weight_matrix(weights)
+        n_scen, n_port = len(self.scenarios), len(w)
+        labels = list(labels) if labels is not None else list(range(n_port))
+
+        blocks = [self._stress(w[i:i + chunk_size]) for i in range(0, n_port, chunk_size)]
+        result = {key: np.concatenate([b[key] for b in blocks], axis=1) if blocks else np.empty((n_scen, 0))
+                  for key in ("max_loss", "peak", "trough", "recovery", "final")}
+
+        # Wealth index i is the close of window day i - 1 (index 0 = window start)
+        scen = np.repeat(np.arange(n_scen)[:, None], n_port, axis=1)
+        peak = result["peak"].astype(np.int64)
+        trough = result["trough"].astype(np.int64)
+
+        return pd.DataFrame({
+            "scenario": np.asarray(self.scenarios, dtype=object)[scen].ravel(),
+            "portfolio": np.tile(np.asarray(labels, dtype=object), n_scen),
+            "max_loss": result["max_loss"].ravel(),
+            "peak_date": self._date_table[scen, peak].ravel(),
+            "trough_date": self._date_table[scen, trough].ravel(),
+            "drawdown_days": (trough - peak).ravel(),
+            "recovery_days": result["recovery"].ravel(),
+            "window_return": result["final"].ravel() - 1
+        }).set_index(["scenario", "portfolio"])
+
+    def _stress(self, w):
+        """Drawdown statistics for one block of portfolios, each (scenarios, portfolios)"""
+        n_scen, length, n_factors = self._tensor.shape
+        n_port = len(w)
+
+        # One product over all scenario days x portfolios
+        daily = (self._tensor.reshape(-1, n_factors) @ w.T).reshape(n_scen, length, n_port)
+
+        wealth = np.cumprod(1 + daily, axis=1)
+        wealth = np.concatenate([np.ones((n_scen, 1, n_port)), wealth], axis=1)
+        peaks = np.maximum.accumulate(wealth, axis=1)
+        drawdown = wealth / peaks - 1
+
+        trough = np.argmin(drawdown, axis=1)
+        max_loss = np.take_along_axis(drawdown, trough[:, None, :], axis=1)[:, 0, :]
+        peak_value = np.take_along_axis(peaks, trough[:, None, :], axis=1)
+
+        day = np.arange(length + 1)[None, :, None]
+        at_peak = wealth >= peak_value * (1 - 1e-12)
+        peak = np.argmax(at_peak, axis=1)
+        recovered = at_peak & (day > trough[:, None, :]) & (day <= self._lengths[:, None, None])
+        has_recovered = recovered.any(axis=1) & (max_loss < 0)
+        recovery = np.where(has_recovered, np.argmax(recovered, axis=1) - trough, np.nan)
+
+        last = np.broadcast_to(self._lengths[:, None, None], (n_scen, 1, n_port))
+        final = np.take_along_axis(wealth, last, axis=1)[:, 0, :]
+
+        return {"max_loss": max_loss, "peak": peak, "trough": trough, "recovery": recovery, "final": final}
+
+    @staticmethod
+    def asset_class_returns(equity_returns, rates):
+        """
+        Daily factor returns for the allocation buckets
+        Args:
+            equity_returns: Series of daily equity index (^NSEI) returns
+            rates: Dict of non-equity bucket -> annual accrual rate, e.g.
+                {'debt': 0.07, 'liquid': 0.04}
+        Returns:
+            DataFrame with an 'equity' column plus one steady-accrual column per rate
+        """
+        frame = pd.DataFrame({"equity": equity_returns})
+        for bucket, rate in rates.items():
+            frame[bucket] = (1 + rate) ** (1 / 252) - 1
+        return frame
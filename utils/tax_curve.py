@@ -0,0 +1,122 @@
+"""
+Precomputed Tax Curves
+Dense tax-vs-taxable-income tables for instant lookups
+"""
+
+import hashlib
+import os
+import tempfile
+from math import gcd
+from pathlib import Path
+
+import numpy as np
+
+
+class TaxCurve:
+    """Tax (including cess) for both regimes on a fixed income grid"""
+
+    MAX_INCOME = 50000000  # ₹5 crore
+    STEP = 1000
+    CESS = 0.04
+
+    # One curve per rule set per process
+    _curves = {}
+
+    def __init__(self, table, step, top_rates):
+        self.table = table          # shape (points, 2): new, old
+        self.step = step
+        self.top_rates = top_rates  # marginal rate above MAX_INCOME per regime
+        self.max_income = step * (len(table) - 1)
+
+    @classmethod
+    def for_rules(cls, new_slabs, old_slabs, cache_dir=None):
+        """
+        Get the curve for a slab rule set, building it at most once
+        Args:
+            new_slabs: New regime slabs as (limit, rate) tuples
+            old_slabs: Old regime slabs as (limit, rate) tuples
+            cache_dir: Directory for the shared .npy file (None = memory only)
+        Returns:
+            TaxCurve instance
+        """
+        key = cls.rules_hash(new_slabs, old_slabs)
+        curve = cls._curves.get(key)
+        if curve is None:
+            curve = cls._load_or_build(key, new_slabs, old_slabs, cache_dir)
+            cls._curves[key] = curve
+        return curve
+
+    @staticmethod
+    def rules_hash(new_slabs, old_slabs):
+        """Short hash identifying an FY rule set"""
+        payload = repr((new_slabs, old_slabs, TaxCurve.CESS, TaxCurve.MAX_INCOME))
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    @classmethod
+    def _load_or_build(cls, key, new_slabs, old_slabs, cache_dir):
+        """Memory-map a cached table from disk, or build and save it"""
+        # Every finite slab boundary must land on a grid point for exact interpolation
+        step = cls.STEP
+        for limit, _ in new_slabs + old_slabs:
+            if limit != float('inf'):
+                step = gcd(step, int(limit))
+
+        top_rates = np.array([new_slabs[-1][1], old_slabs[-1][1]]) * (1 + cls.CESS)
+
+        path = None
+        if cache_dir is not None:
+            path = Path(cache_dir) / f"tax_curve_{key}.npy"
+            if path.exists():
+                return cls(np.load(path, mmap_mode='r'), step, top_rates)
+
+        income = np.arange(0, cls.MAX_INCOME + step, step, dtype=np.float64)
+        table = np.column_stack([
+            cls.slab_tax(income, new_slabs),
+            cls.slab_tax(income, old_slabs)
+        ]) * (1 + cls.CESS)
+
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial table
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.npy')
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, table)
+            os.chmod(tmp, 0o644)
+            os.replace(tmp, path)
+            table = np.load(path, mmap_mode='r')
+
+        return cls(table, step, top_rates)
+
+    @staticmethod
+    def slab_tax(income, slabs):
+        """Slab tax before cess, evaluated over an array of any shape"""
+        upper = np.array([limit for limit, _ in slabs], dtype=np.float64)
+        lower = np.concatenate(([0.0], upper[:-1]))
+        rates = np.array([rate for _, rate in slabs], dtype=np.float64)
+        income = np.asarray(income, dtype=np.float64)[..., None]
+        return np.clip(income - lower, 0, upper - lower) @ rates
+
+    def lookup(self, taxable_income, regime='new'):
+        """
+        O(1) tax lookup with exact piecewise-linear interpolation
+        Args:
+            taxable_income: Scalar or array of taxable incomes
+            regime: 'new' or 'old'
+        Returns:
+            Total tax (float or array)
+        """
+        col = 0 if regime == 'new' else 1
+        x = np.maximum(np.asarray(taxable_income, dtype=np.float64), 0)
+
+        clipped = np.minimum(x, self.max_income)
+        idx = np.minimum((clipped // self.step).astype(np.int64), len(self.table) - 2)
+        frac = (clipped - idx * self.step) / self.step
+
+        lo = self.table[idx, col]
+        hi = self.table[idx + 1, col]
+        tax = lo + (hi - lo) * frac
+
+        # Beyond the table the top slab rate applies linearly
+        tax = tax + np.maximum(x - self.max_income, 0) * self.top_rates[col]
+
+        return float(tax) if tax.ndim == 0 else tax
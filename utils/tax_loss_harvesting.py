@@ -0,0 +1,176 @@
+"""
+Tax-Loss Harvesting Scanner
+Flags open lots whose unrealised losses can offset this year's realised gains
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.capital_gains import CapitalGainsEngine
+
+
+class TaxLossHarvester:
+    """Rank loss-making lots by tax saved per rupee sold"""
+
+    def __init__(self, open_lots, realized=None, slab_rate=0.30, as_of=None):
+        """
+        Args:
+            open_lots: DataFrame like CapitalGainsEngine.open_lots
+                (isin, asset_class, buy_date, quantity, buy_price)
+            realized: Summary from CapitalGainsEngine.summarize() for this FY
+            slab_rate: Marginal slab rate applied to debt STCG
+            as_of: Date used to decide short vs long term (default today)
+        """
+        lots = pd.DataFrame(open_lots).reset_index(drop=True)
+        as_of = pd.Timestamp(as_of or pd.Timestamp.now().normalize())
+
+        self.isin = lots['isin'].to_numpy()
+        self.asset_class = lots['asset_class'].to_numpy()
+        self.buy_date = pd.to_datetime(lots['buy_date']).to_numpy()
+        self.quantity = lots['quantity'].to_numpy(dtype=np.float64)
+        self.cost = self.quantity * lots['buy_price'].to_numpy(dtype=np.float64)
+
+        holding_days = (as_of.to_datetime64() - self.buy_date).astype('timedelta64[D]').astype(np.int64)
+        threshold = np.where(self.asset_class == 'equity',
+                             CapitalGainsEngine.HOLDING_PERIOD_DAYS['equity'],
+                             CapitalGainsEngine.HOLDING_PERIOD_DAYS['debt'])
+        self.long_term = holding_days > threshold
+
+        # ISIN -> lot positions (CSR layout) so a price tick touches only its lots
+        self._isin_codes, self._isins = pd.factorize(self.isin)
+        order = np.argsort(self._isin_codes, kind='stable')
+        self._lots_by_isin = order
+        self._isin_bounds = np.concatenate(([0], np.cumsum(np.bincount(self._isin_codes,
+                                                                        minlength=len(self._isins)))))
+        self._isin_lookup = {isin: i for i, isin in enumerate(self._isins)}
+
+        self.price = np.full(len(lots), np.nan)
+        self.market_value = np.full(len(lots), np.nan)
+        self.unrealized = np.full(len(lots), np.nan)
+
+        self._set_tiers(realized or {}, slab_rate)
+        self._last_result = None
+
+    def _set_tiers(self, realized, slab_rate):
+        """Build the (capacity, rate) waterfall each kind of loss can absorb"""
+        taxable_ltcg = (max(0, realized.get('ltcg_equity', 0) - realized.get('ltcg_exemption', 0)) +
+                        realized.get('ltcg_debt', 0))
+
+        # Long-term losses can only go against LTCG, so they claim it first
+        self._lt_tiers = [(taxable_ltcg, CapitalGainsEngine.LTCG_RATE)]
+
+        # Short-term losses go against STCG first, highest rate first,
+        # then whatever LTCG is left after long-term losses
+        st_tiers = [
+            (realized.get('stcg_debt', 0), slab_rate),
+            (realized.get('stcg_equity', 0), CapitalGainsEngine.STCG_EQUITY_RATE)
+        ]
+        self._st_tiers = sorted(st_tiers, key=lambda tier: -tier[1])
+
+    def scan(self, prices):
+        """
+        Full scan of every lot against a price map
+        Args:
+            prices: Dict or Series of ISIN -> current price
+        Returns:
+            DataFrame of loss lots ranked by tax saved per rupee sold
+        """
+        prices = pd.Series(prices, dtype=np.float64)
+        self.price = prices.reindex(self._isins).to_numpy()[self._isin_codes]
+        self._revalue(np.arange(len(self.price)))
+        self._last_result = self._rank()
+        return self._last_result
+
+    def update_prices(self, changed_prices):
+        """
+        Refresh after a few prices move, revaluing only the affected lots
+        Args:
+            changed_prices: Dict of ISIN -> new price
+        Returns:
+            Updated ranked DataFrame (reused as-is if no loss lot changed)
+        """
+        touched = []
+        for isin, price in changed_prices.items():
+            code = self._isin_lookup.get(isin)
+            if code is None:
+                continue
+            lots = self._lots_by_isin[self._isin_bounds[code]:self._isin_bounds[code + 1]]
+            self.price[lots] = price
+            touched.append(lots)
+
+        if not touched:
+            return self._last_result if self._last_result is not None else self._rank()
+
+        touched = np.concatenate(touched)
+        was_loss = self.unrealized[touched] < 0
+        self._revalue(touched)
+        is_loss = self.unrealized[touched] < 0
+
+        # Gains that stay gains cannot change the harvest list
+        if self._last_result is not None and not (was_loss | is_loss).any():
+            return self._last_result
+
+        self._last_result = self._rank()
+        return self._last_result
+
+    def _revalue(self, lots):
+        """Recompute market value and unrealised P&L for the given lots"""
+        self.market_value[lots] = self.quantity[lots] * self.price[lots]
+        self.unrealized[lots] = self.market_value[lots] - self.cost[lots]
+
+    def _rank(self):
+        """Allocate losses to realised gains and rank candidates"""
+        candidates = np.flatnonzero(self.unrealized < 0)
+        loss = -self.unrealized[candidates]
+        value = self.market_value[candidates]
+        long_term = self.long_term[candidates]
+
+        # Within each kind, the deepest loss per rupee sold gets the best tier
+        tax_saved = np.zeros(len(candidates))
+        lt_ltcg_used = self._waterfall(loss, value, long_term, self._lt_tiers, tax_saved)
+
+        ltcg_left = max(0, self._lt_tiers[0][0] - lt_ltcg_used)
+        st_tiers = self._st_tiers + [(ltcg_left, CapitalGainsEngine.LTCG_RATE)]
+        self._waterfall(loss, value, ~long_term, st_tiers, tax_saved)
+
+        per_rupee = np.divide(tax_saved, value, out=np.zeros_like(tax_saved), where=value > 0)
+
+        result = pd.DataFrame({
+            'isin': self.isin[candidates],
+            'asset_class': self.asset_class[candidates],
+            'term': np.where(long_term, 'LTCG', 'STCG'),
+            'quantity': self.quantity[candidates],
+            'price': self.price[candidates],
+            'market_value': value,
+            'unrealized_loss': loss,
+            'tax_saved': tax_saved,
+            'tax_saved_per_rupee': per_rupee
+        })
+
+        return result.sort_values(['tax_saved_per_rupee', 'unrealized_loss'],
+                                  ascending=False, kind='mergesort').reset_index(drop=True)
+
+    @staticmethod
+    def _waterfall(loss, value, mask, tiers, tax_saved):
+        """
+        Pour losses (best loss-per-rupee first) into rate tiers
+        Returns the amount of gains absorbed; writes tax saved in place
+        """
+        idx = np.flatnonzero(mask)
+        if len(idx) == 0:
+            return 0.0
+
+        ratio = np.divide(loss[idx], value[idx], out=np.full(len(idx), np.inf), where=value[idx] > 0)
+        idx = idx[np.argsort(-ratio, kind='stable')]
+
+        # Cumulative tax saved is piecewise linear in cumulative loss harvested
+        capacities = np.array([max(0, cap) for cap, _ in tiers], dtype=np.float64)
+        rates = np.array([rate for _, rate in tiers], dtype=np.float64)
+        knots = np.concatenate(([0.0], np.cumsum(capacities)))
+        saved_at_knots = np.concatenate(([0.0], np.cumsum(capacities * rates)))
+
+        cum_loss = np.cumsum(loss[idx])
+        saved = np.interp(cum_loss, knots, saved_at_knots)
+        tax_saved[idx] = np.diff(np.concatenate(([0.0], saved)))
+
+        return float(min(cum_loss[-1], knots[-1]))
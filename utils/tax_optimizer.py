@@ -3,6 +3,15 @@ Tax Optimizer for Indian Investors
 Helps optimize tax savings under various sections
 """
 
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from utils.capital_gains import CapitalGainsEngine
+from utils.tax_curve import TaxCurve
+
 class TaxOptimizer:
     """Calculate and optimize tax savings for Indian investors"""
     
@@ -24,6 +33,17 @@ class TaxOptimizer:
         (float('inf'), 0.30)  # Above 10L - 30%
     ]
     
+    # Return, compounding and lock-in assumptions for tax-saving instruments
+    TAX_SAVING_INSTRUMENTS = {
+        'ELSS': {'rate': 0.12, 'periods_per_year': 1, 'lock_in': 3, 'section': '80c'},
+        'PPF': {'rate': 0.071, 'periods_per_year': 1, 'lock_in': 15, 'section': '80c'},
+        'NPS': {'rate': 0.10, 'periods_per_year': 1, 'lock_in': 25, 'section': '80ccd_1b'},
+        'Tax Saving FD': {'rate': 0.07, 'periods_per_year': 4, 'lock_in': 5, 'section': '80c'}
+    }
+    NPS_ANNUITY_SHARE = 0.40  # Portion of NPS corpus that must buy an annuity
+    NPS_ANNUITY_RATE = 0.06  # Yearly annuity income per rupee of purchase price
+    NPS_ANNUITY_YEARS = 20  # Years of annuity income, after which the purchase price is returned
+    
     def __init__(self):
         self.section_80c_limit = 150000
         self.section_80ccd_1b_limit = 50000  # Additional NPS
@@ -34,20 +54,54 @@ class TaxOptimizer:
         self.hra_exemption = True
         self.standard_deduction = 50000
     
-    def calculate_tax(self, income, regime='new', deductions=None):
+    def calculate_tax(self, income, regime='new', deductions=None, capital_gains=None):
         """
         Calculate tax based on income and regime
         Args:
             income: Annual gross income
             regime: 'new' or 'old'
             deductions: Dict of deductions for old regime
+            capital_gains: Optional summary from CapitalGainsEngine.summarize()
         Returns:
             Dict with tax calculation details
         """
+        # Debt STCG is taxed at slab rates, so it joins the slab income
+        slab_gains = capital_gains.get('stcg_debt', 0) if capital_gains else 0
+        
         if regime == 'new':
-            return self._calculate_new_regime_tax(income)
+            result = self._calculate_new_regime_tax(income + slab_gains)
         else:
-            return self._calculate_old_regime_tax(income, deductions or {})
+            result = self._calculate_old_regime_tax(income + slab_gains, deductions or {})
+        
+        if capital_gains:
+            result = self._add_capital_gains_tax(result, income, capital_gains)
+        
+        return result
+    
+    def _add_capital_gains_tax(self, result, income, capital_gains):
+        """Add special-rate STCG / LTCG tax on top of the slab calculation"""
+        stcg_equity_tax = capital_gains.get('stcg_equity', 0) * CapitalGainsEngine.STCG_EQUITY_RATE
+        taxable_ltcg = (max(0, capital_gains.get('ltcg_equity', 0) - capital_gains.get('ltcg_exemption', 0)) +
+                        capital_gains.get('ltcg_debt', 0))
+        ltcg_tax = taxable_ltcg * CapitalGainsEngine.LTCG_RATE
+        special_tax = stcg_equity_tax + ltcg_tax
+        
+        total_income = income + capital_gains.get('total_gains', 0)
+        result['gross_income'] = income
+        result['tax_before_cess'] += special_tax
+        result['cess'] = result['tax_before_cess'] * 0.04
+        result['total_tax'] = result['tax_before_cess'] + result['cess']
+        result['effective_rate'] = (result['total_tax'] / total_income * 100) if total_income > 0 else 0
+        result['capital_gains'] = {
+            'stcg_equity_tax': stcg_equity_tax,
+            'stcg_debt_at_slab': capital_gains.get('stcg_debt', 0),
+            'ltcg_exemption': capital_gains.get('ltcg_exemption', 0),
+            'taxable_ltcg': taxable_ltcg,
+            'ltcg_tax': ltcg_tax,
+            'total_special_tax': special_tax
+        }
+        
+        return result
     
     def _calculate_new_regime_tax(self, income):
         """Calculate tax under new regime"""
@@ -90,20 +144,35 @@ class TaxOptimizer:
             'breakdown': breakdown
         }
     
+    def capped_deductions(self, deductions, income):
+        """
+        Old-regime deductions after each section's limit
+        Args:
+            deductions: Dict of claimed amounts by section ('80c', '80ccd_1b', '80d',
+                '80d_parents', '80g', '24b', 'hra'); values may be per-year arrays
+            income: Gross income (scalar or per-year array), which limits 80G
+        Returns:
+            Dict of section -> allowed amount, without the standard deduction
+        """
+        return {
+            '80c': self._cap(deductions.get('80c', 0), self.section_80c_limit),
+            '80ccd_1b': self._cap(deductions.get('80ccd_1b', 0), self.section_80ccd_1b_limit),
+            '80d': self._cap(deductions.get('80d', 0), self.section_80d_limit),
+            '80d_parents': self._cap(deductions.get('80d_parents', 0), self.section_80d_parents_limit),
+            '80g': self._cap(deductions.get('80g', 0), income * self.section_80g_limit),
+            '24b': self._cap(deductions.get('24b', 0), self.section_24b_limit),
+            'hra': deductions.get('hra', 0)
+        }
+    
+    @staticmethod
+    def _cap(amount, limit):
+        # Plain min keeps scalar results as Python numbers for display
+        return np.minimum(amount, limit) if np.ndim(amount) or np.ndim(limit) else min(amount, limit)
+    
     def _calculate_old_regime_tax(self, income, deductions):
         """Calculate tax under old regime with deductions"""
-        # Calculate total deductions
-        section_80c = min(deductions.get('80c', 0), self.section_80c_limit)
-        section_80ccd_1b = min(deductions.get('80ccd_1b', 0), self.section_80ccd_1b_limit)
-        section_80d = min(deductions.get('80d', 0), self.section_80d_limit)
-        section_80d_parents = min(deductions.get('80d_parents', 0), self.section_80d_parents_limit)
-        section_80g = min(deductions.get('80g', 0), income * self.section_80g_limit)
-        section_24b = min(deductions.get('24b', 0), self.section_24b_limit)
-        hra_exemption = deductions.get('hra', 0)
-        
-        total_deductions = (section_80c + section_80ccd_1b + section_80d + 
-                          section_80d_parents + section_80g + section_24b + 
-                          hra_exemption + self.standard_deduction)
+        allowed = self.capped_deductions(deductions, income)
+        total_deductions = sum(allowed.values()) + self.standard_deduction
         
         taxable_income = max(0, income - total_deductions)
         
@@ -138,13 +207,13 @@ class TaxOptimizer:
             'regime': 'Old Regime',
             'gross_income': income,
             'deductions': {
-                'Section 80C': section_80c,
-                'Section 80CCD(1B) - NPS': section_80ccd_1b,
-                'Section 80D - Health': section_80d,
-                'Section 80D - Parents': section_80d_parents,
-                'Section 80G - Donations': section_80g,
-                'Section 24B - Home Loan': section_24b,
-                'HRA Exemption': hra_exemption,
+                'Section 80C': allowed['80c'],
+                'Section 80CCD(1B) - NPS': allowed['80ccd_1b'],
+                'Section 80D - Health': allowed['80d'],
+                'Section 80D - Parents': allowed['80d_parents'],
+                'Section 80G - Donations': allowed['80g'],
+                'Section 24B - Home Loan': allowed['24b'],
+                'HRA Exemption': allowed['hra'],
                 'Standard Deduction': self.standard_deduction
             },
             'total_deductions': total_deductions,
@@ -156,10 +225,50 @@ class TaxOptimizer:
             'breakdown': breakdown
         }
     
-    def compare_regimes(self, income, deductions):
-        """Compare both tax regimes"""
-        new_regime = self.calculate_tax(income, 'new')
-        old_regime = self.calculate_tax(income, 'old', deductions)
+    def calculate_tax_array(self, taxable_income, regime='new'):
+        """
+        Vectorized slab tax (including cess) for many taxable incomes at once
+        Args:
+            taxable_income: Array of taxable incomes (after deductions)
+            regime: 'new' or 'old'
+        Returns:
+            NumPy array of total tax for each income
+        """
+        slabs = self.NEW_REGIME_SLABS if regime == 'new' else self.OLD_REGIME_SLABS
+        return TaxCurve.slab_tax(taxable_income, slabs) * (1 + TaxCurve.CESS)
+    
+    def get_tax_curve(self):
+        """Precomputed tax curve for this FY's slabs, shared across processes via mmap"""
+        cache_dir = os.getenv('CODENCASH_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'codencash'))
+        return TaxCurve.for_rules(self.NEW_REGIME_SLABS, self.OLD_REGIME_SLABS, cache_dir)
+    
+    def quick_compare(self, income, deductions):
+        """
+        Instant regime comparison from the precomputed tax curve
+        Args:
+            income: Annual gross income
+            deductions: Dict of deductions for old regime
+        Returns:
+            Dict with both taxes, savings and better regime
+        """
+        curve = self.get_tax_curve()
+        
+        total_deductions = sum(self.capped_deductions(deductions, income).values()) + self.standard_deduction
+        
+        new_tax = curve.lookup(income - self.standard_deduction, 'new')
+        old_tax = curve.lookup(income - total_deductions, 'old')
+        
+        return {
+            'new_regime_tax': new_tax,
+            'old_regime_tax': old_tax,
+            'savings': abs(new_tax - old_tax),
+            'better_regime': 'Old Regime' if new_tax > old_tax else 'New Regime'
+        }
+    
+    def compare_regimes(self, income, deductions, capital_gains=None):
+        """Compare both tax regimes, optionally including realised capital gains"""
+        new_regime = self.calculate_tax(income, 'new', capital_gains=capital_gains)
+        old_regime = self.calculate_tax(income, 'old', deductions, capital_gains)
         
         savings = new_regime['total_tax'] - old_regime['total_tax']
         better_regime = 'Old Regime' if savings > 0 else 'New Regime'
@@ -241,6 +350,78 @@ class TaxOptimizer:
             'suggestions': suggestions
         }
     
+    def compare_80c_instruments(self, amounts, horizons, tax_brackets):
+        """
+        Post-tax maturity value of each tax-saving instrument over a parameter grid
+        Args:
+            amounts: Contribution amounts (one-time, this financial year)
+            horizons: Holding periods in years (at least 1)
+            tax_brackets: Marginal slab rates (e.g. 0.05, 0.2, 0.3)
+        Returns:
+            DataFrame with one row per amount x horizon x bracket x instrument; for
+            NPS, post_tax_value values the annuity at the present value of its
+            after-tax income, and annuity_income is its pre-tax yearly payout
+        """
+        amount = np.asarray(amounts, dtype=np.float64)[:, None, None]
+        horizon = np.asarray(horizons, dtype=np.float64)[None, :, None]
+        if (horizon < 1).any():
+            # post_tax_cagr takes the 1/horizon root
+            raise ValueError("Horizons must be at least 1 year")
+        bracket = np.asarray(tax_brackets, dtype=np.float64)[None, None, :]
+        shape = np.broadcast_shapes(amount.shape, horizon.shape, bracket.shape)
+        
+        limits = {'80c': self.section_80c_limit, '80ccd_1b': self.section_80ccd_1b_limit}
+        rows = []
+        
+        for name, inst in self.TAX_SAVING_INSTRUMENTS.items():
+            m = inst['periods_per_year']
+            gross = amount * (1 + inst['rate'] / m) ** (m * horizon)
+            annuity_income = np.zeros_like(gross)
+            
+            if name == 'ELSS':
+                # LTCG on redemption above the yearly exemption
+                gain = gross - amount
+                maturity_tax = np.maximum(0, gain - CapitalGainsEngine.LTCG_EXEMPTION) * CapitalGainsEngine.LTCG_RATE * 1.04
+            elif name == 'PPF':
+                # EEE - maturity is fully tax free
+                maturity_tax = np.zeros_like(gross)
+            elif name == 'NPS':
+                # The 60% lump sum is tax free and buying the annuity is not taxed; only the
+                # annuity income is, at slab. Its tax is valued at maturity by discounting at
+                # the annuity rate: r * t * (1 - (1 + r)^-n) / r per rupee of purchase price
+                annuity = gross * self.NPS_ANNUITY_SHARE
+                discount = 1 - (1 + self.NPS_ANNUITY_RATE) ** -self.NPS_ANNUITY_YEARS
+                maturity_tax = annuity * bracket * 1.04 * discount
+                annuity_income = annuity * self.NPS_ANNUITY_RATE
+            else:
+                # FD interest is taxed every year at slab as it accrues
+                annual_yield = (1 + inst['rate'] / m) ** m - 1
+                post_tax = amount * (1 + annual_yield * (1 - bracket * 1.04)) ** horizon
+                maturity_tax = gross - post_tax
+            
+            eligible = np.minimum(amount, limits[inst['section']])
+            rows.append({
+                'instrument': np.full(shape, name),
+                'amount': np.broadcast_to(amount, shape),
+                'horizon': np.broadcast_to(horizon, shape),
+                'tax_bracket': np.broadcast_to(bracket, shape),
+                'lock_in': np.full(shape, inst['lock_in']),
+                'available': np.broadcast_to(horizon >= inst['lock_in'], shape),
+                'maturity_value': np.broadcast_to(gross, shape),
+                'tax_on_maturity': np.broadcast_to(maturity_tax, shape),
+                'post_tax_value': np.broadcast_to(gross - maturity_tax, shape),
+                'annuity_income': np.broadcast_to(annuity_income, shape),
+                'tax_saved_upfront': np.broadcast_to(eligible * bracket * 1.04, shape)
+            })
+        
+        table = pd.DataFrame({col: np.concatenate([r[col].ravel() for r in rows]) for col in rows[0]})
+        
+        # Net cost after the deduction, and the post-tax CAGR on that cost
+        net_cost = table['amount'] - table['tax_saved_upfront']
+        table['post_tax_cagr'] = ((table['post_tax_value'] / net_cost) ** (1 / table['horizon']) - 1) * 100
+        
+        return table
+    
     def calculate_nps_benefit(self, contribution):
         """Calculate additional NPS benefit under 80CCD(1B)"""
         eligible = min(contribution, self.section_80ccd_1b_limit)
@@ -0,0 +1,162 @@
+"""
+Multi-Year Tax & Cash-Flow Projection
+Projects tax under both regimes 10-30 years forward
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.sip_calculator import SIPCalculator
+from utils.tax_optimizer import TaxOptimizer
+
+
+class TaxProjector:
+    """Project salary, deductions and tax year by year as arrays"""
+
+    # Shared across instances so every session reuses earlier projections
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()  # Streamlit runs sessions on separate threads
+    CACHE_SIZE = 256
+
+    def __init__(self, tax_optimizer=None, sip_calculator=None):
+        self.tax_optimizer = tax_optimizer or TaxOptimizer()
+        self.sip_calculator = sip_calculator or SIPCalculator()
+
+    def project(self, income, years=20, salary_growth=8, elss_monthly_sip=0,
+                sip_step_up=0, nps_annual=0, other_80c=0, loan_amount=0,
+                loan_rate=8.5, loan_tenure_years=20, deductions=None):
+        """
+        Project tax under both regimes for every year ahead
+        Args:
+            income: Current annual gross income
+            years: Projection horizon (10 to 30 years)
+            salary_growth: Annual salary growth (as percentage)
+            elss_monthly_sip: Monthly ELSS SIP counted under 80C
+            sip_step_up: Annual step-up of the ELSS SIP (as percentage)
+            nps_annual: Annual NPS contribution under 80CCD(1B)
+            other_80c: Other fixed 80C investments per year (PPF, EPF...)
+            loan_amount: Home loan principal outstanding today
+            loan_rate: Home loan interest rate (as percentage)
+            loan_tenure_years: Remaining home loan tenure
+            deductions: Other constant old-regime deductions (80d, hra...)
+        Returns:
+            Dict of per-year arrays, switch years and a recommendation
+        """
+        profile = {
+            'income': income, 'years': years, 'salary_growth': salary_growth,
+            'elss_monthly_sip': elss_monthly_sip, 'sip_step_up': sip_step_up,
+            'nps_annual': nps_annual, 'other_80c': other_80c,
+            'loan_amount': loan_amount, 'loan_rate': loan_rate,
+            'loan_tenure_years': loan_tenure_years, 'deductions': deductions or {}
+        }
+        key = self.profile_hash(profile)
+
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                return self._copy(result)
+
+        result = self._project(**profile)
+
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+        return self._copy(result)
+
+    @staticmethod
+    def _copy(result):
+        """Copy of a cached projection, so callers cannot change what other sessions get"""
+        return {k: v.copy() if isinstance(v, (np.ndarray, list)) else v for k, v in result.items()}
+
+    @staticmethod
+    def profile_hash(profile):
+        """Stable hash of a projection profile"""
+        payload = json.dumps(profile, sort_keys=True, default=float)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _project(self, income, years, salary_growth, elss_monthly_sip, sip_step_up,
+                 nps_annual, other_80c, loan_amount, loan_rate, loan_tenure_years,
+                 deductions):
+        """Evaluate every projection year at once"""
+        opt = self.tax_optimizer
+        year_index = np.arange(years)
+
+        gross_income = income * (1 + salary_growth / 100) ** year_index
+        elss = self.sip_calculator.yearly_contributions(elss_monthly_sip, years, sip_step_up)
+        nps = np.full(years, float(nps_annual))
+        interest, principal, emi = self._home_loan_schedule(loan_amount, loan_rate, loan_tenure_years, years)
+
+        # Old regime deductions per year, capped by the same rules as a single year
+        claimed = {**deductions, '80c': elss + other_80c + principal, '80ccd_1b': nps, '24b': interest}
+        old_deductions = sum(opt.capped_deductions(claimed, gross_income).values()) + opt.standard_deduction
+        new_tax = opt.calculate_tax_array(gross_income - opt.standard_deduction, 'new')
+        old_tax = opt.calculate_tax_array(np.maximum(0, gross_income - old_deductions), 'old')
+
+        better = np.where(old_tax < new_tax, 'Old Regime', 'New Regime')
+        best_tax = np.minimum(new_tax, old_tax)
+
+        # Cash left after the better regime's tax, investments and EMIs
+        outflow = elss + other_80c + nps + emi
+        net_cash_flow = gross_income - best_tax - outflow
+
+        switch_years = [int(y) + 1 for y in np.flatnonzero(better[1:] != better[:-1]) + 1]
+
+        return {
+            'years': year_index + 1,
+            'gross_income': gross_income,
+            'elss_contribution': elss,
+            'nps_contribution': nps,
+            'loan_interest': interest,
+            'loan_principal': principal,
+            'old_regime_deductions': old_deductions,
+            'new_regime_tax': new_tax,
+            'old_regime_tax': old_tax,
+            'better_regime': better,
+            'savings': np.abs(new_tax - old_tax),
+            'net_cash_flow': net_cash_flow,
+            'cumulative_tax_saved': np.cumsum(np.maximum(new_tax, old_tax) - best_tax),
+            'switch_years': switch_years,
+            'recommendation': self._get_recommendation(better, switch_years)
+        }
+
+    def _home_loan_schedule(self, principal, annual_rate, tenure_years, years):
+        """Yearly interest, principal repaid and EMI outflow for a home loan"""
+        zeros = np.zeros(years)
+        if principal <= 0 or tenure_years <= 0:
+            return zeros, zeros, zeros
+
+        r = annual_rate / 100 / 12
+        n = tenure_years * 12
+        emi = principal * r * (1 + r) ** n / ((1 + r) ** n - 1) if r > 0 else principal / n
+
+        # Outstanding balance at each year end, from the annuity formula
+        months = np.minimum(np.arange(years + 1) * 12, n)
+        if r > 0:
+            balance = principal * (1 + r) ** months - emi * ((1 + r) ** months - 1) / r
+        else:
+            balance = principal - emi * months
+        balance = np.maximum(balance, 0)
+
+        paid = emi * np.diff(months)
+        principal_repaid = balance[:-1] - balance[1:]
+        interest = paid - principal_repaid
+
+        return interest, principal_repaid, paid
+
+    def _get_recommendation(self, better, switch_years):
+        """Summarise when to stay and when to switch regimes"""
+        if not switch_years:
+            return f"{better[0]} stays optimal for all {len(better)} years."
+
+        first = switch_years[0]
+        return (f"Start with {better[0]}, then switch to {better[first - 1]} in year {first}."
+                if len(switch_years) == 1 else
+                f"Start with {better[0]}; the better regime changes in years "
+                f"{', '.join(str(y) for y in switch_years)}. Review your choice each year.")
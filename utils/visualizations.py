@@ -70,28 +70,35 @@ class PortfolioVisualizations:
         return fig
     
     @staticmethod
-    def create_returns_chart(projected_returns: Dict, capital: float, monthly_sip: float) -> go.Figure:
+    def create_returns_chart(projected_returns: Dict, capital: float, monthly_sip: float,
+                             projection_curve: Dict = None, max_years: int = 10) -> go.Figure:
         """
         Create a line chart for projected returns over time
         Args:
             projected_returns: Dict with year projections
             capital: Initial capital
             monthly_sip: Monthly SIP amount
+            projection_curve: Optional yearly arrays from PortfolioGenerator.project_growth
+            max_years: Years of the projection curve to plot
         Returns:
             Plotly figure
         """
-        years = []
-        total_values = []
-        invested_amounts = []
-        gains = []
-        
-        for period, values in sorted(projected_returns.items()):
-            year = int(period.split('_')[0])
-            years.append(f"{year}Y")
-            total_values.append(values['total_value'])
-            invested = capital + (monthly_sip * 12 * year)
-            invested_amounts.append(invested)
-            gains.append(values['gains'])
+        if projection_curve is not None:
+            # Plot the precomputed yearly curve directly
+            years = [f"{y}Y" for y in projection_curve['years'][:max_years + 1]]
+            total_values = projection_curve['total_value'][:max_years + 1]
+            invested_amounts = projection_curve['invested'][:max_years + 1]
+        else:
+            years = []
+            total_values = []
+            invested_amounts = []
+            
+            for period, values in sorted(projected_returns.items()):
+                year = int(period.split('_')[0])
+                years.append(f"{year}Y")
+                total_values.append(values['total_value'])
+                invested = capital + (monthly_sip * 12 * year)
+                invested_amounts.append(invested)
         
         fig = make_subplots(specs=[[{"secondary_y": False}]])
         